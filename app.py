@@ -1,39 +1,3 @@
-An excellent and necessary feature enhancement. Adding user authentication fundamentally changes the application from a single-user tool to a multi-tenant platform. This requires significant changes to the application structure, data storage, and security model.
-
-Here is the updated code implementing user authentication with Firebase Auth, including login, sign-up, and a "Forgot Password" feature.
-
-Key Changes:
-
-Firebase Authentication (Client-Side):
-
-Integrated pyrebase4, a Python wrapper for the Firebase REST API, to handle user sign-up, sign-in, and password resets.
-
-A new firebase-web-config secret is required in Google Secret Manager. This is the web app configuration JSON from your Firebase project settings.
-
-Application Flow:
-
-The app now has two main states: a login/authentication UI and the main application.
-
-st.session_state is used to maintain the logged-in user's session.
-
-Users are greeted with a login page with tabs for "Login," "Sign Up," and "Forgot Password."
-
-Data Scoping:
-
-Firestore: Every new scroll is now tagged with the creator's uid (unique user ID from Firebase Auth) in metadata.created_by. All Firestore queries are filtered to only show scrolls belonging to the logged-in user.
-
-Algolia: The user's uid is also added to the Algolia record. Searches are now filtered by this uid, ensuring users can only search their own content.
-
-Security Prerequisite: You must update your Firestore Security Rules to enforce this on the backend. A comment with example rules has been added to the code.
-
-UI Enhancements:
-
-The main application now features a sidebar displaying the logged-in user's email and a "Logout" button.
-
-The "Forgot Password" tab provides the necessary functionality for users to reset their passwords via email.
-
-Updated Code (app.py)
-Generated python
 """
 Codessa: Inkwell - MVP Scroll Capture Streamlit Application (with User Authentication)
 
@@ -63,6 +27,15 @@ Environment Requirements:
 -   `GOOGLE_APPLICATION_CREDENTIALS`: Filepath to the Google Cloud service account JSON key.
 -   `PROJECT_ID`: Your Google Cloud project ID.
 -   `GEMINI_API_ENDPOINT`: The base URL for the custom parsing API endpoint.
+-   `FIREBASE_WEB_CONFIG` (optional): The Firebase Web App config JSON. When set,
+    the login page renders without contacting Secret Manager.
+
+Startup:
+    Only the modules and clients the login page needs are loaded before it
+    renders. Firestore, Algolia, the search index, the outbox worker and the
+    parser are imported and built by get_services() on first use; while a
+    visitor is on the login page, a background thread warms them up so the
+    first logged-in rerun finds them ready. See benchmarks/startup.py.
 
 Required Secrets in Google Secret Manager:
 -   `gemini-api-key`: API key for the parsing service.
@@ -89,17 +62,27 @@ access on a per-user basis. Example:
 """
 # Codessa: Inkwell – MVP Scroll Capture App (Streamlit Version)
 
+# Heavy SDKs (firebase_admin, google.cloud.firestore / secretmanager,
+# algoliasearch, pyrebase, requests) are imported inside the functions that
+# use them, so the login page does not pay for clients it does not need.
 import streamlit as st
-import requests
 import datetime
 import uuid
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud import secretmanager
-from algoliasearch.search_client import SearchClient
 import os
 import json
-import pyrebase # Added for Firebase Authentication
+import math
+import threading
+import types
+from services.aggregations import DEFAULT_STATS_TTL_SECONDS, grouped_counts
+from services.clients import credentials_fingerprint, get_registry, secret_fingerprint
+from services.hydration import DocumentCache, hydrate_hits
+from services.ingest import BulkIngestor, load_responses
+from services.metrics import METRICS_PORT, start_http_exporter, start_trace
+from services.secret_cache import SecretCache
+from services.structured_logging import get_logger, new_correlation_id
+from services.ui_helpers import display_metrics_panel, get_parser_transport, stream_parsed_fields
+
+logger = get_logger("app")
 
 # === Constants ===
 FALLBACK_PARSED_DATA = {
@@ -116,6 +99,23 @@ DEFAULT_METADATA = {
     # "created_by" is now added dynamically
 }
 
+# Fields rendered in list views. content.raw_text (up to 50,000 characters) is
+# only loaded when the user asks for the full scroll.
+SCROLL_HEADER_FIELDS = ["scroll_id", "content.summary", "content.topics", "content.tools", "metadata"]
+
+# Statuses counted on the dashboard; new scrolls start as DEFAULT_METADATA["status"].
+SCROLL_STATUSES = ["Pending", "Active", "Archived"]
+
+# Secrets fetched in parallel when the services are built; later lookups are
+# served from cache. The login page only needs firebase-web-config.
+REQUIRED_SECRET_IDS = [
+    "algolia-app-id",
+    "algolia-admin-api-key",
+    "gemini-api-key",
+]
+# Not needed when SEARCH_BACKEND=local.
+ALGOLIA_SECRET_IDS = {"algolia-app-id", "algolia-admin-api-key"}
+
 def load_config():
     """Load and validate application configuration from environment variables."""
     config = {
@@ -131,20 +131,30 @@ def load_config():
     return config
 
 # --- INITIALIZATION FUNCTIONS ---
+# Service initializers raise RuntimeError instead of calling st.stop(), since
+# they may run on the warm-up thread, outside any Streamlit script run.
 
 def initialize_firebase_admin(service_account_path):
     """Initializes Firebase Admin SDK if not already initialized."""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
     if not firebase_admin._apps:
         try:
             cred = credentials.Certificate(service_account_path)
             firebase_admin.initialize_app(cred)
         except Exception as e:
-            st.error(f"Failed to initialize Firebase Admin. Check service account credentials. Error: {e}")
-            st.stop()
+            raise RuntimeError(f"Failed to initialize Firebase Admin. Check service account credentials. Error: {e}") from e
     return firestore.client()
 
+def close_firebase_admin(_client):
+    """Deletes the default Firebase Admin app so it can be re-initialized with rotated credentials."""
+    import firebase_admin
+    if firebase_admin._apps:
+        firebase_admin.delete_app(firebase_admin.get_app())
+
 def initialize_firebase_auth(firebase_config):
     """Initializes Pyrebase for client-side authentication."""
+    import pyrebase
     try:
         return pyrebase.initialize_app(json.loads(firebase_config))
     except Exception as e:
@@ -154,30 +164,166 @@ def initialize_firebase_auth(firebase_config):
 def initialize_secret_manager(service_account_path):
     """Initializes and returns a Secret Manager client."""
     try:
+        from google.cloud import secretmanager
         from google.oauth2 import service_account
         sm_creds = service_account.Credentials.from_service_account_file(service_account_path)
         return secretmanager.SecretManagerServiceClient(credentials=sm_creds)
     except Exception as e:
-        st.error(f"Failed to initialize Secret Manager client. Error: {e}")
-        st.stop()
+        raise RuntimeError(f"Failed to initialize Secret Manager client. Error: {e}") from e
 
 def initialize_algolia(app_id, api_key):
     """Initializes and returns an Algolia search client."""
+    from algoliasearch.search_client import SearchClient
     if not app_id or not api_key:
-        st.error("Algolia App ID or API Key is missing.")
-        st.stop()
+        raise RuntimeError("Algolia App ID or API Key is missing.")
     try:
         return SearchClient.create(app_id, api_key)
     except Exception as e:
-        st.error(f"Failed to initialize Algolia client: {e}")
+        raise RuntimeError(f"Failed to initialize Algolia client: {e}") from e
+
+def get_secret_cache(config):
+    """Returns the process-wide SecretCache, building the Secret Manager client on first use."""
+    registry = get_registry()
+    credentials_key = credentials_fingerprint(config["service_account_path"])
+    secret_client = registry.get(
+        "secret_manager",
+        lambda: initialize_secret_manager(config["service_account_path"]),
+        fingerprint=credentials_key,
+    )
+    return registry.get(
+        "secret_cache",
+        lambda: SecretCache(secret_client, config["project_id"]),
+        fingerprint=credentials_key,
+        close=lambda cache: cache.close(),
+    )
+
+def get_auth(config):
+    """Returns the Pyrebase auth client; the only client the login page needs.
+
+    The web config comes from FIREBASE_WEB_CONFIG when set, so a cold start
+    can render the login page without a Secret Manager round trip.
+    """
+    firebase_web_config = os.getenv("FIREBASE_WEB_CONFIG")
+    if not firebase_web_config:
+        try:
+            secrets = get_secret_cache(config)
+        except RuntimeError as e:
+            st.error(str(e))
+            st.stop()
+        firebase_web_config = get_secret(secrets, "firebase-web-config")
+    return get_registry().get(
+        "firebase_auth",
+        lambda: initialize_firebase_auth(firebase_web_config),
+        fingerprint=secret_fingerprint(firebase_web_config),
+    )
+
+def build_services(config):
+    """Builds (or reuses) every client the logged-in app needs.
+
+    Clients live in the process-wide registry, so reruns, sessions and the
+    warm-up thread share them. They are only rebuilt when the credentials
+    they were built from change.
+
+    Raises:
+        RuntimeError: If a client cannot be initialized.
+    """
+    from services.scroll_replica import REPLICA_ENABLED, ReplicaManager
+    from services.search_backend import SEARCH_BACKEND, build_search
+    from services.search_outbox import OutboxWorker, SearchOutbox
+
+    registry = get_registry()
+    credentials_key = credentials_fingerprint(config["service_account_path"])
+    db = registry.get(
+        "firestore",
+        lambda: initialize_firebase_admin(config["service_account_path"]),
+        fingerprint=credentials_key,
+        close=close_firebase_admin,
+    )
+    secrets = get_secret_cache(config)
+    # Local-only search needs neither the Algolia secrets nor its client.
+    use_algolia = SEARCH_BACKEND != "local"
+    secrets.prefetch([s for s in REQUIRED_SECRET_IDS if use_algolia or s not in ALGOLIA_SECRET_IDS])
+    algolia_app_id = algolia_admin_api_key = algolia_index = None
+    if use_algolia:
+        algolia_app_id = secrets.get("algolia-app-id")
+        algolia_admin_api_key = secrets.get("algolia-admin-api-key")
+        algolia_client = registry.get(
+            "algolia",
+            lambda: initialize_algolia(algolia_app_id, algolia_admin_api_key),
+            fingerprint=secret_fingerprint(algolia_app_id, algolia_admin_api_key),
+        )
+        algolia_index = algolia_client.init_index("codessa_scrolls")
+    # SEARCH_BACKEND picks Algolia, the embedded index, or both; the outbox syncs
+    # whichever index search_index fans out to.
+    search_backend, search_index, _ = registry.get(
+        "search_backend",
+        lambda: build_search(algolia_index, db),
+        fingerprint=secret_fingerprint(credentials_key, algolia_app_id, algolia_admin_api_key),
+        close=lambda built: built[2] is not None and built[2].close(),
+    )
+    outbox = registry.get(
+        "search_outbox",
+        lambda: SearchOutbox(db),
+        fingerprint=credentials_key,
+    )
+    outbox_worker = registry.get(
+        "search_outbox_worker",
+        lambda: OutboxWorker(outbox, search_index).start(),
+        fingerprint=secret_fingerprint(credentials_key, algolia_app_id, algolia_admin_api_key),
+        close=lambda worker: worker.stop(),
+    )
+    replicas = registry.get(
+        "scroll_replicas",
+        lambda: ReplicaManager(db, SCROLL_HEADER_FIELDS),
+        fingerprint=credentials_key,
+        close=lambda manager: manager.close(),
+    ) if REPLICA_ENABLED else None
+    return types.SimpleNamespace(
+        db=db,
+        secrets=secrets,
+        credentials_key=credentials_key,
+        search_backend=search_backend,
+        search_index=search_index,
+        outbox=outbox,
+        outbox_worker=outbox_worker,
+        replicas=replicas,
+    )
+
+def get_services(config):
+    """Returns the app's services for this rerun, building them on first use."""
+    try:
+        with st.spinner("Connecting to Firestore and search..."):
+            return build_services(config)
+    except Exception as e:
+        logger.exception("Failed to initialize services")
+        st.error(str(e) if isinstance(e, RuntimeError) else f"Failed to initialize services: {e}")
         st.stop()
 
-def get_secret(client, project_id, secret_id, version="latest"):
-    """Fetches a secret from Google Secret Manager."""
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
+def _warm_up_services(config):
     try:
-        response = client.access_secret_version(request={"name": name})
-        return response.payload.data.decode("UTF-8")
+        build_services(config)
+        logger.info("Services warmed up in background")
+    except Exception as e:
+        # The next logged-in rerun retries in the foreground and reports the error.
+        logger.warning("Background service warm-up failed: %s", e)
+
+def start_service_warm_up(config):
+    """Builds the services on a daemon thread, once per process and credentials."""
+    def start():
+        thread = threading.Thread(target=_warm_up_services, args=(config,), name="service-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    get_registry().get(
+        "service_warm_up",
+        start,
+        fingerprint=credentials_fingerprint(config["service_account_path"]),
+    )
+
+def get_secret(secrets, secret_id, version="latest"):
+    """Fetches a secret from Google Secret Manager. Served from the process-wide SecretCache when fresh."""
+    try:
+        return secrets.get(secret_id, version)
     except Exception as e:
         st.error(f"Failed to access secret '{secret_id}'. Ensure it exists and permissions are set. Error: {e}")
         st.stop()
@@ -192,22 +338,48 @@ def validate_scroll_text(text):
         return False, "Text exceeds maximum length of 50,000 characters."
     return True, ""
 
-def parse_scroll_content(text, api_endpoint, api_key):
+def get_parse_cache(services):
+    """Returns the process-wide content-addressed cache of parser results."""
+    from services.parse_cache import build_parse_cache
+    return get_registry().get(
+        "parse_cache",
+        lambda: build_parse_cache(services.db),
+        fingerprint=services.credentials_key,
+    )
+
+def parse_scroll_content(services, text, api_endpoint, api_key):
     """Parse scroll content using an external parsing API."""
-    payload = {"prompt": f"You are Codessa's Reflection Agent. Analyze the following response and extract: summary, topics, tools, actions, enhancements.\n\n{text}"}
-    full_url = f"{api_endpoint}?key={api_key}"
+    from services.chunked_parse import ChunkedParser, IncompleteParseError
+    from services.parser_transport import STREAMING_ENABLED, ParserError
+    cache = get_parse_cache(services)
+    transport = get_parser_transport(api_endpoint, api_key)
+    # Long texts are parsed as concurrent chunks and merged; streaming only
+    # changes how a cache miss is shown.
+    chunked = ChunkedParser(transport.parse)
+
+    def parse_fn(t):
+        if not STREAMING_ENABLED:
+            return chunked.parse(t)
+        if len(t) > chunked.max_chars:
+            return stream_parsed_fields(chunked.parse_progressively(t))
+        return stream_parsed_fields(transport.parse_stream(t))
+
     try:
-        response = requests.post(full_url, json=payload, timeout=20)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.warning(f"API request failed: {e}")
-    except ValueError:
-        st.warning("API returned malformed data. Could not parse the response.")
-    return {}
+        parsed_data, from_cache = cache.get_or_parse(text, parse_fn)
+    except IncompleteParseError as e:
+        # Raised out of get_or_parse, so the partial result is not cached.
+        st.warning(str(e))
+        return e.partial
+    except ParserError as e:
+        st.warning(str(e))
+        return {}
+    if from_cache:
+        st.caption(f"⚡ Parsed result served from cache ({cache.stats()['llm_calls_saved']} LLM calls saved so far).")
+    return parsed_data
 
 def create_scroll_document(scroll_id, raw_text, parsed_data, user_id):
     """Creates a structured scroll document for Firestore, including the user_id."""
+    from google.cloud import firestore
     return {
         "scroll_id": scroll_id,
         "content": {
@@ -225,6 +397,21 @@ def create_scroll_document(scroll_id, raw_text, parsed_data, user_id):
         }
     }
 
+def create_search_record(scroll_id, scroll_doc, user_id):
+    """Builds the Algolia record for a scroll; includes the user_id for filtering.
+
+    created_at is stored as a Unix timestamp so search results can be rendered
+    from the hit alone, without a Firestore read.
+    """
+    return {
+        "objectID": scroll_id,
+        **scroll_doc['content'],
+        "metadata": {
+            "created_by": user_id,
+            "created_at": int(datetime.datetime.now(datetime.timezone.utc).timestamp()),
+        }
+    }
+
 # --- UI COMPONENTS ---
 
 def auth_ui(auth):
@@ -270,8 +457,30 @@ def auth_ui(auth):
                 except Exception as e:
                     st.error(f"Failed to send reset email. Please check the address and try again.")
 
-def display_recent_scrolls(db_client, algolia_index, user_id):
-    """Queries and displays a list of recent scrolls for the logged-in user."""
+@st.cache_data(ttl=DEFAULT_STATS_TTL_SECONDS, show_spinner=False)
+def get_scroll_stats(_db_client, user_id):
+    """Counts a user's scrolls in total and per status with count() aggregations.
+
+    Costs 1 + len(SCROLL_STATUSES) aggregation RPCs instead of reading every
+    document, and is cached for a short TTL across reruns.
+    """
+    user_scrolls = _db_client.collection("scrolls").where("metadata.created_by", "==", user_id)
+    total, by_status = grouped_counts(user_scrolls, "metadata.status", SCROLL_STATUSES)
+    return {"total": total, "by_status": by_status}
+
+def load_full_scroll(db_client, scroll_id, full_scrolls):
+    """Returns the complete scroll document, fetching it at most once per session."""
+    if scroll_id not in full_scrolls:
+        doc = db_client.collection("scrolls").document(scroll_id).get()
+        full_scrolls[scroll_id] = doc.to_dict() or {}
+    return full_scrolls[scroll_id]
+
+def display_recent_scrolls(db_client, search_backend, outbox, user_id, replicas=None):
+    """Queries and displays a list of recent scrolls for the logged-in user.
+
+    With a ReplicaManager (SCROLL_REPLICA=1), browsing and counts are served
+    from the user's listener-backed replica instead of per-rerun queries.
+    """
     st.divider()
     st.subheader("📜 Your Recent Scrolls")
 
@@ -282,15 +491,31 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
         'editing': f"{user_session_prefix}editing_scroll_id",
         'cursors': f"{user_session_prefix}page_cursors",
         'page': f"{user_session_prefix}current_page",
-        'search': f"{user_session_prefix}last_search_term"
+        'search': f"{user_session_prefix}last_search_term",
+        'full': f"{user_session_prefix}full_scrolls",
+        'docs': f"{user_session_prefix}document_cache"
     }
 
     if state_keys['editing'] not in st.session_state: st.session_state[state_keys['editing']] = None
     if state_keys['cursors'] not in st.session_state: st.session_state[state_keys['cursors']] = [None]
     if state_keys['page'] not in st.session_state: st.session_state[state_keys['page']] = 0
     if state_keys['search'] not in st.session_state: st.session_state[state_keys['search']] = ""
-
-    search_term = st.text_input("Search your scrolls (powered by Algolia):", key="scroll_search")
+    if state_keys['full'] not in st.session_state: st.session_state[state_keys['full']] = {}
+    if state_keys['docs'] not in st.session_state: st.session_state[state_keys['docs']] = DocumentCache()
+
+    replica = replicas.get(user_id) if replicas is not None else None
+    if replica is not None:
+        total, by_status = replica.counts(SCROLL_STATUSES)
+        stats = {"total": total, "by_status": by_status}
+    else:
+        stats = get_scroll_stats(db_client, user_id)
+    if stats["total"]:
+        columns = st.columns(len(SCROLL_STATUSES) + 1)
+        columns[0].metric("Scrolls", stats["total"])
+        for column, status in zip(columns[1:], SCROLL_STATUSES):
+            column.metric(status, stats["by_status"].get(status, 0))
+
+    search_term = st.text_input("Search your scrolls:", key="scroll_search")
 
     if search_term != st.session_state[state_keys['search']]:
         st.session_state[state_keys['page']] = 0
@@ -301,23 +526,31 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
     current_page = st.session_state[state_keys['page']]
     recent_scrolls = []
     has_next_page = False
+    total_pages = max(1, math.ceil(stats["total"] / PAGE_SIZE))
 
     try:
         if search_term:
-            # --- ALGOLIA SEARCH PATH (with user filter) ---
-            search_results = algolia_index.search(
-                search_term,
-                {'page': current_page, 'hitsPerPage': PAGE_SIZE, 'filters': f'metadata.created_by:{user_id}'}
+            # --- SEARCH PATH (Algolia and/or the local index, with user filter) ---
+            search_results = search_backend.search(search_term, current_page, PAGE_SIZE, created_by=user_id)
+            # Hits render directly; only records missing display fields hit Firestore.
+            recent_scrolls = hydrate_hits(
+                db_client,
+                search_results.get('hits', []),
+                cache=st.session_state[state_keys['docs']],
+                fields=SCROLL_HEADER_FIELDS,
             )
-            scroll_ids = [hit['objectID'] for hit in search_results.get('hits', [])]
-            if scroll_ids:
-                docs_ref = db_client.collection('scrolls').where('scroll_id', 'in', scroll_ids).stream()
-                docs_map = {doc.id: doc for doc in docs_ref}
-                recent_scrolls = [docs_map.get(sid) for sid in scroll_ids if docs_map.get(sid)]
             has_next_page = current_page < (search_results.get('nbPages', 0) - 1)
+            total_pages = max(1, search_results.get('nbPages', 0))
+        elif replica is not None:
+            # --- REPLICA BROWSE PATH: served from memory, no reads ---
+            recent_scrolls, has_next_page = replica.page(current_page, PAGE_SIZE)
         else:
             # --- FIRESTORE BROWSE PATH (with user filter) ---
-            scrolls_ref = db_client.collection("scrolls")
+            from google.cloud import firestore
+            if current_page >= len(st.session_state[state_keys['cursors']]):
+                # Pages were browsed on the replica, which keeps no cursors.
+                current_page = st.session_state[state_keys['page']] = 0
+            scrolls_ref = db_client.collection("scrolls").select(SCROLL_HEADER_FIELDS)
             # IMPORTANT: This query requires a composite index in Firestore on
             # (metadata.created_by, metadata.created_at DESC).
             query = scrolls_ref.where("metadata.created_by", "==", user_id).order_by("metadata.created_at", direction=firestore.Query.DESCENDING)
@@ -326,17 +559,16 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
                 query = query.start_after(cursor)
             docs_on_page = list(query.limit(PAGE_SIZE + 1).stream())
             has_next_page = len(docs_on_page) > PAGE_SIZE
-            recent_scrolls = docs_on_page[:PAGE_SIZE]
+            page_docs = docs_on_page[:PAGE_SIZE]
+            recent_scrolls = [(doc.id, doc.to_dict()) for doc in page_docs]
             if has_next_page and len(st.session_state[state_keys['cursors']]) == current_page + 1:
-                st.session_state[state_keys['cursors']].append(recent_scrolls[-1])
+                st.session_state[state_keys['cursors']].append(page_docs[-1])
 
         if not recent_scrolls:
             st.info("No scrolls found." if search_term else "Create your first scroll to see it here!")
             return
 
-        for scroll in recent_scrolls:
-            scroll_data = scroll.to_dict()
-            scroll_id = scroll.id
+        for scroll_id, scroll_data in recent_scrolls:
             summary = scroll_data.get("content", {}).get("summary", "No summary")
             created_at = scroll_data.get("metadata", {}).get("created_at")
             display_time = created_at.strftime("%Y-%m-%d %H:%M UTC") if created_at else "N/A"
@@ -350,8 +582,14 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
                         c1, c2, _ = st.columns([1, 1, 5])
                         if c1.form_submit_button("Save Changes", type="primary"):
                             updated_topics = [t.strip() for t in updated_topics_str.split("\n") if t.strip()]
-                            db_client.collection("scrolls").document(scroll_id).update({"content.summary": updated_summary, "content.topics": updated_topics})
-                            algolia_index.partial_update_object({'objectID': scroll_id, 'summary': updated_summary, 'topics': updated_topics}).wait()
+                            outbox.update(
+                                db_client.collection("scrolls").document(scroll_id),
+                                {"content.summary": updated_summary, "content.topics": updated_topics},
+                                {'objectID': scroll_id, 'summary': updated_summary, 'topics': updated_topics},
+                            )
+                            st.session_state[state_keys['full']].pop(scroll_id, None)
+                            st.session_state[state_keys['docs']].invalidate(scroll_id)
+                            logger.info("Scroll updated", extra={"scroll_id": scroll_id})
                             st.success("Scroll updated!")
                             st.session_state[state_keys['editing']] = None
                             st.rerun()
@@ -359,16 +597,26 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
                             st.session_state[state_keys['editing']] = None
                             st.rerun()
                 else:
-                    st.json(scroll_data)
-                    c1, c2, _ = st.columns([1, 1, 5])
+                    full_scrolls = st.session_state[state_keys['full']]
+                    if scroll_id in full_scrolls:
+                        st.json(load_full_scroll(db_client, scroll_id, full_scrolls))
+                    else:
+                        st.json(scroll_data)
+                    c1, c2, c3, _ = st.columns([1, 1, 2, 3])
                     if c1.button("Edit", key=f"edit_{scroll_id}"):
                         st.session_state[state_keys['editing']] = scroll_id
                         st.rerun()
                     if c2.button("Delete", key=f"delete_{scroll_id}"):
-                        db_client.collection("scrolls").document(scroll_id).delete()
-                        algolia_index.delete_object(scroll_id).wait()
+                        outbox.delete(db_client.collection("scrolls").document(scroll_id), scroll_id)
+                        full_scrolls.pop(scroll_id, None)
+                        st.session_state[state_keys['docs']].invalidate(scroll_id)
+                        get_scroll_stats.clear()
+                        logger.info("Scroll deleted", extra={"scroll_id": scroll_id})
                         st.success("Scroll deleted.")
                         st.rerun()
+                    if scroll_id not in full_scrolls and c3.button("Load full scroll", key=f"full_{scroll_id}"):
+                        load_full_scroll(db_client, scroll_id, full_scrolls)
+                        st.rerun()
         
         # Pagination buttons
         col1, col2, col3 = st.columns([1, 1, 5])
@@ -380,19 +628,86 @@ def display_recent_scrolls(db_client, algolia_index, user_id):
             st.session_state[state_keys['page']] += 1
             st.session_state[state_keys['editing']] = None
             st.rerun()
-        col3.write(f"Page {current_page + 1}")
+        col3.write(f"Page {current_page + 1} of {total_pages}")
 
     except Exception as e:
         st.error("Could not fetch recent scrolls. A Firestore index might be required.")
         st.info(f"Error details: {e}. If this is a 'FAILED_PRECONDITION' error, you likely need to create a composite index in Firestore for (metadata.created_by, metadata.created_at). Use the link provided in your terminal/logs.")
 
+def bulk_import_ui(services, user_id):
+    """Imports a JSONL file or ChatGPT export as many scrolls in one request."""
+    with st.expander("📦 Bulk import (JSONL or ChatGPT export)"):
+        uploaded = st.file_uploader("Upload responses", type=["jsonl", "json"], key="bulk_import_file")
+        if uploaded is None or not st.button("Import Scrolls"):
+            return
+        try:
+            responses = load_responses(uploaded.getvalue().decode("utf-8"), uploaded.name)
+        except (UnicodeDecodeError, ValueError) as e:
+            st.error(f"Could not read the uploaded file: {e}")
+            return
+        if not responses:
+            st.info("No responses found in the uploaded file.")
+            return
+
+        # Worker threads have no Streamlit context, so parse through the cache
+        # and transport directly instead of parse_scroll_content.
+        gemini_api_key = get_secret(services.secrets, "gemini-api-key")
+        from services.chunked_parse import ChunkedParser, IncompleteParseError
+        transport = get_parser_transport(config["gemini_api_endpoint"], gemini_api_key)
+        chunked = ChunkedParser(transport.parse)
+        cache = get_parse_cache(services)
+
+        def parse_fn(text):
+            try:
+                return cache.get_or_parse(text, chunked.parse)[0]
+            except IncompleteParseError as e:
+                return e.partial
+
+        ingestor = BulkIngestor(
+            services.db,
+            services.outbox,
+            parse_fn=parse_fn,
+            build_document=lambda sid, text, parsed: create_scroll_document(sid, text, parsed, user_id),
+            build_search_record=lambda sid, doc: create_search_record(sid, doc, user_id),
+            fallback_parsed=FALLBACK_PARSED_DATA,
+            validate=validate_scroll_text,
+        )
+
+        progress = st.progress(0.0)
+        status = st.empty()
+        last_render = [0.0]
+
+        def on_progress(done, total, report):
+            # Redraw at most a few times per second; large imports report 50k+ steps.
+            if done < total and report.elapsed_seconds - last_render[0] < 0.25:
+                return
+            last_render[0] = report.elapsed_seconds
+            progress.progress(done / total)
+            status.write(f"{done}/{total} processed · {report.stored} stored · {report.throughput:.1f} scrolls/s")
+
+        report = ingestor.ingest(responses, on_progress=on_progress)
+        get_scroll_stats.clear()
+        st.success(
+            f"Imported {report.stored} of {report.total} responses in {report.elapsed_seconds:.1f}s "
+            f"({report.throughput:.1f} scrolls/s)."
+        )
+        if report.skipped or report.parse_failures:
+            st.info(f"{report.skipped} skipped by validation, {report.parse_failures} stored with fallback data.")
+        for error in report.errors:
+            st.warning(error)
+
 def main_app(user):
     """The main application interface, shown after successful login."""
+    services = get_services(config)
     with st.sidebar:
         st.write(f"Logged in as: **{user['email']}**")
         if st.button("Logout"):
             st.session_state.user = None
             st.rerun()
+        outbox_stats = services.outbox_worker.stats()
+        st.caption(f"Search index lag: {outbox_stats['lag_seconds']:.1f}s")
+        if outbox_stats['last_error']:
+            st.caption(f"⚠️ Last search sync error: {outbox_stats['last_error']}")
     
     st.title("Codessa: Inkwell ✍️")
     st.markdown("Paste key responses here and turn them into structured memory scrolls.")
@@ -408,55 +723,65 @@ def main_app(user):
             user_id = user['localId'] # This is the UID
 
             # Fetch API key and parse content
-            gemini_api_key = get_secret(secret_client, config["project_id"], "gemini-api-key")
-            parsed_data = parse_scroll_content(scroll_text, config["gemini_api_endpoint"], gemini_api_key)
+            gemini_api_key = get_secret(services.secrets, "gemini-api-key")
+            parsed_data = parse_scroll_content(services, scroll_text, config["gemini_api_endpoint"], gemini_api_key)
             if not parsed_data:
                 st.info("Parser did not return a result. Using fallback data.")
                 parsed_data = FALLBACK_PARSED_DATA
             
             scroll_doc = create_scroll_document(scroll_id, scroll_text, parsed_data, user_id)
 
+            # The scroll and its search-index entry commit in one batch; the
+            # outbox worker pushes it to Algolia in the background.
             try:
-                db.collection("scrolls").document(scroll_id).set(scroll_doc)
-                # Algolia record includes content and the user_id for filtering
-                algolia_record = {
-                    "objectID": scroll_id,
-                    **scroll_doc['content'],
-                    "metadata": {"created_by": user_id}
-                }
-                algolia_index.save_object(algolia_record).wait()
+                services.outbox.create(
+                    services.db.collection("scrolls").document(scroll_id),
+                    scroll_doc,
+                    create_search_record(scroll_id, scroll_doc, user_id),
+                )
+                get_scroll_stats.clear()
+                logger.info("Scroll created", extra={"scroll_id": scroll_id})
                 st.success("Scroll successfully created and stored! ✨")
                 st.json(scroll_doc)
             except Exception as e:
+                logger.exception("Failed to store scroll", extra={"scroll_id": scroll_id})
                 st.error(f"Failed to store scroll: {str(e)}")
-                db.collection("scrolls").document(scroll_id).delete()
-                st.warning("Rolled back Firestore entry due to sync failure.")
 
-    display_recent_scrolls(db, algolia_index, user['localId'])
+    bulk_import_ui(services, user['localId'])
+
+    display_recent_scrolls(
+        services.db, services.search_backend, services.outbox, user['localId'], services.replicas
+    )
+    display_metrics_panel()
 
 
 # === Main Application Execution ===
+# Each rerun is one UI action: its backend calls share a trace and a
+# correlation ID in the logs (see display_metrics_panel).
+start_trace()
+new_correlation_id()
 if 'user' not in st.session_state:
     st.session_state.user = None
 
-# --- Load Config and Initialize Services ---
+# --- Load Config and the Auth Client ---
+# Everything else is built lazily by get_services(): on the first logged-in
+# rerun, or earlier by the warm-up thread started from the login page.
 config = load_config()
-db = initialize_firebase_admin(config["service_account_path"])
-secret_client = initialize_secret_manager(config["service_account_path"])
-
-# Fetch secrets for services
-firebase_web_config = get_secret(secret_client, config["project_id"], "firebase-web-config")
-auth = initialize_firebase_auth(firebase_web_config)
-algolia_app_id = get_secret(secret_client, config["project_id"], "algolia-app-id")
-algolia_admin_api_key = get_secret(secret_client, config["project_id"], "algolia-admin-api-key")
-algolia_client = initialize_algolia(algolia_app_id, algolia_admin_api_key)
-algolia_index = algolia_client.init_index("codessa_scrolls")
+registry = get_registry()
+if METRICS_PORT:
+    registry.get(
+        "metrics_exporter",
+        lambda: start_http_exporter(int(METRICS_PORT)),
+        fingerprint=METRICS_PORT,
+        close=lambda server: server.shutdown(),
+    )
 
 # --- App Router ---
 if st.session_state.user:
     main_app(st.session_state.user)
 else:
-    auth_ui(auth)
+    auth_ui(get_auth(config))
+    start_service_warm_up(config)
 # If the user is not authenticated, show the auth UI
 # If the user is authenticated, show the main application interface
 # === End of Application Code ===
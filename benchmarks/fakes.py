@@ -0,0 +1,131 @@
+"""
+In-process stand-ins for Algolia and the LLM parser used by the benchmarks.
+
+They keep benchmark runs hermetic and repeatable: no network, no API keys,
+and a fixed (optionally simulated) latency instead of a remote service's
+variance.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeTask:
+    """Mimics the Algolia response object returned by write calls."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+
+    def wait(self) -> "FakeTask":
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self
+
+
+class FakeAlgoliaIndex:
+    """
+    Minimal in-memory Algolia index supporting the calls the apps make.
+
+    Search ranks records by the number of query terms found in their
+    summary, topics and tools, and honours page / hitsPerPage and
+    attributesToRetrieve.
+    """
+
+    def __init__(self, write_latency_seconds: float = 0.0, search_latency_seconds: float = 0.0):
+        self.write_latency_seconds = write_latency_seconds
+        self.search_latency_seconds = search_latency_seconds
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save_object(self, record: Dict[str, Any]) -> FakeTask:
+        return self.save_objects([record])
+
+    def save_objects(self, records: List[Dict[str, Any]]) -> FakeTask:
+        with self._lock:
+            for record in records:
+                self.records[record["objectID"]] = dict(record)
+        return FakeTask(self.write_latency_seconds)
+
+    def partial_update_objects(self, records: List[Dict[str, Any]], options: Optional[Dict] = None) -> FakeTask:
+        with self._lock:
+            for record in records:
+                if record["objectID"] in self.records:
+                    self.records[record["objectID"]].update(record)
+        return FakeTask(self.write_latency_seconds)
+
+    def delete_objects(self, object_ids: List[str]) -> FakeTask:
+        with self._lock:
+            for object_id in object_ids:
+                self.records.pop(object_id, None)
+        return FakeTask(self.write_latency_seconds)
+
+    def search(self, query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if self.search_latency_seconds:
+            time.sleep(self.search_latency_seconds)
+        params = params or {}
+        terms = set(_WORD.findall(query.lower()))
+        with self._lock:
+            scored = []
+            for record in self.records.values():
+                text = " ".join(
+                    [str(record.get("summary", ""))]
+                    + [str(v) for v in record.get("topics", []) + record.get("tools", [])]
+                ).lower()
+                score = len(terms & set(_WORD.findall(text)))
+                if score:
+                    scored.append((score, record))
+        scored.sort(key=lambda item: (-item[0], item[1]["objectID"]))
+        per_page = params.get("hitsPerPage", 20)
+        page = params.get("page", 0)
+        attributes = params.get("attributesToRetrieve")
+        hits = []
+        for _, record in scored[page * per_page:(page + 1) * per_page]:
+            if attributes is not None:
+                record = {k: v for k, v in record.items() if k in attributes or k == "objectID"}
+            hits.append(record)
+        return {"hits": hits, "nbHits": len(scored), "nbPages": -(-len(scored) // per_page)}
+
+
+TOPIC_POOL = ["firestore", "algolia", "streamlit", "vertex", "pagination", "caching", "auth", "indexes"]
+TOOL_POOL = ["Firestore", "Algolia", "Gemini", "Secret Manager", "Cloud Run"]
+
+
+class FakeParser:
+    """
+    Deterministic parser stand-in: derives summary, topics and tools from a
+    hash of the text, after an optional simulated LLM latency.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return {
+            "summary": " ".join(text.split()[:8]),
+            "topics": [TOPIC_POOL[b % len(TOPIC_POOL)] for b in digest[:2]],
+            "tools": [TOOL_POOL[digest[2] % len(TOOL_POOL)]],
+            "actions": [],
+            "enhancements": [],
+        }
+
+
+def synthetic_response(i: int) -> str:
+    """Returns a reproducible pseudo-response of a few hundred characters."""
+    topic = TOPIC_POOL[i % len(TOPIC_POOL)]
+    tool = TOOL_POOL[i % len(TOOL_POOL)]
+    return (
+        f"Response {i}: notes on {topic} with {tool}. "
+        f"Use cursors instead of offsets when paging {topic} results, batch writes "
+        f"where possible, and cache what is read on every rerun. "
+        * 3
+    )
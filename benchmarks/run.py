@@ -0,0 +1,316 @@
+"""
+Emulator-backed benchmark suite for the memory cortex, FirestoreClient and
+the Streamlit apps' read/write paths.
+
+Runs against the local Firestore emulator with in-process Algolia and
+parser stand-ins (benchmarks/fakes.py), so results do not depend on
+network conditions or API quotas. For every dataset size the emulator is
+wiped, seeded, and each operation is timed; throughput and p50/p95/p99
+latencies are written as JSON. Bulk steps (the ingest and the seed) run a
+handful of times at most, so they are gated on throughput rather than p95.
+
+Usage:
+    gcloud emulators firestore start --host-port=localhost:8080 &
+    export FIRESTORE_EMULATOR_HOST=localhost:8080
+    python -m benchmarks.run --sizes 1000,10000 --output bench.json
+    python -m benchmarks.run --sizes 1000 --baseline bench.json  # exit 1 on regression
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_ITERATIONS = 200
+# Each bulk ingest run starts from a freshly reset emulator.
+BULK_ITERATIONS = 3
+DEFAULT_PROJECT = "demo-codessa"
+PAGE_SIZE = 5
+BENCH_USER = "bench-user"
+AGENTS = [f"agent-{i}" for i in range(10)]
+
+# Mirrors SCROLL_HEADER_FIELDS in app.py (which cannot be imported outside Streamlit).
+SCROLL_HEADER_FIELDS = ["scroll_id", "content.summary", "content.topics", "content.tools", "metadata"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(
+    name: str,
+    size: int,
+    fn: Callable[[int], Any],
+    iterations: int,
+    ops_per_call: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+    gate: str = "p95",
+) -> Dict[str, Any]:
+    """
+    Times fn(i) for i in range(iterations).
+
+    Args:
+        setup: Optional. Called, untimed, before each iteration.
+        gate: The figure --baseline compares: "p95", or "throughput" for
+            steps with too few iterations for a meaningful p95.
+
+    Returns:
+        A result record with throughput (operations per second) and
+        latency percentiles in milliseconds.
+    """
+    latencies = []
+    for i in range(iterations):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = sum(latencies) / 1000
+    latencies.sort()
+    result = {
+        "name": name,
+        "size": size,
+        "iterations": iterations,
+        "gate": gate,
+        "ops_per_sec": round(iterations * ops_per_call / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+    print(
+        f"  {name:<28} {result['ops_per_sec']:>10.1f} ops/s   "
+        f"p50 {result['p50_ms']:>8.2f}ms   p95 {result['p95_ms']:>8.2f}ms   p99 {result['p99_ms']:>8.2f}ms"
+    )
+    return result
+
+
+def reset_emulator(host: str, project: str) -> None:
+    url = f"http://{host}/emulator/v1/projects/{project}/databases/(default)/documents"
+    requests.delete(url, timeout=60).raise_for_status()
+
+
+def app_scroll_document(scroll_id: str, raw_text: str, parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Mirrors app.create_scroll_document for BENCH_USER."""
+    from google.cloud import firestore
+
+    return {
+        "scroll_id": scroll_id,
+        "content": {"raw_text": raw_text, **parsed},
+        "metadata": {
+            "status": "Pending",
+            "phase": "MVP-1",
+            "created_by": BENCH_USER,
+            "created_at": firestore.SERVER_TIMESTAMP,
+        },
+    }
+
+
+def app_search_record(scroll_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Mirrors app.create_search_record."""
+    return {
+        "objectID": scroll_id,
+        **doc["content"],
+        "metadata": {"created_by": BENCH_USER, "created_at": int(time.time())},
+    }
+
+
+def run_size(size: int, iterations: int, host: str, project: str) -> List[Dict[str, Any]]:
+    from google.cloud import firestore
+
+    from benchmarks.fakes import FakeAlgoliaIndex, FakeParser, synthetic_response
+    from core import memory
+    from services.firestore_client import FirestoreClient
+    from services.hydration import HIT_DISPLAY_ATTRIBUTES, DocumentCache, hydrate_hits
+    from services.ingest import BulkIngestor
+
+    print(f"\n== {size} documents ==")
+    client = FirestoreClient()
+    db = client.db
+    index = FakeAlgoliaIndex()
+    parser = FakeParser()
+    results = []
+
+    def reset():
+        reset_emulator(host, project)
+        memory._stats_cache.invalidate()
+        index.records.clear()
+
+    # Bulk ingest doubles as the seed for the app-shaped browse/search paths;
+    # its last run is what the later benchmarks read.
+    ingestor = BulkIngestor(
+        db, index, parser.parse, app_scroll_document, app_search_record,
+    )
+    responses = [synthetic_response(i) for i in range(size)]
+    results.append(measure(
+        "bulk_ingest", size, lambda _: ingestor.ingest(responses), BULK_ITERATIONS,
+        ops_per_call=size, setup=reset, gate="throughput",
+    ))
+
+    # Memory-cortex-shaped scrolls spread over a few agents.
+    memory_docs = [
+        {
+            "agent_id": AGENTS[i % len(AGENTS)],
+            "prompt": f"Prompt {i}",
+            "response": synthetic_response(i),
+            "metadata": {},
+            "phase": "MVP-1",
+            "status": "active",
+        }
+        for i in range(size)
+    ]
+    results.append(measure(
+        "seed_add_many", size, lambda _: client.add_many("scrolls", memory_docs), 1,
+        ops_per_call=size, gate="throughput",
+    ))
+
+    results.append(measure(
+        "add_scroll", size,
+        lambda i: client.add_scroll(f"Prompt {i}", synthetic_response(i)), iterations,
+    ))
+    results.append(measure(
+        "add_scroll_no_read_back", size,
+        lambda i: client.add_scroll(f"Prompt {i}", synthetic_response(i), read_back=False), iterations,
+    ))
+    results.append(measure(
+        "list", size,
+        lambda _: client.list("scrolls", filters=[("status", "==", "active")], limit=100), iterations,
+    ))
+    results.append(measure(
+        "get_scrolls", size,
+        lambda i: memory.get_scrolls(AGENTS[i % len(AGENTS)], limit=10), iterations,
+    ))
+    results.append(measure(
+        "reflect_scrolls_cold", size,
+        lambda i: memory.reflect_scrolls(AGENTS[i % len(AGENTS)], force=True), max(1, iterations // 4),
+    ))
+    results.append(measure(
+        "reflect_scrolls_cached", size,
+        lambda i: memory.reflect_scrolls(AGENTS[i % len(AGENTS)]), iterations,
+    ))
+
+    # Browse path of display_recent_scrolls: walk the first pages by cursor.
+    def browse(_):
+        cursor = None
+        for _ in range(5):
+            query = (
+                db.collection("scrolls").select(SCROLL_HEADER_FIELDS)
+                .where("metadata.created_by", "==", BENCH_USER)
+                .order_by("metadata.created_at", direction=firestore.Query.DESCENDING)
+            )
+            if cursor is not None:
+                query = query.start_after(cursor)
+            docs = list(query.limit(PAGE_SIZE + 1).stream())
+            if len(docs) <= PAGE_SIZE:
+                break
+            cursor = docs[PAGE_SIZE - 1]
+    results.append(measure("browse_5_pages", size, browse, max(1, iterations // 4), ops_per_call=5))
+
+    # Search path: Algolia query, then hydrate hits (misses go to get_all).
+    def search(i):
+        response = index.search(
+            ["firestore cursors", "algolia caching", "streamlit auth"][i % 3],
+            {"page": 0, "hitsPerPage": PAGE_SIZE, "attributesToRetrieve": HIT_DISPLAY_ATTRIBUTES},
+        )
+        hydrate_hits(db, response["hits"], cache=DocumentCache(), fields=SCROLL_HEADER_FIELDS)
+    results.append(measure("search_page", size, search, iterations))
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    """
+    Returns a message for each benchmark that regressed past max_regression:
+    in p95 latency, or in throughput for results gated on throughput.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["size"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["name"], result["size"]))
+        if result.get("gate") == "throughput":
+            if not before or not before["ops_per_sec"] or not result["ops_per_sec"]:
+                continue
+            change = before["ops_per_sec"] / result["ops_per_sec"] - 1
+            if change > max_regression:
+                regressions.append(
+                    f"{result['name']}@{result['size']}: {before['ops_per_sec']} ops/s -> "
+                    f"{result['ops_per_sec']} ops/s (-{1 - result['ops_per_sec'] / before['ops_per_sec']:.0%})"
+                )
+            continue
+        if not before or not before["p95_ms"]:
+            continue
+        change = result["p95_ms"] / before["p95_ms"] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{result['name']}@{result['size']}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms (+{change:.0%})"
+            )
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Firestore emulator benchmark suite.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated dataset sizes (default: 1000,10000,100000)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help="timed calls per latency benchmark")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier JSON results to compare p95 latencies (throughput for bulk steps) against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed relative p95 increase before failing (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    host = os.environ.get("FIRESTORE_EMULATOR_HOST")
+    if not host:
+        print("❌ FIRESTORE_EMULATOR_HOST is not set; refusing to benchmark against a live project.")
+        return 2
+    project = os.environ.setdefault("GOOGLE_CLOUD_PROJECT", DEFAULT_PROJECT)
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s]:
+        results.extend(run_size(size, args.iterations, host, project))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "emulator_host": host,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for message in regressions:
+            print(f"⚠️ Regression: {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
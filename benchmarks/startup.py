@@ -0,0 +1,232 @@
+"""
+Cold-start benchmark for the Streamlit apps.
+
+Measures what a fresh process pays before the first page can render:
+
+- Import cost, from `python -X importtime`, of the modules the app imports
+  at module level plus the clients its first page needs (STARTUP_EXTRAS),
+  next to the cost of the SDKs it defers until first use
+  (DEFERRED_MODULES). Module-level imports are read from the app's source,
+  so a heavy import added at the top of app.py shows up here.
+- Time to first render (--render): the wall time of a first, logged-out run
+  of the app under streamlit.testing's AppTest, in a fresh interpreter.
+  This calls the real auth client, so it needs the app's environment
+  (credentials, PROJECT_ID, ...).
+
+Each measurement runs in a new interpreter and the median of --repeat runs
+is reported. Results are written as JSON; with --baseline the run exits 1
+when a measurement regressed past --max-regression.
+
+Usage:
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --render --app app.py
+    python -m benchmarks.startup --baseline startup.json
+"""
+
+import argparse
+import ast
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.run import _git_commit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_APP = "app.py"
+DEFAULT_REPEAT = 5
+RENDER_TIMEOUT_SECONDS = 120
+
+# Imported lazily by the app but needed before its first page renders.
+STARTUP_EXTRAS = {
+    "app.py": ["pyrebase"],
+    "codessa_inkwell_app.py": [],
+}
+
+# Loaded on first use or by the warm-up thread, never before first render.
+DEFERRED_MODULES = [
+    "firebase_admin",
+    "google.cloud.firestore",
+    "google.cloud.secretmanager",
+    "algoliasearch.search_client",
+    "services.chunked_parse",
+    "services.parse_cache",
+    "services.parser_transport",
+    "services.scroll_replica",
+    "services.search_backend",
+    "services.search_outbox",
+]
+
+
+def module_level_imports(path: str) -> List[str]:
+    """Returns the modules a script imports at module level, in order."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _top_level_imports(code: str) -> List[Tuple[str, int]]:
+    """Runs code under -X importtime; returns (module, cumulative us) per top-level import."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    top_level = []
+    for line in completed.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # nested imports are indented
+            top_level.append((name.strip(), int(cumulative)))
+    return top_level
+
+
+def import_time(modules: List[str]) -> Dict[str, Any]:
+    """
+    Imports modules in a fresh interpreter under -X importtime.
+
+    Returns:
+        The total cumulative import time in milliseconds, the ten slowest
+        top-level imports, and the modules that are not installed.
+    """
+    present = [m for m in modules if _installed(m)]
+    missing = [m for m in modules if m not in present]
+    if not present:
+        return {"total_ms": 0.0, "slowest": [], "missing": missing}
+
+    interpreter = {name for name, _ in _top_level_imports("pass")}
+    top_level = [
+        (name, us) for name, us in _top_level_imports("; ".join(f"import {m}" for m in present))
+        if name not in interpreter
+    ]
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return {
+        "total_ms": round(sum(us for _, us in top_level) / 1000, 2),
+        "slowest": [{"module": name, "ms": round(us / 1000, 2)} for name, us in top_level[:10]],
+        "missing": missing,
+    }
+
+
+def _render_once(app_path: str) -> float:
+    """Child process: times the first AppTest run of app_path, in seconds."""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=RENDER_TIMEOUT_SECONDS)
+    app.run()
+    elapsed = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"{app_path} raised on first render: {app.exception[0].message}")
+    return elapsed
+
+
+def time_to_first_render(app_path: str) -> float:
+    """Runs _render_once in a fresh interpreter and returns its milliseconds."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--render-child", app_path],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "render failed")
+    return float(completed.stdout.strip().splitlines()[-1]) * 1000
+
+
+def _median_result(name: str, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    median = statistics.median(run["total_ms"] for run in runs)
+    representative = min(runs, key=lambda run: abs(run["total_ms"] - median))
+    result = {"name": name, "ms": round(median, 2), **{k: v for k, v in representative.items() if k != "total_ms"}}
+    print(f"  {name:<28} {result['ms']:>10.1f} ms")
+    for entry in result.get("slowest", [])[:5]:
+        print(f"      {entry['module']:<40} {entry['ms']:>8.1f} ms")
+    if result.get("missing"):
+        print(f"      (not installed: {', '.join(result['missing'])})")
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    """Returns a message for each measurement that regressed past max_regression."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(result["name"])
+        if not before or not before["ms"]:
+            continue
+        change = result["ms"] / before["ms"] - 1
+        if change > max_regression:
+            regressions.append(f"{result['name']}: {before['ms']}ms -> {result['ms']}ms (+{change:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure Streamlit app cold-start cost.")
+    parser.add_argument("--app", default=DEFAULT_APP, help="the app script to measure (default: app.py)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="fresh interpreters per measurement")
+    parser.add_argument("--render", action="store_true", help="also time the first AppTest run of the app")
+    parser.add_argument("--output", default="startup_output.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed relative increase before failing (default: 0.25)")
+    parser.add_argument("--render-child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.render_child:
+        print(_render_once(args.render_child))
+        return 0
+
+    app_path = os.path.join(REPO_ROOT, args.app)
+    startup_modules = module_level_imports(app_path) + STARTUP_EXTRAS.get(os.path.basename(args.app), [])
+    print(f"\n== {args.app}: cold start ({args.repeat} runs, median) ==")
+    results = [
+        _median_result("startup_imports", [import_time(startup_modules) for _ in range(args.repeat)]),
+        _median_result("deferred_imports", [import_time(DEFERRED_MODULES) for _ in range(args.repeat)]),
+    ]
+    if args.render:
+        renders = [{"total_ms": time_to_first_render(args.app)} for _ in range(args.repeat)]
+        results.append(_median_result("time_to_first_render", renders))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "app": args.app,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for message in regressions:
+            print(f"⚠️ Regression: {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
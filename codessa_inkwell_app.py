@@ -18,15 +18,25 @@ Note: Current implementation includes mock fallback for parsing when API call fa
 """
 # Codessa: Inkwell – MVP Scroll Capture App (Streamlit Version)
 
+# Heavy SDKs (firebase_admin, Secret Manager, Algolia) are imported where
+# they are first used, so the page header and input render before they load.
 import streamlit as st
-import requests
 import datetime
 import uuid
-import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud import secretmanager
-from algoliasearch.search_client import SearchClient
+import math
 import os
+from services.aggregations import DEFAULT_STATS_TTL_SECONDS, grouped_counts
+from services.clients import credentials_fingerprint, get_registry, secret_fingerprint
+from services.hydration import DocumentCache, hydrate_hits
+from services.metrics import METRICS_PORT, start_http_exporter, start_trace
+from services.scroll_replica import ALL_SCROLLS, REPLICA_ENABLED, ReplicaManager
+from services.search_backend import SEARCH_BACKEND, build_search
+from services.search_outbox import OutboxWorker, SearchOutbox
+from services.secret_cache import SecretCache
+from services.structured_logging import get_logger, new_correlation_id
+from services.ui_helpers import display_metrics_panel, get_parser_transport, stream_parsed_fields
+
+logger = get_logger("inkwell_app")
 
 # === Constants ===
 FALLBACK_PARSED_DATA = {
@@ -43,6 +53,18 @@ DEFAULT_METADATA = {
     "created_by": "Phoenix"
 }
 
+# Fields rendered in list views. content.raw_text (up to 50,000 characters) is
+# only loaded when the user asks for the full scroll.
+SCROLL_HEADER_FIELDS = ["scroll_id", "content.summary", "content.topics", "content.tools", "metadata"]
+
+# Statuses counted on the dashboard; new scrolls start as DEFAULT_METADATA["status"].
+SCROLL_STATUSES = ["Pending", "Active", "Archived"]
+
+# Secrets fetched in parallel at startup; later lookups are served from cache.
+REQUIRED_SECRET_IDS = ["algolia-app-id", "algolia-admin-api-key", "gemini-api-key"]
+# Not needed when SEARCH_BACKEND=local.
+ALGOLIA_SECRET_IDS = {"algolia-app-id", "algolia-admin-api-key"}
+
 
 def load_config():
     """Load and validate application configuration"""
@@ -61,6 +83,8 @@ def load_config():
 
 def initialize_firebase(service_account_path):
     """Initializes Firebase Admin SDK if not already initialized."""
+    import firebase_admin
+    from firebase_admin import credentials, firestore
     if not firebase_admin._apps:
         try:
             cred = credentials.Certificate(service_account_path)
@@ -71,10 +95,17 @@ def initialize_firebase(service_account_path):
             st.stop()
     return firestore.client()
 
+def close_firebase(_client):
+    """Deletes the default Firebase app so it can be re-initialized with rotated credentials."""
+    import firebase_admin
+    if firebase_admin._apps:
+        firebase_admin.delete_app(firebase_admin.get_app())
+
 def initialize_secret_manager(service_account_path):
     """Initializes and returns a Secret Manager client using service account credentials."""
     try:
         # secretmanager library uses google-auth to find credentials, but we can be explicit
+        from google.cloud import secretmanager
         from google.oauth2 import service_account
         sm_creds = service_account.Credentials.from_service_account_file(service_account_path)
         return secretmanager.SecretManagerServiceClient(credentials=sm_creds)
@@ -85,6 +116,7 @@ def initialize_secret_manager(service_account_path):
 
 def initialize_algolia(app_id, api_key):
     """Initializes and returns an Algolia search client."""
+    from algoliasearch.search_client import SearchClient
     if not app_id or not api_key:
         st.error("Algolia App ID or API Key is missing.")
         st.stop()
@@ -94,16 +126,22 @@ def initialize_algolia(app_id, api_key):
         st.error(f"Failed to initialize Algolia client: {e}")
         st.stop()
 
-def get_secret(client, project_id, secret_id, version="latest"):
-    """Fetches a secret from Google Secret Manager, handling errors gracefully."""
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/{version}"
+def get_secret(secrets, secret_id, version="latest"):
+    """Fetches a secret from Google Secret Manager, handling errors gracefully. Served from the process-wide SecretCache when fresh."""
     try:
-        response = client.access_secret_version(request={"name": name})
-        return response.payload.data.decode("UTF-8")
+        return secrets.get(secret_id, version)
     except Exception as e:
         st.error(f"Failed to access secret '{secret_id}'. Please ensure it exists and the service account has permissions. Error: {e}")
         st.stop()
 
+def prefetch_secrets(secrets, secret_ids):
+    """Loads all required secrets in parallel so later lookups are cache hits."""
+    try:
+        secrets.prefetch(secret_ids)
+    except Exception as e:
+        st.error(f"Failed to prefetch secrets. Ensure they exist and permissions are set. Error: {e}")
+        st.stop()
+
 
 def validate_scroll_text(text):
     """Validate scroll text input"""
@@ -113,25 +151,44 @@ def validate_scroll_text(text):
         return False, "Text exceeds maximum length of 50,000 characters."
     return True, ""
 
+def get_parse_cache():
+    """Returns the process-wide content-addressed cache of parser results."""
+    from services.parse_cache import build_parse_cache
+    return get_registry().get("parse_cache", lambda: build_parse_cache(db), fingerprint=credentials_key)
+
 def parse_scroll_content(text, api_endpoint, api_key):
     """Parse scroll content using Gemini API with robust error handling."""
-    payload = {
-        "prompt": f"You are Codessa's Reflection Agent. Analyze the following response and extract: summary, topics, tools, actions, enhancements.\n\n{text}"
-    }
-    # Append the API key as a query parameter, as required by APIs like Google's GenAI
-    full_url = f"{api_endpoint}?key={api_key}"
+    from services.chunked_parse import ChunkedParser, IncompleteParseError
+    from services.parser_transport import STREAMING_ENABLED, ParserError
+    cache = get_parse_cache()
+    transport = get_parser_transport(api_endpoint, api_key)
+    # Long texts are parsed as concurrent chunks and merged; streaming only
+    # changes how a cache miss is shown.
+    chunked = ChunkedParser(transport.parse)
+
+    def parse_fn(t):
+        if not STREAMING_ENABLED:
+            return chunked.parse(t)
+        if len(t) > chunked.max_chars:
+            return stream_parsed_fields(chunked.parse_progressively(t))
+        return stream_parsed_fields(transport.parse_stream(t))
+
     try:
-        response = requests.post(full_url, json=payload, timeout=20)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.warning(f"API request failed: {str(e)}")
-    except ValueError:
-        st.warning("API returned malformed data. Could not parse the response.")
-    return {}
+        parsed_data, from_cache = cache.get_or_parse(text, parse_fn)
+    except IncompleteParseError as e:
+        # Raised out of get_or_parse, so the partial result is not cached.
+        st.warning(str(e))
+        return e.partial
+    except ParserError as e:
+        st.warning(str(e))
+        return {}
+    if from_cache:
+        st.caption(f"⚡ Parsed result served from cache ({cache.stats()['llm_calls_saved']} LLM calls saved so far).")
+    return parsed_data
 
 def create_scroll_document(scroll_id, raw_text, parsed_data):
     """Creates a structured scroll document for Firestore."""
+    from google.cloud import firestore
     topics = parsed_data.get("topics", [])
     tools = parsed_data.get("tools", [])
 
@@ -151,8 +208,25 @@ def create_scroll_document(scroll_id, raw_text, parsed_data):
         }
     }
 
-def display_recent_scrolls(db_client, algolia_index):
-    """Queries and displays a paginated list of recent scrolls from Firestore."""
+@st.cache_data(ttl=DEFAULT_STATS_TTL_SECONDS, show_spinner=False)
+def get_scroll_stats(_db_client):
+    """Counts scrolls in total and per status with count() aggregations (cached briefly)."""
+    total, by_status = grouped_counts(_db_client.collection("scrolls"), "metadata.status", SCROLL_STATUSES)
+    return {"total": total, "by_status": by_status}
+
+def load_full_scroll(db_client, scroll_id):
+    """Returns the complete scroll document, fetching it at most once per session."""
+    if scroll_id not in st.session_state.full_scrolls:
+        doc = db_client.collection("scrolls").document(scroll_id).get()
+        st.session_state.full_scrolls[scroll_id] = doc.to_dict() or {}
+    return st.session_state.full_scrolls[scroll_id]
+
+def display_recent_scrolls(db_client, search_backend, outbox, replicas=None):
+    """Queries and displays a paginated list of recent scrolls from Firestore.
+
+    With a ReplicaManager (SCROLL_REPLICA=1), browsing and counts are served
+    from a listener-backed replica instead of per-rerun queries.
+    """
     st.divider()
     st.subheader("📜 Recent Scrolls")
 
@@ -167,8 +241,25 @@ def display_recent_scrolls(db_client, algolia_index):
         st.session_state.current_page = 0
     if 'last_search_term' not in st.session_state:
         st.session_state.last_search_term = ""
+    if 'document_cache' not in st.session_state:
+        st.session_state.document_cache = DocumentCache()  # short-lived hydrated search results
+    if 'full_scrolls' not in st.session_state:
+        st.session_state.full_scrolls = {}  # scroll_id -> full document, loaded on demand
+
+    # Inkwell has no login and lists every scroll, so its replica does too.
+    replica = replicas.get(ALL_SCROLLS) if replicas is not None else None
+    if replica is not None:
+        total, by_status = replica.counts(SCROLL_STATUSES)
+        stats = {"total": total, "by_status": by_status}
+    else:
+        stats = get_scroll_stats(db_client)
+    if stats["total"]:
+        columns = st.columns(len(SCROLL_STATUSES) + 1)
+        columns[0].metric("Scrolls", stats["total"])
+        for column, status in zip(columns[1:], SCROLL_STATUSES):
+            column.metric(status, stats["by_status"].get(status, 0))
 
-    search_term = st.text_input("Search scrolls (full-text search powered by Algolia):", key="scroll_search")
+    search_term = st.text_input("Search scrolls (full-text):", key="scroll_search")
 
     # If search term changes, reset pagination to start from the beginning of the new results
     if search_term != st.session_state.last_search_term:
@@ -179,28 +270,33 @@ def display_recent_scrolls(db_client, algolia_index):
 
     recent_scrolls = []
     has_next_page = False
+    total_pages = math.ceil(stats["total"] / PAGE_SIZE)
 
     try:
         if search_term:
-            # --- ALGOLIA SEARCH PATH ---
-            search_results = algolia_index.search(
-                search_term,
-                {'page': st.session_state.current_page, 'hitsPerPage': PAGE_SIZE}
+            # --- SEARCH PATH (Algolia and/or the local index) ---
+            search_results = search_backend.search(search_term, st.session_state.current_page, PAGE_SIZE)
+            # Render from the hits; only records missing display fields are
+            # fetched from Firestore (batched get_all, in relevance order).
+            recent_scrolls = hydrate_hits(
+                db_client,
+                search_results.get('hits', []),
+                cache=st.session_state.document_cache,
+                fields=SCROLL_HEADER_FIELDS,
             )
-            scroll_ids = [hit['objectID'] for hit in search_results.get('hits', [])]
-
-            if scroll_ids:
-                # Fetch full docs from Firestore using the IDs from Algolia
-                docs_ref = db_client.collection('scrolls').where('scroll_id', 'in', scroll_ids).stream()
-                docs_map = {doc.id: doc for doc in docs_ref}
-                # Re-order to match Algolia's relevance ranking
-                recent_scrolls = [docs_map.get(sid) for sid in scroll_ids if docs_map.get(sid)]
 
             total_pages = search_results.get('nbPages', 0)
             has_next_page = st.session_state.current_page < (total_pages - 1)
+        elif replica is not None:
+            # --- REPLICA BROWSE PATH: served from memory, no reads ---
+            recent_scrolls, has_next_page = replica.page(st.session_state.current_page, PAGE_SIZE)
         else:
             # --- FIRESTORE BROWSE PATH (existing logic) ---
-            scrolls_ref = db_client.collection("scrolls")
+            from google.cloud import firestore
+            if st.session_state.current_page >= len(st.session_state.page_cursors):
+                # Pages were browsed on the replica, which keeps no cursors.
+                st.session_state.current_page = 0
+            scrolls_ref = db_client.collection("scrolls").select(SCROLL_HEADER_FIELDS)
             query = scrolls_ref.order_by("metadata.created_at", direction=firestore.Query.DESCENDING)
             cursor = st.session_state.page_cursors[st.session_state.current_page]
             if cursor:
@@ -208,10 +304,11 @@ def display_recent_scrolls(db_client, algolia_index):
             
             docs_on_page = list(query.limit(PAGE_SIZE + 1).stream())
             has_next_page = len(docs_on_page) > PAGE_SIZE
-            recent_scrolls = docs_on_page[:PAGE_SIZE]
+            page_docs = docs_on_page[:PAGE_SIZE]
+            recent_scrolls = [(doc.id, doc.to_dict()) for doc in page_docs]
 
             if has_next_page and len(st.session_state.page_cursors) == st.session_state.current_page + 1:
-                st.session_state.page_cursors.append(recent_scrolls[-1])
+                st.session_state.page_cursors.append(page_docs[-1])
 
         if not recent_scrolls:
             if search_term:
@@ -220,9 +317,7 @@ def display_recent_scrolls(db_client, algolia_index):
                 st.info("No scrolls found on this page. Create one or check other pages.")
             return
 
-        for scroll in recent_scrolls:
-            scroll_data = scroll.to_dict()
-            scroll_id = scroll.id
+        for scroll_id, scroll_data in recent_scrolls:
             summary = scroll_data.get("content", {}).get("summary", "No summary available")
             created_at = scroll_data.get("metadata", {}).get("created_at")
             display_time = created_at.strftime("%Y-%m-%d %H:%M UTC") if created_at else "N/A"
@@ -237,12 +332,14 @@ def display_recent_scrolls(db_client, algolia_index):
                         c1, c2, _ = st.columns([1, 1, 5])
                         if c1.form_submit_button("Save Changes", type="primary"):
                             updated_topics = [topic.strip() for topic in updated_topics_str.split("\n") if topic.strip()]
-                            db_client.collection("scrolls").document(scroll_id).update({
-                                "content.summary": updated_summary, "content.topics": updated_topics
-                            })
-                            algolia_index.partial_update_object({
-                                'objectID': scroll_id, 'summary': updated_summary, 'topics': updated_topics
-                            }).wait()
+                            outbox.update(
+                                db_client.collection("scrolls").document(scroll_id),
+                                {"content.summary": updated_summary, "content.topics": updated_topics},
+                                {'objectID': scroll_id, 'summary': updated_summary, 'topics': updated_topics},
+                            )
+                            st.session_state.full_scrolls.pop(scroll_id, None)
+                            st.session_state.document_cache.invalidate(scroll_id)
+                            logger.info("Scroll updated", extra={"scroll_id": scroll_id})
                             st.success("Scroll updated successfully!")
                             st.session_state.editing_scroll_id = None
                             st.rerun()
@@ -250,16 +347,25 @@ def display_recent_scrolls(db_client, algolia_index):
                             st.session_state.editing_scroll_id = None
                             st.rerun()
                 else:
-                    st.json(scroll_data)
-                    c1, c2, _ = st.columns([1, 1, 5])
+                    if scroll_id in st.session_state.full_scrolls:
+                        st.json(load_full_scroll(db_client, scroll_id))
+                    else:
+                        st.json(scroll_data)
+                    c1, c2, c3, _ = st.columns([1, 1, 2, 3])
                     if c1.button("Edit", key=f"edit_{scroll_id}"):
                         st.session_state.editing_scroll_id = scroll_id
                         st.rerun()
                     if c2.button("Delete", key=f"delete_{scroll_id}"):
-                        db_client.collection("scrolls").document(scroll_id).delete()
-                        algolia_index.delete_object(scroll_id).wait()
+                        outbox.delete(db_client.collection("scrolls").document(scroll_id), scroll_id)
+                        st.session_state.full_scrolls.pop(scroll_id, None)
+                        st.session_state.document_cache.invalidate(scroll_id)
+                        get_scroll_stats.clear()
+                        logger.info("Scroll deleted", extra={"scroll_id": scroll_id})
                         st.success("Scroll deleted.")
                         st.rerun()
+                    if scroll_id not in st.session_state.full_scrolls and c3.button("Load full scroll", key=f"full_{scroll_id}"):
+                        load_full_scroll(db_client, scroll_id)
+                        st.rerun()
 
         # Pagination buttons
         col1, col2, col3 = st.columns([1, 1, 5])
@@ -275,29 +381,95 @@ def display_recent_scrolls(db_client, algolia_index):
             st.session_state.editing_scroll_id = None # Reset edit state on navigation
             st.rerun()
         
-        col3.write(f"Page {st.session_state.current_page + 1}")
+        col3.write(f"Page {st.session_state.current_page + 1} of {max(total_pages, 1)}")
 
     except Exception as e:
         st.error("Could not fetch recent scrolls. A Firestore index might be required.")
         st.info(f"Error details: {e}. If this is a 'FAILED_PRECONDITION' error, please create the required composite index using the link provided in the terminal or logs.")
 
 # === Main Application Logic ===
+# Each rerun is one UI action: its backend calls share a trace and a
+# correlation ID in the logs (see display_metrics_panel).
+start_trace()
+new_correlation_id()
 config = load_config()
-db = initialize_firebase(config["service_account_path"])
-secret_client = initialize_secret_manager(config["service_account_path"])
-
-# Fetch Algolia credentials and initialize client
-algolia_app_id = get_secret(secret_client, config["project_id"], "algolia-app-id")
-algolia_admin_api_key = get_secret(secret_client, config["project_id"], "algolia-admin-api-key")
-algolia_client = initialize_algolia(algolia_app_id, algolia_admin_api_key)
-algolia_index = algolia_client.init_index("codessa_scrolls")
-
 
+# The header and input render before any client is built, so a cold start
+# shows the page while Firestore, Secret Manager and Algolia load.
 st.title("Codessa: Inkwell ✍️")
 st.markdown("Paste key responses here and turn them into structured memory scrolls.")
 
 scroll_text = st.text_area("Paste ChatGPT Response:", height=300)
 
+# Clients are shared process-wide and survive reruns; see services/clients.py.
+registry = get_registry()
+credentials_key = credentials_fingerprint(config["service_account_path"])
+db = registry.get(
+    "firestore",
+    lambda: initialize_firebase(config["service_account_path"]),
+    fingerprint=credentials_key,
+    close=close_firebase,
+)
+secret_client = registry.get(
+    "secret_manager",
+    lambda: initialize_secret_manager(config["service_account_path"]),
+    fingerprint=credentials_key,
+)
+secrets = registry.get(
+    "secret_cache",
+    lambda: SecretCache(secret_client, config["project_id"]),
+    fingerprint=credentials_key,
+    close=lambda cache: cache.close(),
+)
+# Local-only search needs neither the Algolia secrets nor its client.
+use_algolia = SEARCH_BACKEND != "local"
+prefetch_secrets(secrets, [s for s in REQUIRED_SECRET_IDS if use_algolia or s not in ALGOLIA_SECRET_IDS])
+
+# Fetch Algolia credentials and initialize client
+algolia_app_id = algolia_admin_api_key = algolia_index = None
+if use_algolia:
+    algolia_app_id = get_secret(secrets, "algolia-app-id")
+    algolia_admin_api_key = get_secret(secrets, "algolia-admin-api-key")
+    algolia_client = registry.get(
+        "algolia",
+        lambda: initialize_algolia(algolia_app_id, algolia_admin_api_key),
+        fingerprint=secret_fingerprint(algolia_app_id, algolia_admin_api_key),
+    )
+    algolia_index = algolia_client.init_index("codessa_scrolls")
+# SEARCH_BACKEND picks Algolia, the embedded index, or both; the outbox syncs
+# whichever index search_index fans out to.
+search_backend, search_index, _ = registry.get(
+    "search_backend",
+    lambda: build_search(algolia_index, db),
+    fingerprint=secret_fingerprint(credentials_key, algolia_app_id, algolia_admin_api_key),
+    close=lambda built: built[2] is not None and built[2].close(),
+)
+outbox = registry.get(
+    "search_outbox",
+    lambda: SearchOutbox(db),
+    fingerprint=credentials_key,
+)
+outbox_worker = registry.get(
+    "search_outbox_worker",
+    lambda: OutboxWorker(outbox, search_index).start(),
+    fingerprint=secret_fingerprint(credentials_key, algolia_app_id, algolia_admin_api_key),
+    close=lambda worker: worker.stop(),
+)
+replicas = registry.get(
+    "scroll_replicas",
+    lambda: ReplicaManager(db, SCROLL_HEADER_FIELDS),
+    fingerprint=credentials_key,
+    close=lambda manager: manager.close(),
+) if REPLICA_ENABLED else None
+if METRICS_PORT:
+    registry.get(
+        "metrics_exporter",
+        lambda: start_http_exporter(int(METRICS_PORT)),
+        fingerprint=METRICS_PORT,
+        close=lambda server: server.shutdown(),
+    )
+
+
 if st.button("Parse & Generate Scroll"):
     is_valid, error_msg = validate_scroll_text(scroll_text)
     if not is_valid:
@@ -306,7 +478,7 @@ if st.button("Parse & Generate Scroll"):
         scroll_id = str(uuid.uuid4())
 
         # Fetch the Gemini API key from Secret Manager as per ADR-0005
-        gemini_api_key = get_secret(secret_client, config["project_id"], "gemini-api-key")
+        gemini_api_key = get_secret(secrets, "gemini-api-key")
         parsed_data = parse_scroll_content(scroll_text, config["gemini_api_endpoint"], gemini_api_key)
         if not parsed_data:
             st.info("Parser did not return a result. Using fallback data.")
@@ -315,16 +487,21 @@ if st.button("Parse & Generate Scroll"):
         scroll_doc = create_scroll_document(scroll_id, scroll_text, parsed_data)
 
         try:
-            db.collection("scrolls").document(scroll_id).set(scroll_doc)
-            # Sync to Algolia
-            algolia_record = { "objectID": scroll_id, **scroll_doc['content'] }
-            algolia_index.save_object(algolia_record).wait()
-            st.success("Scroll successfully created and stored in Firestore & Algolia ✨")
+            # created_at lets search results render from the hit alone.
+            algolia_record = {
+                "objectID": scroll_id,
+                **scroll_doc['content'],
+                "metadata": {"created_at": int(datetime.datetime.now(datetime.timezone.utc).timestamp())},
+            }
+            # Firestore and the outbox entry commit together; Algolia is
+            # synced in the background by the outbox worker.
+            outbox.create(db.collection("scrolls").document(scroll_id), scroll_doc, algolia_record)
+            get_scroll_stats.clear()
+            logger.info("Scroll created", extra={"scroll_id": scroll_id})
+            st.success("Scroll successfully created and stored in Firestore ✨ (search index syncs shortly)")
         except Exception as e:
+            logger.exception("Failed to store scroll", extra={"scroll_id": scroll_id})
             st.error(f"Failed to store scroll: {str(e)}")
-            # Attempt to clean up Firestore entry if Algolia sync fails
-            db.collection("scrolls").document(scroll_id).delete()
-            st.warning("Rolled back Firestore entry due to sync failure.")
 
         # Show parsed output
         st.subheader("Parsed Scroll Summary")
@@ -333,7 +510,8 @@ if st.button("Parse & Generate Scroll"):
         st.json(scroll_doc)
 
 # Display the list of recent scrolls on every app run
-display_recent_scrolls(db, algolia_index)
+display_recent_scrolls(db, search_backend, outbox, replicas)
+display_metrics_panel()
 
 # === Future: Embed this app in Notion via iframe or WebView ===
 # Note: Notion does not support arbitrary iframes directly for security reasons.
@@ -0,0 +1,182 @@
+# core/context.py
+"""
+Token-budgeted context assembly for reflections.
+
+Candidate scrolls are scored by recency, relevance to a query and whether
+they belong to the reflecting agent, then packed best-first into a token
+budget. Long responses are cut down to their leading sentences so one huge
+scroll cannot crowd out the rest. Output is streamed piece by piece, and
+its size is bounded by the budget however many scrolls an agent has.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_TOKEN_BUDGET = 4000
+DEFAULT_MAX_SCROLL_TOKENS = 800
+DEFAULT_RECENCY_HALF_LIFE_DAYS = 7.0
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class ContextWeights:
+    """Relative weights of the scoring signals (each signal is in [0, 1])."""
+
+    recency: float = 1.0
+    relevance: float = 2.0
+    agent: float = 0.5
+    half_life_days: float = DEFAULT_RECENCY_HALF_LIFE_DAYS
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximates the token count (about four characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def summarize(text: str, max_tokens: int) -> str:
+    """
+    Shortens text to about max_tokens, keeping whole leading sentences.
+
+    Falls back to a hard character cut when the first sentence alone is
+    over budget, and notes how much was dropped.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Leave room for the omission note.
+    max_chars = max(0, max_tokens - 8) * CHARS_PER_TOKEN
+    kept = ""
+    for sentence in _SENTENCE_END.split(text):
+        candidate = f"{kept} {sentence}".strip() if kept else sentence
+        if len(candidate) > max_chars:
+            break
+        kept = candidate
+    if not kept:
+        kept = text[:max_chars].rstrip()
+    return f"{kept} […{estimate_tokens(text) - estimate_tokens(kept)} tokens omitted]"
+
+
+def _recency(created_at: Optional[datetime], now: datetime, half_life_days: float) -> float:
+    if not isinstance(created_at, datetime):
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_days = max(0.0, (now - created_at).total_seconds() / 86400)
+    return math.pow(0.5, age_days / half_life_days)
+
+
+def _overlap(query_terms: set, scroll: Dict) -> float:
+    terms = set(_WORD.findall(f"{scroll.get('prompt', '')} {scroll.get('response', '')}".lower()))
+    if not query_terms or not terms:
+        return 0.0
+    return len(query_terms & terms) / len(query_terms)
+
+
+def score_scrolls(
+    scrolls: List[Dict],
+    agent_id: Optional[str] = None,
+    query: Optional[str] = None,
+    weights: Optional[ContextWeights] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict]:
+    """
+    Scores candidate scrolls and returns them best first.
+
+    Relevance is taken from a scroll's "score" key (as set by
+    search_similar) when present, otherwise from query term overlap.
+
+    Returns:
+        Copies of the scrolls with a "context_score" key, sorted descending.
+    """
+    weights = weights or ContextWeights()
+    now = now or datetime.now(timezone.utc)
+    query_terms = set(_WORD.findall(query.lower())) if query else set()
+    scored = []
+    for scroll in scrolls:
+        relevance = scroll["score"] if "score" in scroll else _overlap(query_terms, scroll)
+        score = (
+            weights.recency * _recency(scroll.get("created_at"), now, weights.half_life_days)
+            + weights.relevance * max(0.0, relevance)
+            + weights.agent * (1.0 if agent_id is not None and scroll.get("agent_id") == agent_id else 0.0)
+        )
+        scored.append(scroll | {"context_score": score})
+    scored.sort(key=lambda s: s["context_score"], reverse=True)
+    return scored
+
+
+def format_scroll(scroll: Dict, max_tokens: int) -> str:
+    """Renders one scroll, summarizing its response to fit max_tokens."""
+    prompt = scroll.get("prompt", "")
+    header = f"Prompt: {prompt}\nResponse: "
+    response_budget = max_tokens - estimate_tokens(header)
+    if response_budget <= 0:
+        return summarize(header + scroll.get("response", ""), max_tokens)
+    return header + summarize(scroll.get("response", ""), response_budget)
+
+
+def assemble_context(
+    scrolls: List[Dict],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    agent_id: Optional[str] = None,
+    query: Optional[str] = None,
+    weights: Optional[ContextWeights] = None,
+    max_scroll_tokens: int = DEFAULT_MAX_SCROLL_TOKENS,
+    separator: str = "\n\n",
+) -> Iterator[str]:
+    """
+    Streams the highest-scoring scrolls that fit in token_budget.
+
+    Args:
+        scrolls: Candidate scrolls (dicts with prompt, response, created_at,
+            agent_id and optionally a similarity "score").
+        token_budget: Upper bound on the estimated tokens yielded.
+        agent_id: Optional. The reflecting agent; its scrolls score higher.
+        query: Optional. Text the context should be relevant to.
+        weights: Optional. Scoring weights.
+        max_scroll_tokens: Cap on the tokens spent on any one scroll.
+        separator: Text yielded between scrolls.
+
+    Yields:
+        Rendered scrolls, each preceded by the separator after the first.
+    """
+    for _, piece in pack_scrolls(
+        score_scrolls(scrolls, agent_id, query, weights), token_budget, max_scroll_tokens, separator
+    ):
+        yield piece
+
+
+def pack_scrolls(
+    scrolls: List[Dict],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_scroll_tokens: int = DEFAULT_MAX_SCROLL_TOKENS,
+    separator: str = "\n\n",
+) -> Iterator[Tuple[Dict, str]]:
+    """
+    Packs scrolls into token_budget in the order given.
+
+    Stops at the first scroll that no longer fits, so the scrolls yielded
+    are always a prefix of the input; reflections rely on this to know
+    which scrolls were folded in.
+
+    Yields:
+        (scroll, rendered piece) pairs, each piece preceded by the
+        separator after the first.
+    """
+    remaining = token_budget
+    separator_tokens = estimate_tokens(separator)
+    first = True
+    for scroll in scrolls:
+        cost = 0 if first else separator_tokens
+        allowance = min(max_scroll_tokens, remaining - cost)
+        # Not worth including a scroll squeezed below a few dozen tokens.
+        if allowance < 32:
+            break
+        piece = format_scroll(scroll, allowance)
+        remaining -= cost + estimate_tokens(piece)
+        yield scroll, piece if first else separator + piece
+        first = False
@@ -1,10 +1,28 @@
 # core/memory.py
 
+import threading
+from datetime import datetime
+
 from google.cloud import firestore
-from typing import List, Dict, Optional
+from google.cloud.firestore_v1.base_query import FieldFilter
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+
+from core.context import DEFAULT_TOKEN_BUDGET, ContextWeights, assemble_context, format_scroll, pack_scrolls, summarize
+from core.query import ASCENDING, DEFAULT_QUERY_LIMIT, DESCENDING, Filter, Query, QueryPlanner, normalize_filters
+from core.vector_index import Embedder, VectorIndex
+from services.aggregations import AggregationCache, count, grouped_counts
+from services.hydration import fetch_documents
+from services.pagination import DEFAULT_PAGE_SIZE, encode_page_token
 
 db = firestore.Client()
 
+# Field projection for list views: everything except the (potentially large)
+# prompt/response bodies.
+SCROLL_HEADER_FIELDS = ["agent_id", "metadata", "phase", "status", "created_at", "updated_at"]
+
+def _select(query, fields: Optional[List[str]] = None):
+    return query.select(fields) if fields is not None else query
+
 # === Memory Cortex: CREATE ===
 def create_scroll(agent_id: str, prompt: str, response: str, metadata: Optional[dict] = None) -> str:
     doc_ref = db.collection("scrolls").document()
@@ -19,91 +37,293 @@ def create_scroll(agent_id: str, prompt: str, response: str, metadata: Optional[
         "status": "active"
     }
     doc_ref.set(data)
+    _stats_cache.invalidate()
+    if _vector_index is not None:
+        _vector_index.upsert([(doc_ref.id, _embedding_text(data), agent_id)])
     return doc_ref.id
 
 # === Memory Cortex: RETRIEVE ===
-def get_scrolls(agent_id: str, limit: int = 10) -> List[Dict]:
-    query = (
-        db.collection("scrolls")
-        .where("agent_id", "==", agent_id)
-        .order_by("created_at", direction=firestore.Query.DESCENDING)
-        .limit(limit)
-    )
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
+def get_scrolls(agent_id: str, limit: int = 10, fields: Optional[List[str]] = None) -> List[Dict]:
+    return query_scrolls({"agent_id": agent_id}, order_by="created_at", limit=limit, fields=fields)[0]
 
 # === Memory Cortex: REFLECT ===
-def reflect_scrolls(agent_id: str, limit: int = 10) -> str:
-    scrolls = get_scrolls(agent_id, limit)
-    concatenated = "\n\n".join([f"Prompt: {s['prompt']}\nResponse: {s['response']}" for s in scrolls])
-    # Placeholder: Replace this with a call to Vertex AI or Gemini
-    reflection = f"Ava reflected on {len(scrolls)} memories:\n\n{concatenated}"
-    return reflection
+def reflection_context(agent_id: str, query: Optional[str] = None, limit: int = 50, token_budget: int = DEFAULT_TOKEN_BUDGET, weights: Optional[ContextWeights] = None) -> Iterator[str]:
+    """Streams the agent's most relevant scrolls packed into token_budget; with a query, similar scrolls are candidates too."""
+    candidates = {s["id"]: s for s in get_scrolls(agent_id, limit)}
+    if query:
+        for s in search_similar(None, query, k=limit):
+            candidates[s["id"]] = s
+    yield from assemble_context(list(candidates.values()), token_budget, agent_id, query, weights)
+
+# Reflections are versioned per agent: agent_reflections/{agent_id} holds the
+# latest one and the (created_at, id) high-water mark it covers; every
+# version is also kept under agent_reflections/{agent_id}/versions/{version}.
+REFLECTIONS_COLLECTION = "agent_reflections"
+# Concurrent reflections of one agent retry on top of the winner's version.
+REFLECT_MAX_ATTEMPTS = 5
+
+def _scrolls_since(agent_id: str, since: Optional[datetime], since_id: Optional[str], limit: int) -> List[Dict]:
+    """Oldest first after the (since, since_id) cursor, so a batch cut short by limit or the token budget can resume where it stopped."""
+    filters = [("agent_id", "==", agent_id)]
+    page_token = None
+    if since is not None and since_id is not None:
+        # The document ID breaks created_at ties, so a batch cut off inside
+        # a run of equal timestamps resumes inside that run.
+        page_token = encode_page_token([since, since_id])
+    elif since is not None:
+        # Reflections saved before high_water_id was recorded.
+        filters.append(("created_at", ">", since))
+    return query_scrolls(filters, order_by="created_at", direction=ASCENDING, limit=limit, page_token=page_token)[0]
+
+def _fold_reflection(previous: Optional[str], pieces: List[str], token_budget: int) -> str:
+    # Placeholder: Replace this with a call to Vertex AI or Gemini that folds
+    # the new memories into the previous reflection.
+    new = "".join(pieces)
+    if not previous:
+        return new
+    return f"{summarize(previous, token_budget // 2)}\n\n{new}"
+
+def _render_reflection(scroll_count: int, body: str) -> str:
+    return f"Ava reflected on {scroll_count} memories:\n\n{body}"
+
+def get_reflection(agent_id: str) -> Dict:
+    doc = db.collection(REFLECTIONS_COLLECTION).document(agent_id).get()
+    return (doc.to_dict() or {}) if doc.exists else {}
+
+def _fold_new_scrolls(agent_id: str, cached: Dict, limit: int, token_budget: int) -> Optional[Dict]:
+    """Folds every scroll past cached's high-water mark, limit at a time; None if there were none."""
+    reflection = cached.get("reflection")
+    high_water_mark = cached.get("high_water_mark")
+    high_water_id = cached.get("high_water_id")
+    scroll_count = cached.get("scroll_count", 0)
+    scroll_ids: List[str] = []
+    while True:
+        new_scrolls = _scrolls_since(agent_id, high_water_mark, high_water_id, limit)
+        if not new_scrolls:
+            break
+        # Packed oldest first; scrolls past the budget are left for the next
+        # round, so the high-water mark only covers scrolls folded in.
+        folded = list(pack_scrolls(new_scrolls, token_budget))
+        if not folded:
+            # The budget is below pack_scrolls' minimum allowance; fold the
+            # oldest scroll truncated to it so the mark still advances.
+            folded = [(new_scrolls[0], format_scroll(new_scrolls[0], max(token_budget, 1)))]
+        reflection = _fold_reflection(reflection, [piece for _, piece in folded], token_budget)
+        high_water_mark = folded[-1][0]["created_at"]
+        high_water_id = folded[-1][0]["id"]
+        scroll_count += len(folded)
+        scroll_ids.extend(scroll["id"] for scroll, _ in folded)
+    if not scroll_ids:
+        return None
+    return {
+        "agent_id": agent_id,
+        "reflection": reflection,
+        "scroll_count": scroll_count,
+        "high_water_mark": high_water_mark,
+        "high_water_id": high_water_id,
+        "scroll_ids": scroll_ids,
+    }
+
+@firestore.transactional
+def _commit_reflection(transaction, head_ref, data: Dict, base_version: Optional[int]) -> Optional[int]:
+    snapshot = head_ref.get(transaction=transaction)
+    current = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    if base_version is not None and current.get("version", 0) != base_version:
+        return None  # another caller reflected first; fold on top of theirs
+    version = current.get("version", 0) + 1
+    data = {**data, "version": version, "created_at": firestore.SERVER_TIMESTAMP}
+    transaction.set(head_ref, data)
+    transaction.set(head_ref.collection("versions").document(f"{version:06d}"), data)
+    return version
+
+def _save_reflection(agent_id: str, data: Dict, base_version: Optional[int]) -> Optional[int]:
+    """Writes data as the agent's next version; None if base_version is no longer the latest."""
+    head_ref = db.collection(REFLECTIONS_COLLECTION).document(agent_id)
+    return _commit_reflection(db.transaction(), head_ref, data, base_version)
+
+def reflect_scrolls(agent_id: str, limit: int = 10, query: Optional[str] = None, token_budget: int = DEFAULT_TOKEN_BUDGET, force: bool = False) -> str:
+    """Returns the agent's reflection, folding in only scrolls newer than the cached one; force rebuilds it from scratch.
+
+    limit is the batch size; batches are folded until the reflection has
+    caught up with every new scroll.
+    """
+    if query:
+        # Query-specific reflections depend on the query, so they are not cached.
+        pieces = list(reflection_context(agent_id, query, limit, token_budget))
+        return _render_reflection(len(pieces), _fold_reflection(None, pieces, token_budget))
+
+    for _ in range(REFLECT_MAX_ATTEMPTS):
+        cached = {} if force else get_reflection(agent_id)
+        data = _fold_new_scrolls(agent_id, cached, limit, token_budget)
+        if data is None:
+            return _render_reflection(cached.get("scroll_count", 0), cached.get("reflection", ""))
+        # A forced rebuild replaces whatever is there; an incremental fold
+        # only commits on top of the version it was built from.
+        if _save_reflection(agent_id, data, None if force else cached.get("version", 0)) is not None:
+            return _render_reflection(data["scroll_count"], data["reflection"])
+    raise RuntimeError(f"Could not save the reflection for {agent_id}: too many concurrent updates.")
 
 # === Memory Cortex: UPDATE === 
 def update_scroll(scroll_id: str, updated_data: dict) -> None:
     doc_ref = db.collection("scrolls").document(scroll_id)
     doc_ref.update(updated_data)
+    _stats_cache.invalidate()
+    if _vector_index is not None and any(k.split(".")[0] in EMBEDDED_FIELDS for k in updated_data):
+        doc = doc_ref.get(field_paths=EMBEDDED_FIELDS)
+        if doc.exists:
+            _vector_index.upsert([(doc.id, _embedding_text(doc.to_dict()), doc.get("agent_id"))])
     return
 # === Memory Cortex: DELETE ===
 def delete_scroll(scroll_id: str) -> None:
     doc_ref = db.collection("scrolls").document(scroll_id)
     doc_ref.delete()
+    _stats_cache.invalidate()
+    if _vector_index is not None:
+        _vector_index.remove([scroll_id])
     return
+# === Memory Cortex: PAGINATED ITERATION ===
+def iter_scroll_pages(filters: Optional[Dict[str, str]] = None, page_size: int = DEFAULT_PAGE_SIZE, page_token: Optional[str] = None, fields: Optional[List[str]] = None) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+    """Yields (scrolls, next_page_token) pages, newest first; persist the token to resume a walk.
+
+    Pages run through the query planner, so a filter combination without a
+    declared (filters..., created_at DESC) index falls back instead of failing.
+    """
+    while True:
+        scrolls, page_token = query_scrolls(filters, order_by="created_at", limit=page_size, fields=fields, page_token=page_token)
+        yield scrolls, page_token
+        if page_token is None:
+            return
+
+def list_scrolls_page(filters: Optional[Dict[str, str]] = None, page_size: int = DEFAULT_PAGE_SIZE, page_token: Optional[str] = None, fields: Optional[List[str]] = None) -> Tuple[List[Dict], Optional[str]]:
+    return next(iter_scroll_pages(filters, page_size, page_token, fields))
+
+def iter_scrolls(filters: Optional[Dict[str, str]] = None, page_size: int = DEFAULT_PAGE_SIZE, page_token: Optional[str] = None, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+    """Lazily yields every matching scroll while holding one page in memory."""
+    for scrolls, _ in iter_scroll_pages(filters, page_size, page_token, fields):
+        yield from scrolls
+
 # === Memory Cortex: LIST ALL ===
-def list_all_scrolls() -> List[Dict]:
-    query = db.collection("scrolls").order_by("created_at", direction=firestore.Query.DESCENDING)
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
+def list_all_scrolls(fields: Optional[List[str]] = None) -> List[Dict]:
+    # Prefer iter_scrolls() for large collections; this materializes everything.
+    return list(iter_scrolls(fields=fields))
 # === Memory Cortex: GET BY ID ===
-def get_scroll_by_id(scroll_id: str) -> Dict:
+def get_scroll_by_id(scroll_id: str, fields: Optional[List[str]] = None) -> Dict:
     doc_ref = db.collection("scrolls").document(scroll_id)
-    doc = doc_ref.get()
+    doc = doc_ref.get(field_paths=fields)
     doc_dict = doc.to_dict()
     if doc.exists and doc_dict is not None:
         return doc_dict | {"id": doc.id}
     else:
         return {}
-# === Memory Cortex: GET BY AGENT ID ===
-def get_scrolls_by_agent_id(agent_id: str) -> List[Dict]:
-    query = db.collection("scrolls").where("agent_id", "==", agent_id)
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
-# === Memory Cortex: GET BY PHASE ===
-def get_scrolls_by_phase(phase: str) -> List[Dict]:
-    query = db.collection("scrolls").where("phase", "==", phase)
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]   
-# === Memory Cortex: GET BY STATUS ===
-def get_scrolls_by_status(status: str) -> List[Dict]:
-    query = db.collection("scrolls").where("status", "==", status)
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
-# === Memory Cortex: GET BY AGENT ID AND PHASE ===
-def get_scrolls_by_agent_id_and_phase(agent_id: str, phase: str) -> List[Dict]:
-    query = (
-        db.collection("scrolls")
-        .where("agent_id", "==", agent_id)
-        .where("phase", "==", phase)
-    )
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
-# === Memory Cortex: GET BY AGENT ID AND STATUS ===
-# def get_scrolls_by_agent_id_and_status(agent_id: str, status: str) ->
-def get_scrolls_by_agent_id_and_status(agent_id: str, status: str) -> List[Dict]:
-    query = (
-        db.collection("scrolls")
-        .where("agent_id", "==", agent_id)
-        .where("status", "==", status)
-    )
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
-def get_scrolls_by_phase_and_status(phase: str, status: str) -> List[Dict]:
-    query = (
-        db.collection("scrolls")
-        .where("phase", "==", phase)
-        .where("status", "==", status)
-    )
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
-# === Memory Cortex: GET BY AGENT ID, PHASE, AND STATUS ===
-def get_scrolls_by_agent_id_phase_and_status(agent_id: str, phase: str, status: str) -> List[Dict]:
-    query = (
-        db.collection("scrolls")
-        .where("agent_id", "==", agent_id)
-        .where("phase", "==", phase)
-        .where("status", "==", status)
-    )
-    return [doc.to_dict() | {"id": doc.id} for doc in query.stream()]
\ No newline at end of file
+
+def get_scrolls_by_ids(scroll_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+    """Fetches scrolls in batched get_all calls, in input order; missing IDs are skipped."""
+    docs = fetch_documents(db, list(dict.fromkeys(scroll_ids)), "scrolls", fields)
+    return [docs[scroll_id] | {"id": scroll_id} for scroll_id in scroll_ids if scroll_id in docs]
+# === Memory Cortex: QUERY ===
+_query_planner: Optional[QueryPlanner] = None
+
+def get_query_planner() -> QueryPlanner:
+    global _query_planner
+    if _query_planner is None:
+        _query_planner = QueryPlanner(db)
+    return _query_planner
+
+def query_scrolls(filters: Union[None, Dict[str, str], List[Filter]] = None, order_by: Optional[str] = None, direction: str = DESCENDING, limit: int = DEFAULT_QUERY_LIMIT, fields: Optional[List[str]] = None, page_token: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Runs a bounded scroll query through the index-aware planner; returns (scrolls, next_page_token)."""
+    query = Query("scrolls", normalize_filters(filters), max_results=limit, fields=fields, page_token=page_token)
+    if order_by:
+        query.order_by(order_by, direction)
+    return get_query_planner().run(query)
+
+# === Memory Cortex: GET BY FILTER ===
+# Thin wrappers kept for existing callers; prefer query_scrolls().
+def get_scrolls_by_agent_id(agent_id: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"agent_id": agent_id}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_phase(phase: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"phase": phase}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_status(status: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"status": status}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_agent_id_and_phase(agent_id: str, phase: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"agent_id": agent_id, "phase": phase}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_agent_id_and_status(agent_id: str, status: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"agent_id": agent_id, "status": status}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_phase_and_status(phase: str, status: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"phase": phase, "status": status}, limit=limit, fields=fields)[0]
+
+def get_scrolls_by_agent_id_phase_and_status(agent_id: str, phase: str, status: str, fields: Optional[List[str]] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[Dict]:
+    return query_scrolls({"agent_id": agent_id, "phase": phase, "status": status}, limit=limit, fields=fields)[0]
+
+# === Memory Cortex: STATS ===
+# Counts come from count() aggregations (no document downloads) and are
+# cached briefly; local writes invalidate the cache.
+SCROLL_STATUSES = ["active", "paused", "archived"]
+
+_stats_cache = AggregationCache()
+
+def _filtered_scrolls(filters: Optional[Dict[str, str]] = None):
+    query = db.collection("scrolls")
+    for field, value in (filters or {}).items():
+        query = query.where(filter=FieldFilter(field, "==", value))
+    return query
+
+def count_scrolls(filters: Optional[Dict[str, str]] = None) -> int:
+    key = ("count", tuple(sorted((filters or {}).items())))
+    return _stats_cache.get_or_compute(key, lambda: count(_filtered_scrolls(filters)))
+
+def scroll_stats(agent_id: Optional[str] = None, statuses: Optional[List[str]] = None) -> Dict:
+    """Returns {"total", "by_status"} for one agent (or all scrolls) in 1 + len(statuses) aggregation RPCs."""
+    statuses = statuses or SCROLL_STATUSES
+    filters = {"agent_id": agent_id} if agent_id else {}
+    def compute():
+        total, by_status = grouped_counts(_filtered_scrolls(filters), "status", statuses)
+        return {"total": total, "by_status": by_status}
+    return _stats_cache.get_or_compute(("stats", agent_id, tuple(statuses)), compute)
+
+# === Memory Cortex: SEMANTIC SEARCH ===
+# Fields that feed a scroll's embedding; updates touching them re-embed it.
+EMBEDDED_FIELDS = ["agent_id", "prompt", "response", "metadata"]
+
+_vector_index: Optional[VectorIndex] = None
+_vector_index_lock = threading.Lock()
+
+def _embedding_text(scroll: Dict) -> str:
+    summary = (scroll.get("metadata") or {}).get("summary", "")
+    return "\n".join(part for part in (summary, scroll.get("prompt", ""), scroll.get("response", "")) if part)
+
+def configure_vector_index(embedder: Optional[Embedder] = None, **kwargs) -> VectorIndex:
+    """Rebuilds the process-wide index, e.g. to plug in a model embedder instead of HashingEmbedder."""
+    global _vector_index
+    with _vector_index_lock:
+        _vector_index = None
+    return get_vector_index(embedder, **kwargs)
+
+def get_vector_index(embedder: Optional[Embedder] = None, **kwargs) -> VectorIndex:
+    """
+    Returns the process-wide index, backfilling it from Firestore once on first use.
+
+    The index is process-local: create_scroll, update_scroll and delete_scroll
+    keep it current, but writes made in another process or outside
+    core.memory are not reflected until configure_vector_index() rebuilds it.
+    """
+    global _vector_index
+    with _vector_index_lock:
+        if _vector_index is None:
+            index = VectorIndex(embedder, **kwargs)
+            for scrolls, _ in iter_scroll_pages(page_size=500, fields=EMBEDDED_FIELDS):
+                index.upsert((s["id"], _embedding_text(s), s.get("agent_id")) for s in scrolls)
+            _vector_index = index
+        return _vector_index
+
+def search_similar(agent_id: Optional[str], text: str, k: int = 5, fields: Optional[List[str]] = None) -> List[Dict]:
+    """Returns the k scrolls of agent_id (any agent if None) most similar to text, each with a "score"."""
+    matches = get_vector_index().search(text, k, group=agent_id)
+    if not matches:
+        return []
+    docs = fetch_documents(db, [scroll_id for scroll_id, _ in matches], "scrolls", fields)
+    return [docs[scroll_id] | {"id": scroll_id, "score": score} for scroll_id, score in matches if scroll_id in docs]
@@ -0,0 +1,445 @@
+# core/query.py
+"""
+Composable Firestore query builder with a composite-index-aware planner.
+
+A Query collects filters, ordering, a limit, a projection and a page
+token, and the planner decides how to run it. Every plan works out the
+composite index Firestore would need and checks it against the indexes
+declared in firestore.indexes.json. When the index is not declared, or
+Firestore rejects the query with FAILED_PRECONDITION because it has not
+been deployed yet, the planner does not fail. It pages through the
+equality part of the query, which merged single-field indexes can serve,
+and does the rest in memory. A fallback that would scan more than
+FALLBACK_SCAN_LIMIT documents raises FallbackScanLimitExceeded rather
+than return a partial result. The missing definition is recorded in
+MISSING_INDEX_FILE, which `python -m core.query --write` merges into
+firestore.indexes.json together with the misses of SCROLL_QUERY_SHAPES.
+
+Every query is bounded: the limit defaults to DEFAULT_QUERY_LIMIT and is
+clamped to MAX_QUERY_LIMIT.
+"""
+
+import argparse
+import functools
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from services.metrics import document_size, record_reads, span
+from services.pagination import decode_page_token, encode_page_token
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_FILE = os.path.join(_REPO_ROOT, "firestore.indexes.json")
+# Indexes the planner fell back for at runtime, in the same format.
+MISSING_INDEX_FILE = os.environ.get(
+    "QUERY_MISSING_INDEX_FILE", os.path.join(_REPO_ROOT, "firestore.indexes.missing.json")
+)
+DEFAULT_QUERY_LIMIT = 100
+MAX_QUERY_LIMIT = 1000
+FALLBACK_PAGE_SIZE = 500
+FALLBACK_SCAN_LIMIT = int(os.environ.get("QUERY_FALLBACK_SCAN_LIMIT", "20000"))
+
+ASCENDING = firestore.Query.ASCENDING
+DESCENDING = firestore.Query.DESCENDING
+
+EQUALITY_OPS = {"==", "in"}
+ARRAY_OPS = {"array_contains", "array_contains_any", "array-contains", "array-contains-any"}
+RANGE_OPS = {"<", "<=", ">", ">=", "!=", "not-in", "not_in"}
+
+Filter = Tuple[str, str, Any]
+# One composite index: the collection and its (field_path, mode) entries,
+# mode being "ASCENDING", "DESCENDING" or "CONTAINS".
+IndexKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class FallbackScanLimitExceeded(RuntimeError):
+    """Raised when a fallback query would scan more than FALLBACK_SCAN_LIMIT documents."""
+
+
+def normalize_filters(filters: Union[None, Dict[str, Any], Iterable[Filter]]) -> List[Filter]:
+    if filters is None:
+        return []
+    if isinstance(filters, dict):
+        return [(f, "==", v) for f, v in filters.items()]
+    return [tuple(f) for f in filters]
+
+
+@dataclass
+class Query:
+    """
+    A bounded query description; build it with the chainable methods.
+
+    Example:
+        Query("scrolls").where("agent_id", "==", "ava").order_by("created_at", DESCENDING).limit(20)
+    """
+
+    collection: str
+    filters: List[Filter] = field(default_factory=list)
+    orders: List[Tuple[str, str]] = field(default_factory=list)
+    max_results: int = DEFAULT_QUERY_LIMIT
+    fields: Optional[List[str]] = None
+    page_token: Optional[str] = None
+
+    def where(self, field_path: str, op: str, value: Any) -> "Query":
+        self.filters.append((field_path, op, value))
+        return self
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        self.orders.append((field_path, direction))
+        return self
+
+    def limit(self, count: int) -> "Query":
+        self.max_results = count
+        return self
+
+    def select(self, fields: Optional[List[str]]) -> "Query":
+        self.fields = fields
+        return self
+
+    def start_after(self, page_token: Optional[str]) -> "Query":
+        self.page_token = page_token
+        return self
+
+    def effective_orders(self) -> List[Tuple[str, str]]:
+        """Explicit orders, led by the inequality field as Firestore requires."""
+        orders = list(self.orders)
+        ordered = {f for f, _ in orders}
+        for f, op, _ in self.filters:
+            if op in RANGE_OPS and f not in ordered:
+                orders.insert(0, (f, orders[0][1] if orders else ASCENDING))
+                ordered.add(f)
+        return orders
+
+
+def required_index(query: Query) -> Optional[IndexKey]:
+    """
+    Returns the composite index a query needs, or None if single-field
+    indexes (merged, for pure equality) are enough.
+    """
+    equality = sorted({f for f, op, _ in query.filters if op in EQUALITY_OPS})
+    arrays = sorted({f for f, op, _ in query.filters if op in ARRAY_OPS})
+    orders = query.effective_orders()
+    if not orders:
+        return None
+    if not equality and not arrays and len(orders) == 1:
+        return None
+    if set(equality) | set(arrays) <= {orders[0][0]} and len(orders) == 1:
+        return None
+    fields = [(f, "ASCENDING") for f in _equality_prefix(query)]
+    fields += [(f, "CONTAINS") for f in arrays]
+    fields += [(f, "DESCENDING" if d == DESCENDING else "ASCENDING") for f, d in orders]
+    return query.collection, tuple(fields)
+
+
+def _equality_prefix(query: Query) -> List[str]:
+    ordered = {f for f, _ in query.effective_orders()}
+    return sorted({f for f, op, _ in query.filters if op in EQUALITY_OPS} - ordered)
+
+
+def covered(query: Query, indexes: Set[IndexKey]) -> bool:
+    """Returns True if the query needs no composite index or one is declared."""
+    needed = required_index(query)
+    if needed is None:
+        return True
+    # Equality fields may be declared in any order ahead of the rest.
+    split = len(_equality_prefix(query))
+    return any(
+        index[0] == needed[0]
+        and len(index[1]) == len(needed[1])
+        and set(index[1][:split]) == set(needed[1][:split])
+        and index[1][split:] == needed[1][split:]
+        for index in indexes
+    )
+
+
+def load_indexes(path: str = INDEX_FILE) -> Set[IndexKey]:
+    """Reads composite index definitions from a firestore.indexes.json file."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    indexes = set()
+    for index in spec.get("indexes", []):
+        entries = tuple(
+            (entry["fieldPath"], entry.get("order") or ("CONTAINS" if entry.get("arrayConfig") else "ASCENDING"))
+            for entry in index["fields"]
+        )
+        indexes.add((index["collectionGroup"], entries))
+    return indexes
+
+
+def index_definitions(indexes: Iterable[IndexKey]) -> Dict[str, Any]:
+    """Renders indexes in the firestore.indexes.json format."""
+    return {
+        "indexes": [
+            {
+                "collectionGroup": collection,
+                "queryScope": "COLLECTION",
+                "fields": [
+                    {"fieldPath": f, "arrayConfig": "CONTAINS"} if mode == "CONTAINS" else {"fieldPath": f, "order": mode}
+                    for f, mode in entries
+                ],
+            }
+            for collection, entries in sorted(indexes)
+        ],
+        "fieldOverrides": [],
+    }
+
+
+class QueryPlanner:
+    """
+    Runs Query objects against Firestore, falling back when an index is missing.
+
+    Methods:
+        run(query):
+            Returns (documents, next_page_token).
+        missing_indexes():
+            Returns the composite indexes needed but not declared.
+        write_index_definitions(path=INDEX_FILE):
+            Writes declared plus missing indexes to firestore.indexes.json.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        index_path: str = INDEX_FILE,
+        missing_path: Optional[str] = MISSING_INDEX_FILE,
+        scan_limit: int = FALLBACK_SCAN_LIMIT,
+    ):
+        self.db = db
+        self.index_path = index_path
+        self.missing_path = missing_path
+        self.scan_limit = scan_limit
+        self.indexes = load_indexes(index_path)
+        self._missing: Set[IndexKey] = set()
+        self._lock = threading.Lock()
+
+    def run(self, query: Query) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Executes a query, bounded by its limit.
+
+        Returns:
+            (documents, next_page_token). Each document carries its "id";
+            next_page_token is None when the result set is exhausted.
+
+        Raises:
+            ValueError: If the page token is malformed.
+            FallbackScanLimitExceeded: If the query needs a missing index
+                and its equality part matches more than scan_limit documents.
+        """
+        limit = max(1, min(query.max_results or DEFAULT_QUERY_LIMIT, MAX_QUERY_LIMIT))
+        cursor = decode_page_token(query.page_token) if query.page_token else None
+        needed = required_index(query)
+        if not covered(query, self.indexes):
+            self._record_missing(needed)
+            return self._run_fallback(query, limit, cursor)
+        try:
+            return self._run_indexed(query, limit, cursor)
+        except FailedPrecondition:
+            # Declared but not (yet) deployed.
+            self._record_missing(needed, declared=True)
+            return self._run_fallback(query, limit, cursor)
+
+    def missing_indexes(self) -> Set[IndexKey]:
+        return set(self._missing)
+
+    def write_index_definitions(self, path: Optional[str] = None) -> Dict[str, Any]:
+        spec = index_definitions(self.indexes | self._missing)
+        with open(path or self.index_path, "w", encoding="utf-8") as f:
+            json.dump(spec, f, indent=2)
+            f.write("\n")
+        return spec
+
+    def _record_missing(self, needed: IndexKey, declared: bool = False) -> None:
+        with self._lock:
+            if needed in self._missing:
+                return
+            self._missing.add(needed)
+            missing = set(self._missing)
+        state = "declared but not deployed" if declared else "not declared"
+        logger.warning(
+            "Composite index %s, running the query in fallback mode", state,
+            extra={"index": index_definitions([needed])["indexes"][0]},
+        )
+        if self.missing_path:
+            try:
+                recorded = load_indexes(self.missing_path)
+                with open(self.missing_path, "w", encoding="utf-8") as f:
+                    json.dump(index_definitions(recorded | missing), f, indent=2)
+                    f.write("\n")
+            except (OSError, ValueError) as e:
+                logger.debug("Could not record the missing index in %s: %s", self.missing_path, e)
+
+    def _projection(self, query: Query, orders: List[Tuple[str, str]]) -> Optional[List[str]]:
+        if query.fields is None:
+            return None
+        # Ordering, cursors and in-memory filtering need these fields too.
+        extra = [f for f, _ in orders] + [f for f, op, _ in query.filters if op not in EQUALITY_OPS]
+        return list(dict.fromkeys([*query.fields, *extra]))
+
+    def _run_indexed(self, query: Query, limit: int, cursor: Optional[List[Any]]) -> Tuple[List[Dict], Optional[str]]:
+        orders = query.effective_orders()
+        fs_query = self.db.collection(query.collection)
+        projection = self._projection(query, orders)
+        if projection is not None:
+            fs_query = fs_query.select(projection)
+        for f, op, value in query.filters:
+            fs_query = fs_query.where(filter=FieldFilter(f, op, value))
+        for f, direction in orders:
+            fs_query = fs_query.order_by(f, direction=direction)
+        fs_query = fs_query.order_by("__name__", direction=orders[-1][1] if orders else ASCENDING)
+        if cursor is not None:
+            fs_query = fs_query.start_after(cursor)
+        with span("firestore", op="query", collection=query.collection):
+            snapshots = list(fs_query.limit(limit).stream())
+        docs = [doc.to_dict() | {"id": doc.id} for doc in snapshots]
+        record_reads(query.collection, len(docs), document_size(docs))
+        return docs, self._next_token(docs, orders, limit)
+
+    def _run_fallback(self, query: Query, limit: int, cursor: Optional[List[Any]]) -> Tuple[List[Dict], Optional[str]]:
+        orders = query.effective_orders()
+        fs_query = self.db.collection(query.collection)
+        projection = self._projection(query, orders)
+        if projection is not None:
+            fs_query = fs_query.select(projection)
+        residual = []
+        for f, op, value in query.filters:
+            if op in EQUALITY_OPS or op in ARRAY_OPS:
+                fs_query = fs_query.where(filter=FieldFilter(f, op, value))
+            else:
+                residual.append((f, op, value))
+        fs_query = fs_query.order_by("__name__")
+
+        docs: List[Dict] = []
+        scanned = 0
+        last = None
+        with span("firestore", op="query_fallback", collection=query.collection) as details:
+            while True:
+                # One document past the limit tells a full scan from a truncated one.
+                page_query = fs_query.limit(min(FALLBACK_PAGE_SIZE, self.scan_limit + 1 - scanned))
+                if last is not None:
+                    page_query = page_query.start_after(last)
+                snapshots = list(page_query.stream())
+                scanned += len(snapshots)
+                page = [doc.to_dict() | {"id": doc.id} for doc in snapshots]
+                record_reads(query.collection, len(page), document_size(page))
+                docs.extend(d for d in page if all(_matches(_lookup(d, f), op, v) for f, op, v in residual))
+                if scanned > self.scan_limit:
+                    details["scanned"] = scanned
+                    logger.warning(
+                        "Fallback query exceeded the scan limit",
+                        extra={
+                            "collection": query.collection,
+                            "filters": [[f, op] for f, op, _ in query.filters],
+                            "orders": [list(order) for order in orders],
+                            "scan_limit": self.scan_limit,
+                        },
+                    )
+                    raise FallbackScanLimitExceeded(
+                        f"Query on {query.collection} needs a composite index that is not deployed, "
+                        f"and its fallback would scan more than {self.scan_limit} documents."
+                    )
+                if len(snapshots) < FALLBACK_PAGE_SIZE:
+                    break
+                last = snapshots[-1]
+            details["scanned"] = scanned
+        # Like Firestore, skip documents missing an order-by field.
+        docs = [d for d in docs if all(_lookup(d, f) is not None for f, _ in orders)]
+        keys = orders + [("id", orders[-1][1] if orders else ASCENDING)]
+        docs.sort(key=functools.cmp_to_key(lambda a, b: _compare([_lookup(a, f) for f, _ in keys], [_lookup(b, f) for f, _ in keys], keys)))
+        if cursor is not None:
+            docs = [d for d in docs if _compare([_lookup(d, f) for f, _ in keys], cursor, keys) > 0]
+        docs = docs[:limit]
+        return docs, self._next_token(docs, orders, limit)
+
+    @staticmethod
+    def _next_token(docs: List[Dict], orders: List[Tuple[str, str]], limit: int) -> Optional[str]:
+        if len(docs) < limit:
+            return None
+        last = docs[-1]
+        return encode_page_token([_lookup(last, f) for f, _ in orders] + [last["id"]])
+
+
+def _lookup(doc: Dict, field_path: str) -> Any:
+    value: Any = doc
+    for part in field_path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _matches(value: Any, op: str, target: Any) -> bool:
+    if value is None:
+        return False
+    if op == "<":
+        return value < target
+    if op == "<=":
+        return value <= target
+    if op == ">":
+        return value > target
+    if op == ">=":
+        return value >= target
+    if op == "!=":
+        return value != target
+    return value not in target
+
+
+def _compare(a: Sequence[Any], b: Sequence[Any], keys: Sequence[Tuple[str, str]]) -> int:
+    for x, y, (_, direction) in zip(a, b, keys):
+        if x == y:
+            continue
+        result = -1 if x < y else 1
+        return -result if direction == DESCENDING else result
+    return 0
+
+
+# Scroll queries issued by the memory cortex and the Streamlit apps; planned
+# by `python -m core.query` to check firestore.indexes.json.
+SCROLL_QUERY_SHAPES = [
+    Query("scrolls").where("agent_id", "==", "").order_by("created_at", DESCENDING),
+    # Reflection folds: oldest first after a (created_at, id) cursor, or a
+    # created_at mark for reflections saved before the cursor existed.
+    Query("scrolls").where("agent_id", "==", "").order_by("created_at", ASCENDING),
+    Query("scrolls").where("agent_id", "==", "").where("created_at", ">", 0).order_by("created_at", ASCENDING),
+    Query("scrolls").where("phase", "==", "").order_by("created_at", DESCENDING),
+    Query("scrolls").where("status", "==", "").order_by("created_at", DESCENDING),
+    Query("scrolls").where("metadata.created_by", "==", "").order_by("metadata.created_at", DESCENDING),
+]
+
+
+def plan_shapes(shapes: Sequence[Query], indexes: Set[IndexKey]) -> Set[IndexKey]:
+    """Returns the composite indexes the given queries need but are not declared."""
+    missing = set()
+    for shape in shapes:
+        if not covered(shape, indexes):
+            missing.add(required_index(shape))
+    return missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check firestore.indexes.json against the queries in use: SCROLL_QUERY_SHAPES "
+        "and the queries a QueryPlanner fell back for at runtime (--missing-path)."
+    )
+    parser.add_argument("--write", action="store_true", help="add missing index definitions to the file")
+    parser.add_argument("--path", default=INDEX_FILE)
+    parser.add_argument("--missing-path", default=MISSING_INDEX_FILE,
+                        help="indexes recorded by QueryPlanner fallbacks (default: %(default)s)")
+    args = parser.parse_args()
+    declared = load_indexes(args.path)
+    missing = plan_shapes(SCROLL_QUERY_SHAPES, declared) | (load_indexes(args.missing_path) - declared)
+    print(json.dumps(index_definitions(missing), indent=2))
+    if args.write and missing:
+        with open(args.path, "w", encoding="utf-8") as f:
+            json.dump(index_definitions(declared | missing), f, indent=2)
+            f.write("\n")
@@ -0,0 +1,251 @@
+# core/vector_index.py
+"""
+Embedded vector index for semantic scroll retrieval (the vector leg of ADR 0010).
+
+Vectors live in one contiguous NumPy matrix, L2-normalized so that a dot
+product is the cosine similarity. Small indexes are searched brute force;
+past `ivf_threshold` vectors the index trains a coarse k-means quantizer and
+only scores the `nprobe` closest inverted lists. Adds, upserts and removes
+are incremental (removal swaps the last row into the freed slot).
+
+The index lives in process memory and is never persisted or shared. The
+one core.memory keeps is backfilled from Firestore once, on first use, and
+then only sees the writes core.memory itself makes in that process. Scrolls
+written by another process, or directly through Firestore, are missing from
+it until the process restarts or configure_vector_index() rebuilds it.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 256
+DEFAULT_IVF_THRESHOLD = 20000
+DEFAULT_NPROBE = 8
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(Protocol):
+    """Turns texts into fixed-size float vectors."""
+
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 array."""
+        ...
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder based on the hashing trick.
+
+    Lower-cased word unigrams and bigrams are hashed into `dim` signed
+    buckets with sub-linear term weighting. It needs no model or network
+    access, so it is the default for local runs and tests; swap in a model
+    embedder for better semantic recall.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            counts: Dict[str, int] = {}
+            for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                bucket, sign = self._bucket(token)
+                vectors[row, bucket] += sign * (1.0 + np.log(count))
+        return vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class VectorIndex:
+    """
+    Thread-safe in-process vector index with optional IVF acceleration.
+
+    Each vector carries an ID and a group key (the agent ID for scrolls) so
+    searches can be restricted to one group without a separate index.
+
+    Methods:
+        upsert(items):
+            Adds or replaces (id, text, group) items.
+        remove(ids):
+            Removes vectors by ID; unknown IDs are ignored.
+        search(text, k=5, group=None):
+            Returns the k most similar (id, score) pairs.
+        train(nlist=None):
+            Builds the IVF quantizer over the current vectors.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        ivf_threshold: int = DEFAULT_IVF_THRESHOLD,
+        nprobe: int = DEFAULT_NPROBE,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.dim = self.embedder.dim
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._groups = np.zeros(0, dtype=np.int32)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._group_codes: Dict[Optional[str], int] = {}
+        self._centroids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    def upsert(self, items: Iterable[Tuple[str, str, Optional[str]]]) -> None:
+        """
+        Adds or replaces vectors.
+
+        Args:
+            items: (id, text, group) tuples. Texts are embedded in one batch.
+        """
+        items = list(items)
+        if not items:
+            return
+        vectors = _normalize(self.embedder.embed([text for _, text, _ in items]))
+        with self._lock:
+            self.remove([item_id for item_id, _, _ in items if item_id in self._rows])
+            start = len(self._ids)
+            self._reserve(start + len(items))
+            self._vectors[start:start + len(items)] = vectors
+            for offset, (item_id, _, group) in enumerate(items):
+                row = start + offset
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+                self._groups[row] = self._group_code(group)
+            if self._centroids is not None:
+                self._lists[start:start + len(items)] = self._assign(vectors)
+            elif len(self._ids) >= self.ivf_threshold:
+                self.train()
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Removes vectors by ID."""
+        with self._lock:
+            for item_id in ids:
+                row = self._rows.pop(item_id, None)
+                if row is None:
+                    continue
+                last = len(self._ids) - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._vectors[row] = self._vectors[last]
+                    self._groups[row] = self._groups[last]
+                    self._lists[row] = self._lists[last]
+                    self._ids[row] = moved
+                    self._rows[moved] = row
+                self._ids.pop()
+
+    def search(
+        self,
+        text: str,
+        k: int = 5,
+        group: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Finds the vectors most similar to text.
+
+        Args:
+            text: The query text.
+            k: Maximum number of results.
+            group: Optional. Restrict results to this group (agent ID).
+
+        Returns:
+            (id, cosine similarity) pairs, most similar first.
+        """
+        query = _normalize(self.embedder.embed([text]))[0]
+        with self._lock:
+            size = len(self._ids)
+            if size == 0 or k <= 0:
+                return []
+            candidates = np.arange(size)
+            if group is not None:
+                code = self._group_codes.get(group)
+                if code is None:
+                    return []
+                candidates = candidates[self._groups[:size] == code]
+            if self._centroids is not None and len(candidates) > k:
+                probe = np.argsort(-(self._centroids @ query))[:self.nprobe]
+                candidates = candidates[np.isin(self._lists[candidates], probe)]
+            if len(candidates) == 0:
+                return []
+            scores = self._vectors[candidates] @ query
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [(self._ids[candidates[i]], float(scores[i])) for i in best]
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Trains the IVF quantizer with spherical k-means.
+
+        Args:
+            nlist: Optional. Number of inverted lists; defaults to sqrt(size).
+            iterations: k-means iterations.
+            seed: Seed for picking the initial centroids.
+        """
+        with self._lock:
+            size = len(self._ids)
+            if size == 0:
+                return
+            nlist = min(nlist or max(1, int(np.sqrt(size))), size)
+            vectors = self._vectors[:size]
+            rng = np.random.default_rng(seed)
+            centroids = vectors[rng.choice(size, nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignments = np.argmax(vectors @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = vectors[assignments == c]
+                    if len(members):
+                        centroids[c] = members.sum(axis=0)
+                centroids = _normalize(centroids)
+            self._centroids = centroids
+            self._lists[:size] = self._assign(vectors)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _group_code(self, group: Optional[str]) -> int:
+        if group not in self._group_codes:
+            self._group_codes[group] = len(self._group_codes)
+        return self._group_codes[group]
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 64)
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        groups = np.zeros(capacity, dtype=np.int32)
+        lists = np.zeros(capacity, dtype=np.int32)
+        count = len(self._ids)
+        vectors[:count] = self._vectors[:count]
+        groups[:count] = self._groups[:count]
+        lists[:count] = self._lists[:count]
+        self._vectors, self._groups, self._lists = vectors, groups, lists
@@ -0,0 +1,107 @@
+"""
+Firestore aggregation helpers for counts and dashboard statistics.
+
+Counting scrolls used to mean downloading every matching document and
+taking len(). count() and sum() aggregation queries are evaluated on the
+server from the index instead: each returns a single result and is billed
+at one read per batch of up to 1000 index entries, with no document
+payloads. Grouped counts run one aggregation per group value in parallel,
+and AggregationCache keeps results for a short TTL so dashboards that
+rerun on every interaction do not repeat them.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from services.metrics import span, with_current_context
+
+DEFAULT_STATS_TTL_SECONDS = float(os.environ.get("STATS_TTL_SECONDS", "30"))
+
+
+def aggregate(query: Any, sums: Sequence[str] = ()) -> Dict[str, float]:
+    """
+    Runs count() plus optional sum() aggregations in a single RPC.
+
+    Args:
+        query: A Firestore query or collection reference.
+        sums: Numeric field paths to sum.
+
+    Returns:
+        A dictionary with "count" and one "sum:<field>" entry per field.
+    """
+    aggregation = query.count(alias="count")
+    for field_path in sums:
+        aggregation = aggregation.sum(field_path, alias=f"sum:{field_path}")
+    with span("firestore", op="aggregate"):
+        results = aggregation.get()
+    return {result.alias: result.value for result in results[0]}
+
+
+def count(query: Any) -> int:
+    """Returns the number of documents matching a query."""
+    return int(aggregate(query)["count"])
+
+
+def grouped_counts(
+    query: Any,
+    field_path: str,
+    values: Sequence[Any],
+    max_workers: int = 8,
+) -> Tuple[int, Dict[Any, int]]:
+    """
+    Counts documents in total and per value of one field, in parallel.
+
+    Args:
+        query: The base query, e.g. one user's scrolls.
+        field_path: The field to group by, e.g. "metadata.status".
+        values: The values to count.
+        max_workers: Maximum concurrent aggregation RPCs.
+
+    Returns:
+        A (total, {value: count}) tuple.
+    """
+    # Imported here so apps can use DEFAULT_STATS_TTL_SECONDS at import time
+    # without loading the Firestore SDK.
+    from google.cloud.firestore_v1.base_query import FieldFilter
+
+    queries = [query] + [query.where(filter=FieldFilter(field_path, "==", value)) for value in values]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(queries))) as executor:
+        counts = list(executor.map(with_current_context(count), queries))
+    return counts[0], dict(zip(values, counts[1:]))
+
+
+class AggregationCache:
+    """
+    Short-TTL cache for aggregation results.
+
+    Methods:
+        get_or_compute(key, compute):
+            Returns the cached value for key, or computes and caches it.
+        invalidate(key=None):
+            Drops one entry, or all of them.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_STATS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl_seconds:
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,300 @@
+"""
+Asynchronous Firestore client for Ava's Memory Cortex.
+
+Mirrors the single-document surface of FirestoreClient on top of
+firestore.AsyncClient, so independent reads (an agent, its scrolls and its
+reflections) can be awaited together with asyncio.gather instead of one
+after another. A semaphore caps the RPCs in flight per client, so one
+event loop can serve many agents without flooding the connection pool.
+"""
+
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from services.firestore_client import FirestoreClient
+from services.hydration import GET_ALL_CHUNK_SIZE
+from services.metrics import document_size, record_reads, record_writes, span
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("FIRESTORE_MAX_CONCURRENCY", "32"))
+
+
+class AsyncFirestoreClient:
+    """
+    Async counterpart of FirestoreClient built on firestore.AsyncClient.
+
+    Attributes:
+        project_id (str): The Google Cloud project ID.
+        db (firestore.AsyncClient): The async Firestore client instance.
+
+    Methods:
+        add(collection_name, data, doc_id=None, read_back=True):
+            Adds a new document to the specified collection.
+        get(collection_name, doc_id, fields=None):
+            Retrieves a document by ID.
+        get_many(collection_name, doc_ids, fields=None):
+            Retrieves many documents with batched get_all calls.
+        list(collection_name, filters=None, limit=100, fields=None):
+            Lists documents with optional filters, limit and projection.
+        add_scroll / get_scroll / add_agent / get_agent:
+            Collection-specific helpers, as on FirestoreClient.
+        close():
+            Coroutine; closes the gRPC channel. Called by `async with`.
+
+    Usage:
+        async with AsyncFirestoreClient() as client:
+            agent, scrolls = await asyncio.gather(
+                client.get_agent("ava-prime"),
+                client.list("scrolls", [("agent_id", "==", "ava-prime")]),
+            )
+    """
+
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        db: Any = None,
+    ):
+        """
+        Initializes the async Firestore client.
+
+        Args:
+            project_id: Optional. Defaults to the GOOGLE_CLOUD_PROJECT
+                environment variable.
+            max_concurrency: Maximum RPCs in flight at once.
+            db: Optional. An existing firestore.AsyncClient to wrap.
+
+        Raises:
+            ValueError: If no project ID is available.
+        """
+        self.project_id = project_id or os.environ.get("GOOGLE_CLOUD_PROJECT")
+        if db is None and not self.project_id:
+            raise ValueError(
+                "GOOGLE_CLOUD_PROJECT environment variable not set."
+            )
+        self.db = db or firestore.AsyncClient(project=self.project_id)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        logger.info(
+            "AsyncFirestoreClient initialized",
+            extra={"project_id": self.project_id, "max_concurrency": max_concurrency},
+        )
+
+    async def __aenter__(self) -> "AsyncFirestoreClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Closes the gRPC channel, if one was opened, and the client's HTTP
+        session.
+
+        AsyncClient.close() only closes the HTTP session, so the channel is
+        closed through the GAPIC transport; it must be awaited on the loop
+        that used it.
+        """
+        api = self.db._firestore_api_internal
+        if api is not None:
+            await api.transport.close()
+        self.db.close()
+
+    @asynccontextmanager
+    async def _rpc(self, op: str, collection_name: str) -> AsyncIterator[None]:
+        """Holds a concurrency slot and times one RPC."""
+        async with self._semaphore:
+            with span("firestore", op=op, collection=collection_name):
+                yield
+
+    # --- Generic CRUD Methods ---
+
+    async def add(
+        self,
+        collection_name: str,
+        data: Dict[str, Any],
+        doc_id: Optional[str] = None,
+        read_back: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Adds a new document to a specified collection.
+
+        Args:
+            collection_name: The name of the collection.
+            data: A dictionary containing the document data.
+            doc_id: Optional. The ID for the new document.
+            read_back: Optional. If False, skips reading the document back
+                and returns a client-side created_at timestamp.
+
+        Returns:
+            The full document data, including the ID and created_at
+            timestamp.
+        """
+        doc_id = doc_id or str(uuid.uuid4())
+        doc_ref = self.db.collection(collection_name).document(doc_id)
+        data['created_at'] = firestore.SERVER_TIMESTAMP
+        data['id'] = doc_id
+
+        async with self._rpc("set", collection_name):
+            await doc_ref.set(data)
+        record_writes(collection_name, 1, document_size(data))
+        logger.debug("Document added", extra={"collection": collection_name, "doc_id": doc_id})
+        if not read_back:
+            return {**data, "created_at": datetime.now(timezone.utc)}
+
+        async with self._rpc("get", collection_name):
+            created_doc = (await doc_ref.get()).to_dict()
+        record_reads(collection_name, 1, document_size(created_doc))
+        return created_doc or {}
+
+    async def get(
+        self,
+        collection_name: str,
+        doc_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a document from a collection by its ID.
+
+        Args:
+            collection_name: The name of the collection.
+            doc_id: The ID of the document to retrieve.
+            fields: Optional. Field paths to return.
+
+        Returns:
+            A dictionary representing the document, or None if not found.
+        """
+        doc_ref = self.db.collection(collection_name).document(doc_id)
+        async with self._rpc("get", collection_name):
+            doc = await doc_ref.get(field_paths=fields)
+        record_reads(collection_name, 1, document_size(doc.to_dict()) if doc.exists else 0)
+        if not doc.exists:
+            logger.info("Document not found", extra={"collection": collection_name, "doc_id": doc_id})
+            return None
+        return doc.to_dict()
+
+    async def get_many(
+        self,
+        collection_name: str,
+        doc_ids: Sequence[str],
+        fields: Optional[List[str]] = None,
+        chunk_size: int = GET_ALL_CHUNK_SIZE,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retrieves many documents by ID with batched get_all calls.
+
+        Chunks are fetched concurrently (within the client's concurrency
+        limit), so the call is safe to use inside asyncio.gather.
+
+        Args:
+            collection_name: The name of the collection.
+            doc_ids: The document IDs, duplicates allowed.
+            fields: Optional. Field paths to return.
+            chunk_size: Maximum references per get_all call.
+
+        Returns:
+            One entry per input ID, in input order: the document data, or
+            None if the document does not exist.
+        """
+        collection = self.db.collection(collection_name)
+        unique_ids = list(dict.fromkeys(doc_ids))
+
+        async def _fetch(chunk: List[str]) -> Dict[str, Dict[str, Any]]:
+            refs = [collection.document(doc_id) for doc_id in chunk]
+            async with self._rpc("get_all", collection_name):
+                found = {
+                    doc.id: doc.to_dict() or {}
+                    async for doc in self.db.get_all(refs, field_paths=fields)
+                    if doc.exists
+                }
+            record_reads(collection_name, len(refs), document_size(list(found.values())))
+            return found
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for chunk_docs in await asyncio.gather(*(
+            _fetch(unique_ids[i:i + chunk_size]) for i in range(0, len(unique_ids), chunk_size)
+        )):
+            found.update(chunk_docs)
+        return [found.get(doc_id) for doc_id in doc_ids]
+
+    async def list(
+        self,
+        collection_name: str,
+        filters: Optional[List[tuple]] = None,
+        limit: int = 100,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lists documents in a collection, with optional filtering.
+
+        Args:
+            collection_name: The name of the collection.
+            filters: A list of tuples for filtering, e.g.,
+                [("status", "==", "active")].
+            limit: The maximum number of documents to return.
+            fields: Optional. Field paths to return.
+
+        Returns:
+            A list of dictionaries, where each dictionary is a document.
+        """
+        query = self.db.collection(collection_name)
+        for f in filters or []:
+            try:
+                field, op, value = f
+                query = query.where(filter=FieldFilter(field, op, value))
+            except ValueError as e:
+                logger.warning("Invalid list filters: %s", e, extra={"collection": collection_name})
+                return []
+        if fields is not None:
+            query = query.select(fields)
+
+        async with self._rpc("query", collection_name):
+            results = [doc.to_dict() async for doc in query.limit(limit).stream()]
+        record_reads(collection_name, len(results), document_size(results))
+        return results
+
+    # --- Collection-Specific Methods ---
+
+    async def add_scroll(
+        self,
+        prompt: str,
+        response: str,
+        read_back: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Adds a new 'scroll' document; see FirestoreClient.add_scroll."""
+        scroll_data = FirestoreClient._scroll_data(prompt, response, **kwargs)
+        return await self.add("scrolls", scroll_data, read_back=read_back)
+
+    async def get_scroll(
+        self,
+        scroll_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Retrieves a scroll by its ID."""
+        return await self.get("scrolls", scroll_id, fields=fields)
+
+    async def add_agent(
+        self,
+        name: str,
+        role: str,
+        description: str,
+        read_back: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Adds a new 'agent' document with a slugified ID; see FirestoreClient.add_agent."""
+        agent_data = FirestoreClient._agent_data(name, role, description, **kwargs)
+        agent_id = agent_data.pop("id")
+        return await self.add("agents", agent_data, doc_id=agent_id, read_back=read_back)
+
+    async def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieves an agent by its ID (slug)."""
+        return await self.get("agents", agent_id)
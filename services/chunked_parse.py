@@ -0,0 +1,287 @@
+"""
+Map-reduce parsing for long scroll texts.
+
+Scroll texts may be up to 50,000 characters, and sending one in a single
+prompt is slow enough to hit the parser's read timeout. ChunkedParser
+splits a long text on semantic boundaries: paragraphs, with fenced code
+blocks kept whole. It parses the chunks concurrently and merges the results
+in a reduce step that needs no extra LLM call. Summaries are joined and
+list fields are de-duplicated, so a long paste takes roughly as long as its
+slowest chunk. Texts that fit in one chunk are parsed with a single call,
+as before. If some chunks fail, the merge of the others is raised in an
+IncompleteParseError, so callers can show it without caching it.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from services.metrics import get_metrics, span, with_current_context
+from services.parser_transport import ParserError
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_CHARS = int(os.environ.get("PARSER_CHUNK_CHARS", "6000"))
+DEFAULT_CHUNK_WORKERS = int(os.environ.get("PARSER_CHUNK_WORKERS", "8"))
+
+# List fields are ranked by how many chunks mention an item, so the topics
+# and tools of the whole text come first. Actions and enhancements keep the
+# order in which the text raises them.
+RANKED_FIELDS = ("topics", "tools")
+ORDERED_FIELDS = ("actions", "enhancements")
+
+_FENCE_MARKERS = ("```", "~~~")
+# Zero-width, so splitting keeps the whitespace between sentences.
+_SENTENCE_END = re.compile(r"(?<=[.!?])(?=\s)")
+_NORMALIZE = re.compile(r"\s+")
+
+
+class IncompleteParseError(ParserError):
+    """
+    Raised when some, but not all, chunks of a text failed to parse.
+
+    Attributes:
+        partial (dict): The merged result of the chunks that succeeded.
+        failed (int): The number of chunks that failed.
+    """
+
+    def __init__(self, partial: Dict[str, Any], failed: int, total: int):
+        super().__init__(f"Parsed {total - failed} of {total} chunks; the result is incomplete.")
+        self.partial = partial
+        self.failed = failed
+
+
+def _blocks(text: str) -> List[str]:
+    """Splits text into paragraphs and fenced code blocks, keeping every character."""
+    blocks: List[str] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    for line in text.splitlines(keepends=True):
+        stripped = line.lstrip()
+        if fence is not None:
+            current.append(line)
+            if stripped.startswith(fence):
+                blocks.append("".join(current))
+                current, fence = [], None
+        elif stripped.startswith(_FENCE_MARKERS):
+            if current:
+                blocks.append("".join(current))
+            current, fence = [line], stripped[:3]
+        elif not line.strip():
+            # Blank lines end a paragraph and stay attached to it.
+            if current:
+                current.append(line)
+                blocks.append("".join(current))
+                current = []
+            elif blocks:
+                blocks[-1] += line
+            else:
+                current.append(line)
+        else:
+            current.append(line)
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+
+def _pack(pieces: Sequence[str], max_chars: int) -> List[str]:
+    """Greedily joins consecutive pieces into chunks of at most max_chars."""
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_oversized(block: str, max_chars: int) -> List[str]:
+    """Splits one block that exceeds max_chars by lines, then sentences, then hard cuts."""
+    pieces: List[str] = []
+    for line in block.splitlines(keepends=True):
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+    return _pack(pieces, max_chars)
+
+
+def split_text(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """
+    Splits text into chunks of at most max_chars on semantic boundaries.
+
+    Chunks are built from whole paragraphs and whole fenced code blocks.
+    Only a block longer than max_chars is split inside, first at line
+    breaks, then at sentence ends, and as a last resort at max_chars.
+
+    Args:
+        text: The raw scroll text.
+        max_chars: The chunk size limit.
+
+    Returns:
+        The chunks, in order.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    pieces: List[str] = []
+    for block in _blocks(text):
+        pieces.extend([block] if len(block) <= max_chars else _split_oversized(block, max_chars))
+    return _pack(pieces, max_chars)
+
+
+def _key(value: Any) -> str:
+    return _NORMALIZE.sub(" ", str(value)).strip().rstrip(".").casefold()
+
+
+def _merge_list(lists: Sequence[Any], ranked: bool) -> List[Any]:
+    counts: Dict[str, int] = {}
+    first: Dict[str, Any] = {}
+    for items in lists:
+        if not isinstance(items, list):
+            continue
+        # Count each item once per chunk.
+        for key in {_key(item) for item in items if _key(item)}:
+            counts[key] = counts.get(key, 0) + 1
+        for item in items:
+            key = _key(item)
+            if key and key not in first:
+                first[key] = item.strip() if isinstance(item, str) else item
+    order = list(first)
+    if ranked:
+        order.sort(key=lambda key: -counts[key])  # stable: ties keep first-seen order
+    return [first[key] for key in order]
+
+
+def merge_parsed(results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduces per-chunk parse results into one, in chunk order.
+
+    Distinct summaries are joined. Topics and tools are de-duplicated and
+    ranked by the number of chunks that mention them. Actions and
+    enhancements are de-duplicated in order of appearance. Duplicates are
+    detected case- and whitespace-insensitively. Any other field takes its
+    first non-empty value.
+
+    Args:
+        results: The parsed result of each chunk, in chunk order.
+
+    Returns:
+        The merged result.
+    """
+    merged: Dict[str, Any] = {}
+    summaries = _merge_list([[r["summary"]] for r in results if isinstance(r.get("summary"), str)], ranked=False)
+    if summaries:
+        merged["summary"] = " ".join(s if s.endswith((".", "!", "?")) else f"{s}." for s in summaries)
+    for field in RANKED_FIELDS + ORDERED_FIELDS:
+        if any(field in r for r in results):
+            merged[field] = _merge_list([r.get(field) for r in results], ranked=field in RANKED_FIELDS)
+    for result in results:
+        for field, value in result.items():
+            if field not in merged and value not in (None, "", [], {}):
+                merged[field] = value
+    return merged
+
+
+class ChunkedParser:
+    """
+    Parses long texts chunk by chunk, concurrently, and merges the results.
+
+    Methods:
+        parse(text):
+            Returns the merged result for text.
+        parse_progressively(text):
+            Yields the merged result so far each time a chunk finishes.
+    """
+
+    def __init__(
+        self,
+        parse_fn: Callable[[str], Dict[str, Any]],
+        max_chars: int = DEFAULT_CHUNK_CHARS,
+        max_workers: int = DEFAULT_CHUNK_WORKERS,
+    ):
+        """
+        Initializes the parser.
+
+        Args:
+            parse_fn: Parses one chunk, e.g. ParserTransport.parse. Must be
+                safe to call from several threads.
+            max_chars: The chunk size limit; shorter texts are parsed whole.
+            max_workers: Maximum chunks parsed at once.
+        """
+        self.parse_fn = parse_fn
+        self.max_chars = max_chars
+        self.max_workers = max_workers
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """
+        Parses text, splitting it first if it is longer than max_chars.
+
+        Returns:
+            The parsed (and, for long texts, merged) result.
+
+        Raises:
+            IncompleteParseError: If some chunks failed; carries the merge
+                of the others.
+            ParserError: If every chunk failed.
+        """
+        merged: Dict[str, Any] = {}
+        for merged in self.parse_progressively(text):
+            pass
+        return merged
+
+    def parse_progressively(self, text: str) -> Iterator[Dict[str, Any]]:
+        """
+        Parses the chunks of text concurrently, yielding as they finish.
+
+        Chunks that fail are skipped and counted in
+        llm_chunk_failures_total. The merge always follows chunk order,
+        whatever order the chunks finish in.
+
+        Yields:
+            The merged result of the chunks finished so far.
+
+        Raises:
+            IncompleteParseError: After the last chunk, if any chunk failed.
+                Its partial attribute is the last merged result, which must
+                not be cached as the result for text.
+            ParserError: If every chunk failed.
+        """
+        chunks = split_text(text, self.max_chars)
+        if len(chunks) == 1:
+            yield self.parse_fn(text)
+            return
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(chunks)
+        errors: List[Exception] = []
+        with span("llm", op="parse_chunked") as details:
+            details["chunks"] = len(chunks)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                parse = with_current_context(self.parse_fn)
+                futures = {executor.submit(parse, chunk): i for i, chunk in enumerate(chunks)}
+                for future in as_completed(futures):
+                    try:
+                        parsed = future.result()
+                    except ParserError as e:
+                        errors.append(e)
+                        parsed = None
+                    if not parsed:
+                        get_metrics().inc("llm_chunk_failures_total")
+                        continue
+                    results[futures[future]] = parsed
+                    yield merge_parsed([r for r in results if r is not None])
+
+        failed = sum(r is None for r in results)
+        if not failed:
+            return
+        logger.warning("Chunked parse incomplete", extra={"chunks": len(chunks), "failed": failed})
+        if failed == len(chunks):
+            if errors:
+                raise errors[0]
+            raise ParserError(f"Parser returned no result for any of {len(chunks)} chunks.")
+        raise IncompleteParseError(merge_parsed([r for r in results if r is not None]), failed, len(chunks))
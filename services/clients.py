@@ -0,0 +1,210 @@
+"""
+Process-wide registry of service clients for Codessa DevOS.
+
+Streamlit re-executes the app script on every interaction, so clients created
+at module level (Firestore, Secret Manager, Algolia, Firebase Auth) would be
+rebuilt on every rerun, paying for gRPC channel setup and TLS handshakes each
+time. The registry keeps exactly one instance of each client per process,
+shares it across sessions and reruns, and rebuilds it only when the
+credentials it was built from change.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class InitTiming:
+    """
+    Bootstrap cost of a registered client.
+
+    Attributes:
+        name (str): The registry name of the client.
+        seconds (float): Wall-clock time the most recent factory call took.
+        total_seconds (float): Accumulated factory time for this process.
+        initializations (int): How many times the client has been built.
+        initialized_at (float): Unix time of the most recent build.
+    """
+
+    name: str
+    seconds: float
+    total_seconds: float
+    initializations: int
+    initialized_at: float
+
+
+@dataclass
+class _Entry:
+    client: Any
+    fingerprint: Optional[str]
+    close: Optional[Callable[[Any], None]]
+
+
+def credentials_fingerprint(path: Optional[str]) -> str:
+    """
+    Fingerprints a credentials file so that a rotated key is detected.
+
+    Uses the path, size and modification time rather than the file contents,
+    so checking it on every rerun costs a single stat() call.
+
+    Args:
+        path: Filepath to a service account JSON key.
+
+    Returns:
+        A short opaque string that changes when the file is replaced.
+    """
+    if not path:
+        return "default"
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{path}:missing"
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def secret_fingerprint(*values: Optional[str]) -> str:
+    """
+    Fingerprints secret values without keeping them in plain text.
+
+    Args:
+        *values: The secret values a client was built from.
+
+    Returns:
+        A SHA-256 hex digest of the values.
+    """
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update((value or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ClientRegistry:
+    """
+    Thread-safe registry holding one instance of each service client.
+
+    Clients are created lazily by the factory passed to `get` and reused by
+    every later call with the same name. If the fingerprint passed with a
+    call differs from the one the client was built with (for example after
+    a service account key is rotated), the old client is closed and a new
+    one is built. Each name has its own lock, so a slow bootstrap of one
+    client never blocks lookups of another.
+
+    Methods:
+        get(name, factory, fingerprint=None, close=None):
+            Returns the cached client, building it on first use.
+        invalidate(name=None):
+            Drops one client (or all of them) so the next get rebuilds it.
+        init_timings():
+            Returns the bootstrap cost recorded for each client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._name_locks: Dict[str, threading.Lock] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._timings: Dict[str, InitTiming] = {}
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            lock = self._name_locks.get(name)
+            if lock is None:
+                lock = self._name_locks[name] = threading.Lock()
+            return lock
+
+    def get(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        fingerprint: Optional[str] = None,
+        close: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Returns the client registered under `name`, building it if needed.
+
+        Args:
+            name: The registry name of the client (e.g., "firestore").
+            factory: Zero-argument callable that builds the client.
+            fingerprint: Optional. Identifies the credentials the client is
+                built from; a different value forces a rebuild.
+            close: Optional. Called with the old client before it is
+                replaced.
+
+        Returns:
+            The shared client instance.
+        """
+        entry = self._entries.get(name)
+        if entry is not None and entry.fingerprint == fingerprint:
+            return entry.client
+
+        with self._name_lock(name):
+            entry = self._entries.get(name)
+            if entry is not None and entry.fingerprint == fingerprint:
+                return entry.client
+            if entry is not None:
+                self._close(name, entry)
+
+            started = time.perf_counter()
+            client = factory()
+            elapsed = time.perf_counter() - started
+
+            self._entries[name] = _Entry(client, fingerprint, close)
+            previous = self._timings.get(name)
+            self._timings[name] = InitTiming(
+                name=name,
+                seconds=elapsed,
+                total_seconds=elapsed + (previous.total_seconds if previous else 0.0),
+                initializations=1 + (previous.initializations if previous else 0),
+                initialized_at=time.time(),
+            )
+            return client
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drops a client so that the next `get` rebuilds it.
+
+        Args:
+            name: Optional. The client to drop. Drops every client if omitted.
+        """
+        names: List[str] = [name] if name else list(self._entries)
+        for key in names:
+            with self._name_lock(key):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._close(key, entry)
+
+    def init_timings(self) -> Dict[str, InitTiming]:
+        """
+        Returns the bootstrap cost recorded for each client.
+
+        Returns:
+            A dictionary mapping client names to their InitTiming.
+        """
+        return dict(self._timings)
+
+    @staticmethod
+    def _close(name: str, entry: _Entry) -> None:
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception:
+            # The client is dropped either way; a failed close must not
+            # block its replacement.
+            logger.warning("Failed to close a dropped client", extra={"client": name}, exc_info=True)
+
+
+_registry = ClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    """Returns the process-wide ClientRegistry."""
+    return _registry
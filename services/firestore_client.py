@@ -6,11 +6,51 @@ Provides CRUD operations for Firestore collections such as 'scrolls' and
 """
 
 import os
+import threading
 import uuid
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
 from google.cloud import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.bulk_writer import (
+    BulkRetry,
+    BulkWriteFailure,
+    BulkWriter,
+    BulkWriterOptions,
+)
+
+from services.hydration import GET_ALL_CHUNK_SIZE, fetch_documents
+from services.metrics import document_size, record_reads, record_writes, span
+from services.pagination import DEFAULT_PAGE_SIZE, iter_pages, ordered_query
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# gRPC status codes worth retrying in bulk writes: DEADLINE_EXCEEDED,
+# RESOURCE_EXHAUSTED, ABORTED, INTERNAL and UNAVAILABLE.
+RETRYABLE_WRITE_CODES = frozenset({4, 8, 10, 13, 14})
+DEFAULT_BULK_MAX_ATTEMPTS = 5
+
+
+@dataclass
+class BulkWriteResult:
+    """
+    Outcome of a bulk write.
+
+    Attributes:
+        succeeded (list): IDs of documents written successfully.
+        failed (dict): Maps the IDs of documents that could not be written
+            to the last error message.
+        documents (list): For add_many, the documents written successfully
+            (with a client-side created_at timestamp); failed ones are
+            left out.
+    """
+
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    documents: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class FirestoreClient:
@@ -31,20 +71,43 @@ class FirestoreClient:
         db (firestore.Client): The Firestore client instance.
 
     Methods:
-        add(collection_name, data, doc_id=None):
+        add(collection_name, data, doc_id=None, read_back=True):
             Adds a new document to the specified collection.
-        get(collection_name, doc_id):
+        add_many(collection_name, documents, ...):
+            Adds many documents through a BulkWriter.
+        update_many(collection_name, updates, ...):
+            Updates many documents through a BulkWriter.
+        delete_many(collection_name, doc_ids, ...):
+            Deletes many documents through a BulkWriter.
+        get(collection_name, doc_id, fields=None):
             Retrieves a document by ID from the specified collection.
-        list(collection_name, filters=None, limit=100):
-            Lists documents in a collection with optional filters and limit.
+        get_many(collection_name, doc_ids, fields=None):
+            Retrieves many documents by ID with batched get_all calls.
+        list(collection_name, filters=None, limit=100, fields=None):
+            Lists documents in a collection with optional filters, limit
+            and field projection.
+        iter_pages(collection_name, filters=None, order_by=None, ...):
+            Lazily yields pages of documents with resumable page tokens.
+        list_page(collection_name, filters=None, order_by=None, ...):
+            Returns one page of documents and the token for the next page.
+        iterate(collection_name, filters=None, order_by=None, ...):
+            Lazily yields every matching document, one page at a time.
         add_scroll(prompt, response, **kwargs):
             Adds a new "scroll" document with prompt, response, and optional metadata.
         get_scroll(scroll_id):
             Retrieves a "scroll" document by its ID.
+        get_scrolls(scroll_ids):
+            Retrieves many "scroll" documents by ID.
+        add_scrolls(scrolls, **kwargs):
+            Adds many "scroll" documents through a BulkWriter.
         add_agent(name, role, description, **kwargs):
             Adds a new "agent" document with a slugified ID.
+        add_agents(agents, **kwargs):
+            Adds many "agent" documents through a BulkWriter.
         get_agent(agent_id):
             Retrieves an "agent" document by its ID.
+        get_agents(agent_ids):
+            Retrieves many "agent" documents by ID.
 
     Usage:
         Instantiate FirestoreClient after authenticating with Google Cloud and setting
@@ -65,9 +128,7 @@ class FirestoreClient:
 
         # Initialize the Firestore DB client
         self.db = firestore.Client(project=self.project_id)
-        print(
-            f"✅ FirestoreClient initialized for project: {self.project_id}"
-        )
+        logger.info("FirestoreClient initialized", extra={"project_id": self.project_id})
 
     # --- Generic CRUD Methods ---
 
@@ -75,7 +136,8 @@ class FirestoreClient:
         self,
         collection_name: str,
         data: Dict[str, Any],
-        doc_id: Optional[str] = None
+        doc_id: Optional[str] = None,
+        read_back: bool = True
     ) -> Dict[str, Any]:
         """
         Adds a new document to a specified collection.
@@ -85,6 +147,10 @@ class FirestoreClient:
             data: A dictionary containing the data for the new document.
             doc_id: Optional. The ID for the document. If not provided, a UUID
                 is generated.
+            read_back: Optional. If True (default), reads the document back
+                to return the server-resolved created_at timestamp. If False,
+                skips that second round trip and returns a client-side
+                timestamp instead.
 
         Returns:
             The full document data, including the ID and created_at
@@ -98,20 +164,31 @@ class FirestoreClient:
         data['created_at'] = firestore.SERVER_TIMESTAMP
         data['id'] = doc_id
 
-        doc_ref.set(data)
+        with span("firestore", op="set", collection=collection_name):
+            doc_ref.set(data)
+        record_writes(collection_name, 1, document_size(data))
+
+        if not read_back:
+            logger.debug(
+                "Document added", extra={"collection": collection_name, "doc_id": doc_id}
+            )
+            return {**data, "created_at": datetime.now(timezone.utc)}
 
         # To return the full data with the resolved timestamp, we get it back
         # Note: This adds a slight delay but ensures consistency.
-        created_doc = doc_ref.get().to_dict()
-        print(
-            f"📄 Added document '{doc_id}' to collection '{collection_name}'."
+        with span("firestore", op="get", collection=collection_name):
+            created_doc = doc_ref.get().to_dict()
+        record_reads(collection_name, 1, document_size(created_doc))
+        logger.debug(
+            "Document added", extra={"collection": collection_name, "doc_id": doc_id}
         )
         return created_doc or {}
 
     def get(
         self,
         collection_name: str,
-        doc_id: str
+        doc_id: str,
+        fields: Optional[List[str]] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Retrieves a document from a collection by its ID.
@@ -119,28 +196,67 @@ class FirestoreClient:
         Args:
             collection_name: The name of the collection.
             doc_id: The ID of the document to retrieve.
+            fields: Optional. Field paths to return (e.g.,
+                ["summary", "created_at"]); all fields if omitted.
 
         Returns:
             A dictionary representing the document, or None if not found.
         """
         doc_ref = self.db.collection(collection_name).document(doc_id)
-        doc = doc_ref.get()
+        with span("firestore", op="get", collection=collection_name):
+            doc = doc_ref.get(field_paths=fields)
+        # A missing document still bills one read.
+        record_reads(collection_name, 1, document_size(doc.to_dict()) if doc.exists else 0)
         if doc.exists:
-            print(
-                f"📄 Retrieved document '{doc_id}' from "
-                f"collection '{collection_name}'."
+            logger.debug(
+                "Document retrieved", extra={"collection": collection_name, "doc_id": doc_id}
             )
             return doc.to_dict()
-        print(
-            f"⚠️ Document '{doc_id}' not found in collection '{collection_name}'."
+        logger.info(
+            "Document not found", extra={"collection": collection_name, "doc_id": doc_id}
         )
         return None
 
+    def get_many(
+        self,
+        collection_name: str,
+        doc_ids: Iterable[str],
+        fields: Optional[List[str]] = None,
+        chunk_size: int = GET_ALL_CHUNK_SIZE
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retrieves many documents by ID with batched get_all calls.
+
+        IDs are de-duplicated and split into chunks of `chunk_size`, which
+        are fetched in parallel, so N documents cost ceil(N / chunk_size)
+        RPCs instead of N.
+
+        Args:
+            collection_name: The name of the collection.
+            doc_ids: The document IDs, duplicates allowed.
+            fields: Optional. Field paths to return.
+            chunk_size: Maximum references per get_all call.
+
+        Returns:
+            One entry per input ID, in input order: the document data, or
+            None if the document does not exist.
+        """
+        doc_ids = list(doc_ids)
+        docs = fetch_documents(
+            self.db, list(dict.fromkeys(doc_ids)), collection_name, fields, chunk_size
+        )
+        logger.debug(
+            "Documents retrieved",
+            extra={"collection": collection_name, "requested": len(doc_ids), "count": len(docs)},
+        )
+        return [docs.get(doc_id) for doc_id in doc_ids]
+
     def list(
         self,
         collection_name: str,
         filters: Optional[List[tuple]] = None,
-        limit: int = 100
+        limit: int = 100,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Lists documents in a collection, with optional filtering.
@@ -150,36 +266,384 @@ class FirestoreClient:
             filters: A list of tuples for filtering, e.g.,
                 [("status", "==", "active")].
             limit: The maximum number of documents to return.
+            fields: Optional. Field paths to return, so list views can skip
+                large fields such as the full response text.
 
         Returns:
             A list of dictionaries, where each dictionary is a document.
         """
-        # Current implementation doesn't support pagination
+        # Use iter_pages()/iterate() to walk past `limit` documents.
+        try:
+            query = self._filtered_query(collection_name, filters)
+        except ValueError as e:
+            logger.warning("Invalid list filters: %s", e, extra={"collection": collection_name})
+            return []
+        if fields is not None:
+            query = query.select(fields)
+
+        with span("firestore", op="query", collection=collection_name):
+            results = [doc.to_dict() for doc in query.limit(limit).stream()]
+        record_reads(collection_name, len(results), document_size(results))
+        logger.debug(
+            "Documents listed", extra={"collection": collection_name, "count": len(results)}
+        )
+        return results
+
+    def _filtered_query(
+        self,
+        collection_name: str,
+        filters: Optional[List[tuple]] = None
+    ) -> Any:
+        """
+        Builds a query on a collection with (field, op, value) filters.
+
+        Raises:
+            ValueError: If a filter is malformed.
+        """
         query = self.db.collection(collection_name)
+        for f in filters or []:
+            try:
+                field, op, value = f
+                query = query.where(filter=FieldFilter(field, op, value))
+            except ValueError as e:
+                raise ValueError(f"Invalid filter provided: {f}. Error: {e}") from e
+        return query
+
+    def iter_pages(
+        self,
+        collection_name: str,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        direction: str = firestore.Query.ASCENDING,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Lazily yields pages of documents using start_after cursors.
+
+        Only one page is held in memory at a time. Persisting the token
+        yielded with a page allows a walk to be checkpointed and resumed
+        later from the following page.
+
+        Args:
+            collection_name: The name of the collection.
+            filters: A list of tuples for filtering, e.g.,
+                [("status", "==", "active")].
+            order_by: Optional. Field to order by; documents are always
+                ordered by ID as a tie-breaker.
+            direction: firestore.Query.ASCENDING or DESCENDING.
+            page_size: The number of documents fetched per page.
+            page_token: Optional. A token yielded earlier, to resume after.
+            fields: Optional. Field paths to return; the order-by field is
+                always included because the cursor needs it.
+
+        Yields:
+            (documents, next_page_token) tuples. next_page_token is None
+            when there are no more pages.
+
+        Raises:
+            ValueError: If a filter or the page token is malformed.
+        """
+        order_fields = [order_by] if order_by else []
+        query = self._filtered_query(collection_name, filters)
+        if fields is not None:
+            query = query.select(list(dict.fromkeys([*fields, *order_fields])))
+        query = ordered_query(query, order_fields, direction)
+        for snapshots, next_token in iter_pages(
+            query, order_fields, page_size, page_token, collection=collection_name
+        ):
+            yield [doc.to_dict() for doc in snapshots], next_token
+
+    def list_page(
+        self,
+        collection_name: str,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        direction: str = firestore.Query.ASCENDING,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Returns one page of documents and the token for the next page.
 
-        if filters:
-            for f in filters:
-                try:
-                    field, op, value = f
-                    query = query.where(filter=FieldFilter(field, op, value))
-                except ValueError as e:
-                    print(f"⚠️ Invalid filter provided: {f}. Error: {e}")
-                    return []
-
-        docs = query.limit(limit).stream()
-        results = [doc.to_dict() for doc in docs]
-        print(
-            f"📄 Listed {len(results)} documents from collection "
-            f"'{collection_name}'."
+        Args:
+            collection_name: The name of the collection.
+            filters: A list of tuples for filtering.
+            order_by: Optional. Field to order by.
+            direction: firestore.Query.ASCENDING or DESCENDING.
+            page_size: The maximum number of documents to return.
+            page_token: Optional. The token returned with the previous page.
+            fields: Optional. Field paths to return.
+
+        Returns:
+            A (documents, next_page_token) tuple. next_page_token is None
+            when there are no more pages.
+        """
+        return next(
+            self.iter_pages(
+                collection_name, filters, order_by, direction,
+                page_size, page_token, fields,
+            )
         )
-        return results
+
+    def iterate(
+        self,
+        collection_name: str,
+        filters: Optional[List[tuple]] = None,
+        order_by: Optional[str] = None,
+        direction: str = firestore.Query.ASCENDING,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        page_token: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields every matching document, fetching one page at a time.
+
+        Args:
+            collection_name: The name of the collection.
+            filters: A list of tuples for filtering.
+            order_by: Optional. Field to order by.
+            direction: firestore.Query.ASCENDING or DESCENDING.
+            page_size: The number of documents fetched per page.
+            page_token: Optional. A token from iter_pages/list_page to
+                resume from.
+            fields: Optional. Field paths to return.
+
+        Yields:
+            Each document as a dictionary.
+        """
+        for documents, _ in self.iter_pages(
+            collection_name, filters, order_by, direction,
+            page_size, page_token, fields,
+        ):
+            yield from documents
+
+    # --- Bulk Write Methods ---
+
+    def _bulk_writer(
+        self,
+        result: BulkWriteResult,
+        on_error: Optional[Callable[[str, str, int], None]],
+        max_attempts: int,
+        initial_ops_per_second: int,
+        max_ops_per_second: int,
+    ) -> BulkWriter:
+        """
+        Creates a BulkWriter that records outcomes into `result`.
+
+        Callbacks run on the BulkWriter's worker threads, so updates to
+        `result` are serialized with a lock. A failed write is retried while
+        its error code is transient and it has attempts left.
+        """
+        lock = threading.Lock()
+        writer = self.db.bulk_writer(
+            options=BulkWriterOptions(
+                initial_ops_per_second=initial_ops_per_second,
+                max_ops_per_second=max_ops_per_second,
+                retry=BulkRetry.exponential,
+            )
+        )
+
+        def _on_result(reference, _write_result, _writer) -> None:
+            with lock:
+                result.succeeded.append(reference.id)
+                result.failed.pop(reference.id, None)
+
+        def _on_error(failure: BulkWriteFailure, _writer) -> bool:
+            doc_id = failure.operation.reference.id
+            if on_error is not None:
+                on_error(doc_id, failure.message, failure.attempts + 1)
+            retry = (
+                failure.code in RETRYABLE_WRITE_CODES
+                and failure.attempts + 1 < max_attempts
+            )
+            if not retry:
+                with lock:
+                    result.failed[doc_id] = failure.message
+            return retry
+
+        writer.on_write_result(_on_result)
+        writer.on_write_error(_on_error)
+        return writer
+
+    def add_many(
+        self,
+        collection_name: str,
+        documents: Iterable[Dict[str, Any]],
+        on_error: Optional[Callable[[str, str, int], None]] = None,
+        max_attempts: int = DEFAULT_BULK_MAX_ATTEMPTS,
+        initial_ops_per_second: int = 500,
+        max_ops_per_second: int = 10000,
+    ) -> BulkWriteResult:
+        """
+        Adds many documents to a collection through a BulkWriter.
+
+        Writes are batched and sent in parallel, with the send rate ramping
+        up from `initial_ops_per_second` towards `max_ops_per_second`.
+        Documents are not read back; the returned documents carry a
+        client-side created_at timestamp while the stored ones get the
+        server timestamp.
+
+        Args:
+            collection_name: The name of the collection.
+            documents: Dictionaries with the data for each new document. An
+                "id" key is used as the document ID; otherwise a UUID is
+                generated.
+            on_error: Optional. Called as on_error(doc_id, message, attempt)
+                for every failed write attempt.
+            max_attempts: Maximum attempts per document for transient errors.
+            initial_ops_per_second: Starting write rate.
+            max_ops_per_second: Upper bound for the ramped-up write rate.
+
+        Returns:
+            A BulkWriteResult listing succeeded and failed document IDs,
+            and the documents that were written.
+        """
+        result = BulkWriteResult()
+        writer = self._bulk_writer(
+            result, on_error, max_attempts,
+            initial_ops_per_second, max_ops_per_second,
+        )
+        collection = self.db.collection(collection_name)
+        written_at = datetime.now(timezone.utc)
+
+        for data in documents:
+            doc_id = data.get("id") or str(uuid.uuid4())
+            data = {**data, "id": doc_id, "created_at": firestore.SERVER_TIMESTAMP}
+            writer.create(collection.document(doc_id), data)
+            result.documents.append({**data, "created_at": written_at})
+
+        with span("firestore", op="bulk_create", collection=collection_name):
+            writer.close()
+        result.documents = [doc for doc in result.documents if doc["id"] not in result.failed]
+        record_writes(collection_name, len(result.succeeded))
+        logger.info(
+            "Bulk added",
+            extra={
+                "collection": collection_name,
+                "succeeded": len(result.succeeded),
+                "failed": len(result.failed),
+            },
+        )
+        return result
+
+    def update_many(
+        self,
+        collection_name: str,
+        updates: Dict[str, Dict[str, Any]],
+        on_error: Optional[Callable[[str, str, int], None]] = None,
+        max_attempts: int = DEFAULT_BULK_MAX_ATTEMPTS,
+        initial_ops_per_second: int = 500,
+        max_ops_per_second: int = 10000,
+    ) -> BulkWriteResult:
+        """
+        Updates many documents in a collection through a BulkWriter.
+
+        Args:
+            collection_name: The name of the collection.
+            updates: Maps document IDs to the field updates to apply, e.g.,
+                {"abc": {"status": "archived"}}.
+            on_error: Optional. Called as on_error(doc_id, message, attempt)
+                for every failed write attempt.
+            max_attempts: Maximum attempts per document for transient errors.
+            initial_ops_per_second: Starting write rate.
+            max_ops_per_second: Upper bound for the ramped-up write rate.
+
+        Returns:
+            A BulkWriteResult listing succeeded and failed document IDs.
+        """
+        result = BulkWriteResult()
+        writer = self._bulk_writer(
+            result, on_error, max_attempts,
+            initial_ops_per_second, max_ops_per_second,
+        )
+        collection = self.db.collection(collection_name)
+        for doc_id, field_updates in updates.items():
+            writer.update(collection.document(doc_id), field_updates)
+
+        with span("firestore", op="bulk_update", collection=collection_name):
+            writer.close()
+        record_writes(collection_name, len(result.succeeded))
+        logger.info(
+            "Bulk updated",
+            extra={
+                "collection": collection_name,
+                "succeeded": len(result.succeeded),
+                "failed": len(result.failed),
+            },
+        )
+        return result
+
+    def delete_many(
+        self,
+        collection_name: str,
+        doc_ids: Iterable[str],
+        on_error: Optional[Callable[[str, str, int], None]] = None,
+        max_attempts: int = DEFAULT_BULK_MAX_ATTEMPTS,
+        initial_ops_per_second: int = 500,
+        max_ops_per_second: int = 10000,
+    ) -> BulkWriteResult:
+        """
+        Deletes many documents from a collection through a BulkWriter.
+
+        Args:
+            collection_name: The name of the collection.
+            doc_ids: The IDs of the documents to delete.
+            on_error: Optional. Called as on_error(doc_id, message, attempt)
+                for every failed write attempt.
+            max_attempts: Maximum attempts per document for transient errors.
+            initial_ops_per_second: Starting write rate.
+            max_ops_per_second: Upper bound for the ramped-up write rate.
+
+        Returns:
+            A BulkWriteResult listing succeeded and failed document IDs.
+        """
+        result = BulkWriteResult()
+        writer = self._bulk_writer(
+            result, on_error, max_attempts,
+            initial_ops_per_second, max_ops_per_second,
+        )
+        collection = self.db.collection(collection_name)
+        for doc_id in doc_ids:
+            writer.delete(collection.document(doc_id))
+
+        with span("firestore", op="bulk_delete", collection=collection_name):
+            writer.close()
+        record_writes(collection_name, len(result.succeeded))
+        logger.info(
+            "Bulk deleted",
+            extra={
+                "collection": collection_name,
+                "succeeded": len(result.succeeded),
+                "failed": len(result.failed),
+            },
+        )
+        return result
 
     # --- Collection-Specific Methods for SCROLLS ---
 
+    @staticmethod
+    def _scroll_data(prompt: str, response: str, **kwargs) -> Dict[str, Any]:
+        """Builds a 'scroll' document from a prompt, response and extras."""
+        return {
+            "prompt": prompt,
+            "response": response,
+            "summary": kwargs.get("summary", ""),
+            "topics": kwargs.get("topics", []),
+            "tools": kwargs.get("tools", []),
+            "actions": kwargs.get("actions", []),
+            "phase": kwargs.get("phase", "mvp-1"),
+            "created_by": kwargs.get("created_by", "Phoenix"),
+            "status": kwargs.get("status", "active"),
+        }
+
     def add_scroll(
         self,
         prompt: str,
         response: str,
+        read_back: bool = True,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -188,36 +652,65 @@ class FirestoreClient:
         Args:
             prompt: The user prompt or event trigger.
             response: The assistant's response.
+            read_back: Optional. If False, skips reading the document back
+                and returns a client-side created_at timestamp.
             **kwargs: Additional fields for the scroll document (e.g., summary,
                 topics).
 
         Returns:
             The newly created scroll document as a dictionary.
         """
-        scroll_data = {
-            "prompt": prompt,
-            "response": response,
-            "summary": kwargs.get("summary", ""),
-            "topics": kwargs.get("topics", []),
-            "tools": kwargs.get("tools", []),
-            "actions": kwargs.get("actions", []),
-            "phase": kwargs.get("phase", "mvp-1"),
-            "created_by": kwargs.get("created_by", "Phoenix"),
-            "status": kwargs.get("status", "active"),
-        }
-        return self.add("scrolls", scroll_data)
+        scroll_data = self._scroll_data(prompt, response, **kwargs)
+        return self.add("scrolls", scroll_data, read_back=read_back)
+
+    def add_scrolls(
+        self,
+        scrolls: Iterable[Dict[str, Any]],
+        **kwargs
+    ) -> BulkWriteResult:
+        """
+        Adds many 'scroll' documents through a BulkWriter.
+
+        Args:
+            scrolls: Dictionaries with "prompt", "response" and any of the
+                optional scroll fields accepted by add_scroll.
+            **kwargs: Options forwarded to add_many (e.g., on_error).
 
-    def get_scroll(self, scroll_id: str) -> Optional[Dict[str, Any]]:
+        Returns:
+            A BulkWriteResult listing succeeded and failed scroll IDs.
+        """
+        documents = (self._scroll_data(**scroll) for scroll in scrolls)
+        return self.add_many("scrolls", documents, **kwargs)
+
+    def get_scroll(
+        self,
+        scroll_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Retrieves a scroll by its ID.
 
         Args:
             scroll_id: The ID of the scroll document.
+            fields: Optional. Field paths to return.
 
         Returns:
             The scroll document as a dictionary, or None if not found.
         """
-        return self.get("scrolls", scroll_id)
+        return self.get("scrolls", scroll_id, fields=fields)
+
+    def get_scrolls(
+        self,
+        scroll_ids: Iterable[str],
+        fields: Optional[List[str]] = None
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retrieves many scrolls by ID; see get_many.
+
+        Returns:
+            The scroll documents in input order, None for missing IDs.
+        """
+        return self.get_many("scrolls", scroll_ids, fields=fields)
 
     # --- Collection-Specific Methods for AGENTS ---
 
@@ -226,6 +719,7 @@ class FirestoreClient:
         name: str,
         role: str,
         description: str,
+        read_back: bool = True,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -235,14 +729,50 @@ class FirestoreClient:
             name: The agent's name (e.g., "Ava Prime").
             role: The agent's primary function (e.g., "reflection-engine").
             description: A summary of the agent's purpose.
+            read_back: Optional. If False, skips reading the document back
+                and returns a client-side created_at timestamp.
             **kwargs: Additional fields for the agent document (e.g., tools, state).
 
         Returns:
             The newly created agent document as a dictionary.
         """
+        agent_data = self._agent_data(name, role, description, **kwargs)
+        agent_id = agent_data.pop("id")
+        return self.add(
+            "agents", agent_data, doc_id=agent_id, read_back=read_back
+        )
+
+    def add_agents(
+        self,
+        agents: Iterable[Dict[str, Any]],
+        **kwargs
+    ) -> BulkWriteResult:
+        """
+        Adds many 'agent' documents through a BulkWriter.
+
+        Args:
+            agents: Dictionaries with "name", "role", "description" and any
+                of the optional agent fields accepted by add_agent.
+            **kwargs: Options forwarded to add_many (e.g., on_error).
+
+        Returns:
+            A BulkWriteResult listing succeeded and failed agent IDs.
+        """
+        documents = (self._agent_data(**agent) for agent in agents)
+        return self.add_many("agents", documents, **kwargs)
+
+    @staticmethod
+    def _agent_data(
+        name: str,
+        role: str,
+        description: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Builds an 'agent' document whose ID is a slug of the name."""
         # Create a URL-friendly slug from the name for the ID
         agent_id = name.lower().replace(" ", "-").replace("_", "-")
-        agent_data = {
+        return {
+            "id": agent_id,
             "name": name,
             "description": description,
             "role": role,
@@ -250,7 +780,6 @@ class FirestoreClient:
             "state": kwargs.get("state", "active"),
             "metadata": kwargs.get("metadata", {}),
         }
-        return self.add("agents", agent_data, doc_id=agent_id)
 
     def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -264,6 +793,15 @@ class FirestoreClient:
         """
         return self.get("agents", agent_id)
 
+    def get_agents(self, agent_ids: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retrieves many agents by ID (slug); see get_many.
+
+        Returns:
+            The agent documents in input order, None for missing IDs.
+        """
+        return self.get_many("agents", agent_ids)
+
 
 if __name__ == "__main__":
     # Example usage (for testing purposes).
@@ -0,0 +1,178 @@
+"""
+Hydration of Algolia search hits into displayable scroll documents.
+
+The search path used to run an Algolia query and then a second Firestore
+`where('scroll_id', 'in', ids)` query, which costs two round trips and
+breaks past Firestore's `in` cardinality limit. Hits that already carry the
+displayed fields are now rendered straight from the Algolia payload; only
+hits missing them (e.g. records indexed before created_at was added) are
+fetched, by document reference with `get_all`, through a short-lived
+per-session document cache.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.metrics import document_size, record_reads, span, with_current_context
+
+# Algolia attributes needed to render a scroll header without Firestore.
+HIT_DISPLAY_ATTRIBUTES = ["summary", "topics", "tools", "metadata"]
+CONTENT_ATTRIBUTES = ("summary", "topics", "tools", "actions", "enhancements")
+GET_ALL_CHUNK_SIZE = 100
+DEFAULT_CACHE_TTL_SECONDS = 30.0
+
+
+class DocumentCache:
+    """
+    Short-lived cache of hydrated documents, meant to live in one session.
+
+    Methods:
+        get(doc_id):
+            Returns the cached document, or None if missing or expired.
+        put(doc_id, data):
+            Caches a document.
+        invalidate(doc_id=None):
+            Drops one document, or all of them.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is None:
+                return None
+            stored_at, data = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[doc_id]
+                return None
+            return data
+
+    def put(self, doc_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[doc_id] = (time.monotonic(), data)
+
+    def invalidate(self, doc_id: Optional[str] = None) -> None:
+        with self._lock:
+            if doc_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(doc_id, None)
+
+
+def hit_to_scroll(hit: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Builds a Firestore-shaped scroll document from an Algolia hit.
+
+    Returns None when the hit lacks a field the list view renders, in which
+    case the document has to be fetched from Firestore.
+    """
+    metadata = dict(hit.get("metadata") or {})
+    created_at = metadata.get("created_at")
+    if "summary" not in hit or created_at is None:
+        return None
+    if isinstance(created_at, (int, float)):
+        metadata["created_at"] = datetime.fromtimestamp(created_at, tz=timezone.utc)
+    return {
+        "scroll_id": hit["objectID"],
+        "content": {k: hit[k] for k in CONTENT_ATTRIBUTES if k in hit},
+        "metadata": metadata,
+    }
+
+
+def fetch_documents(
+    db: Any,
+    doc_ids: Sequence[str],
+    collection_name: str = "scrolls",
+    fields: Optional[List[str]] = None,
+    chunk_size: int = GET_ALL_CHUNK_SIZE,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetches documents by reference with get_all, chunks in parallel.
+
+    Args:
+        db: A Firestore client.
+        doc_ids: The document IDs to fetch.
+        collection_name: The collection the documents live in.
+        fields: Optional. Field paths to return.
+        chunk_size: Maximum references per get_all call.
+
+    Returns:
+        A dictionary mapping the IDs of existing documents to their data.
+    """
+    collection = db.collection(collection_name)
+    chunks = [
+        [collection.document(doc_id) for doc_id in doc_ids[i:i + chunk_size]]
+        for i in range(0, len(doc_ids), chunk_size)
+    ]
+
+    def _get_all(refs):
+        with span("firestore", op="get_all", collection=collection_name):
+            docs = [doc for doc in db.get_all(refs, field_paths=fields) if doc.exists]
+        record_reads(collection_name, len(refs), sum(document_size(d.to_dict()) for d in docs))
+        return docs
+
+    if len(chunks) <= 1:
+        snapshots = [doc for chunk in chunks for doc in _get_all(chunk)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 8)) as executor:
+            snapshots = [
+                doc for docs in executor.map(with_current_context(_get_all), chunks) for doc in docs
+            ]
+    return {doc.id: doc.to_dict() or {} for doc in snapshots}
+
+
+def hydrate_hits(
+    db: Any,
+    hits: List[Dict[str, Any]],
+    cache: Optional[DocumentCache] = None,
+    collection_name: str = "scrolls",
+    fields: Optional[List[str]] = None,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Turns Algolia hits into (scroll_id, scroll_data) pairs in hit order.
+
+    Hits carrying the displayed fields are used as-is; the rest are served
+    from the cache or fetched in one batched get_all call. Hits whose
+    document no longer exists in Firestore are dropped.
+
+    Args:
+        db: A Firestore client.
+        hits: The `hits` list from an Algolia search response.
+        cache: Optional. A per-session DocumentCache.
+        collection_name: The collection holding the scrolls.
+        fields: Optional. Field paths to fetch for hydrated documents.
+
+    Returns:
+        A list of (scroll_id, scroll_data) tuples, in relevance order.
+    """
+    resolved: Dict[str, Dict[str, Any]] = {}
+    missing: List[str] = []
+    for hit in hits:
+        scroll_id = hit["objectID"]
+        data = hit_to_scroll(hit)
+        if data is None and cache is not None:
+            data = cache.get(scroll_id)
+        if data is None:
+            missing.append(scroll_id)
+        else:
+            resolved[scroll_id] = data
+
+    if missing:
+        fetched = fetch_documents(db, missing, collection_name, fields)
+        for scroll_id, data in fetched.items():
+            resolved[scroll_id] = data
+            if cache is not None:
+                cache.put(scroll_id, data)
+
+    return [
+        (hit["objectID"], resolved[hit["objectID"]])
+        for hit in hits
+        if hit["objectID"] in resolved
+    ]
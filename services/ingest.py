@@ -0,0 +1,343 @@
+"""
+Bulk ingestion of many responses into scrolls.
+
+The Streamlit apps create one scroll per paste. BulkIngestor takes a whole
+file of responses (JSONL, or a ChatGPT `conversations.json` export), parses
+them concurrently with a bounded worker pool and writes the resulting
+scrolls to Firestore in WriteBatch chunks, reporting progress as it goes.
+Each chunk also carries a search outbox entry per scroll, so a scroll and
+its index upsert commit together and OutboxWorker indexes them in the
+background, as it does for single edits. A chunk holds at most 500 writes
+and is closed before it would exceed Firestore's 10 MiB commit limit. A
+commit failing with a transient error is retried with exponential backoff;
+scroll IDs are assigned before the first attempt, so a retry rewrites the
+same documents.
+"""
+
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.api_core.exceptions import (
+    Aborted,
+    DeadlineExceeded,
+    InternalServerError,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
+
+from services.metrics import document_size, record_writes, span, with_current_context
+from services.search_outbox import OP_UPSERT
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+FIRESTORE_BATCH_LIMIT = 500
+# Firestore rejects commits over 10 MiB; the headroom covers per-write
+# overhead that document_size does not count.
+MAX_BATCH_BYTES = 9 * 1024 * 1024
+DEFAULT_COMMIT_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF_SECONDS = 0.5
+# The commit errors worth retrying, matching RETRYABLE_WRITE_CODES in
+# services.firestore_client: DEADLINE_EXCEEDED, RESOURCE_EXHAUSTED, ABORTED,
+# INTERNAL and UNAVAILABLE.
+RETRYABLE_COMMIT_ERRORS = (
+    DeadlineExceeded,
+    ResourceExhausted,
+    Aborted,
+    InternalServerError,
+    ServiceUnavailable,
+)
+DEFAULT_MAX_WORKERS = 8
+
+# Keys checked, in order, for the response text of a JSONL object.
+JSONL_TEXT_KEYS = ("response", "text", "content", "raw_text")
+
+
+@dataclass
+class IngestReport:
+    """
+    Outcome of a bulk ingestion run.
+
+    Attributes:
+        total (int): Number of responses submitted.
+        stored (int): Number of scrolls written to Firestore.
+        skipped (int): Responses rejected by validation.
+        parse_failures (int): Responses stored with fallback parse data.
+        write_failures (int): Scrolls whose Firestore batch failed after
+            every retry.
+        elapsed_seconds (float): Wall-clock duration of the run.
+        errors (list): Human-readable error messages.
+    """
+
+    total: int = 0
+    stored: int = 0
+    skipped: int = 0
+    parse_failures: int = 0
+    write_failures: int = 0
+    elapsed_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Scrolls stored per second."""
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.stored / self.elapsed_seconds
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or {}
+    parts = content.get("parts") or []
+    return "\n".join(p for p in parts if isinstance(p, str)).strip()
+
+
+def _chatgpt_export_responses(conversations: List[Dict[str, Any]]) -> List[str]:
+    responses = []
+    for conversation in conversations:
+        messages = [
+            node["message"]
+            for node in (conversation.get("mapping") or {}).values()
+            if node.get("message")
+        ]
+        messages.sort(key=lambda m: m.get("create_time") or 0)
+        for message in messages:
+            if (message.get("author") or {}).get("role") != "assistant":
+                continue
+            text = _message_text(message)
+            if text:
+                responses.append(text)
+    return responses
+
+
+def load_responses(data: str, filename: str = "") -> List[str]:
+    """
+    Extracts response texts from an uploaded file.
+
+    Supports JSONL (one JSON string, or one object carrying the text under
+    "response", "text", "content" or "raw_text", per line) and ChatGPT data
+    exports (`conversations.json`), from which every assistant message is
+    taken as a response.
+
+    Args:
+        data: The decoded file contents.
+        filename: Optional. The uploaded file name, used to pick a format.
+
+    Returns:
+        A list of response texts in file order.
+
+    Raises:
+        ValueError: If the contents are not valid JSON/JSONL.
+    """
+    stripped = data.lstrip()
+    if filename.endswith(".json") or stripped.startswith("["):
+        parsed = json.loads(data)
+        if not isinstance(parsed, list):
+            raise ValueError("Expected a list of conversations.")
+        if parsed and isinstance(parsed[0], dict) and "mapping" in parsed[0]:
+            return _chatgpt_export_responses(parsed)
+        return [_record_text(item) for item in parsed if _record_text(item)]
+
+    responses = []
+    for line_no, line in enumerate(data.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            text = _record_text(json.loads(line))
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_no}: {e}") from e
+        if text:
+            responses.append(text)
+    return responses
+
+
+def _record_text(record: Any) -> str:
+    if isinstance(record, str):
+        return record
+    if isinstance(record, dict):
+        for key in JSONL_TEXT_KEYS:
+            if isinstance(record.get(key), str):
+                return record[key]
+    return ""
+
+
+class BulkIngestor:
+    """
+    Parses and stores many scrolls per request.
+
+    Parsing runs on a bounded thread pool; Firestore writes, together with
+    their search outbox entries, are batched on the calling thread as
+    parsed scrolls arrive.
+
+    Methods:
+        ingest(responses, on_progress=None):
+            Parses and stores every response, returning an IngestReport.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        outbox: Any,
+        parse_fn: Callable[[str], Dict[str, Any]],
+        build_document: Callable[[str, str, Dict[str, Any]], Dict[str, Any]],
+        build_search_record: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+        fallback_parsed: Optional[Dict[str, Any]] = None,
+        validate: Optional[Callable[[str], Tuple[bool, str]]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        batch_size: int = FIRESTORE_BATCH_LIMIT,
+        collection_name: str = "scrolls",
+        max_batch_bytes: int = MAX_BATCH_BYTES,
+        max_attempts: int = DEFAULT_COMMIT_ATTEMPTS,
+        retry_backoff_seconds: float = DEFAULT_RETRY_BACKOFF_SECONDS,
+    ):
+        """
+        Initializes the ingestor.
+
+        Args:
+            db: A Firestore client.
+            outbox: Optional. The SearchOutbox to enqueue index upserts in,
+                or None to skip search indexing.
+            parse_fn: Parses one response; may raise or return {} on failure.
+            build_document: Builds the Firestore document from
+                (scroll_id, raw_text, parsed_data).
+            build_search_record: Builds the search record from
+                (scroll_id, document).
+            fallback_parsed: Optional. Parsed data used when parsing fails.
+            validate: Optional. Returns (is_valid, error_msg) for a response.
+            max_workers: Number of concurrent parse calls.
+            batch_size: Scrolls per Firestore WriteBatch (max 500, or 250
+                with an outbox, whose entries take a write each).
+            collection_name: The Firestore collection to write to.
+            max_batch_bytes: Estimated document bytes per WriteBatch.
+            max_attempts: Commit attempts per batch for transient errors.
+            retry_backoff_seconds: Delay before the first retry, doubled
+                for each one after it.
+        """
+        self.db = db
+        self.outbox = outbox
+        self.parse_fn = parse_fn
+        self.build_document = build_document
+        self.build_search_record = build_search_record
+        self.fallback_parsed = fallback_parsed or {}
+        self.validate = validate
+        self.max_workers = max_workers
+        writes_per_scroll = 1 if outbox is None else 2
+        self.batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT // writes_per_scroll)
+        self.collection_name = collection_name
+        self.max_batch_bytes = max_batch_bytes
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    def ingest(
+        self,
+        responses: List[str],
+        on_progress: Optional[Callable[[int, int, IngestReport], None]] = None,
+    ) -> IngestReport:
+        """
+        Parses and stores every response.
+
+        Args:
+            responses: The response texts to turn into scrolls.
+            on_progress: Optional. Called as on_progress(done, total, report)
+                after each response has been processed.
+
+        Returns:
+            An IngestReport with counts and throughput.
+        """
+        report = IngestReport(total=len(responses))
+        started = time.perf_counter()
+        pending_docs: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]] = []
+        pending_bytes = 0
+
+        valid = []
+        for text in responses:
+            if self.validate is not None and not self.validate(text)[0]:
+                report.skipped += 1
+            else:
+                valid.append(text)
+        done = report.skipped
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            parse = with_current_context(self._parse)
+            futures = {executor.submit(parse, text): text for text in valid}
+            for future in as_completed(futures):
+                text = futures[future]
+                parsed, ok = future.result()
+                if not ok:
+                    report.parse_failures += 1
+                scroll_id = str(uuid.uuid4())
+                doc = self.build_document(scroll_id, text, parsed)
+                record = None if self.outbox is None else self.build_search_record(scroll_id, doc)
+                size = document_size(doc) + (0 if record is None else document_size(record))
+                if pending_docs and pending_bytes + size > self.max_batch_bytes:
+                    self._commit(pending_docs, report)
+                    pending_docs, pending_bytes = [], 0
+                pending_docs.append((scroll_id, doc, record))
+                pending_bytes += size
+                if len(pending_docs) >= self.batch_size:
+                    self._commit(pending_docs, report)
+                    pending_docs, pending_bytes = [], 0
+
+                done += 1
+                report.elapsed_seconds = time.perf_counter() - started
+                if on_progress is not None:
+                    on_progress(done, report.total, report)
+
+        if pending_docs:
+            self._commit(pending_docs, report)
+
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    def _parse(self, text: str) -> Tuple[Dict[str, Any], bool]:
+        try:
+            parsed = self.parse_fn(text)
+        except Exception:
+            parsed = {}
+        if parsed:
+            return parsed, True
+        return dict(self.fallback_parsed), False
+
+    def _commit(
+        self,
+        docs: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+        report: IngestReport
+    ) -> None:
+        collection = self.db.collection(self.collection_name)
+        for attempt in range(1, self.max_attempts + 1):
+            batch = self.db.batch()
+            for scroll_id, doc, record in docs:
+                batch.set(collection.document(scroll_id), doc)
+                if record is not None:
+                    self.outbox.enqueue(batch, OP_UPSERT, scroll_id, record)
+            try:
+                with span("firestore", op="batch_commit", collection=self.collection_name):
+                    batch.commit()
+                break
+            except RETRYABLE_COMMIT_ERRORS as e:
+                if attempt == self.max_attempts:
+                    return self._commit_failed(docs, report, e)
+                delay = self.retry_backoff_seconds * 2 ** (attempt - 1)
+                logger.warning(
+                    "Firestore batch commit failed, retrying: %s", e,
+                    extra={"documents": len(docs), "attempt": attempt, "retry_in_seconds": delay},
+                )
+                time.sleep(delay)
+            except Exception as e:
+                return self._commit_failed(docs, report, e)
+        report.stored += len(docs)
+        record_writes(self.collection_name, len(docs), document_size([doc for _, doc, _ in docs]))
+        if self.outbox is not None:
+            record_writes(self.outbox.collection.id, len(docs))
+
+    @staticmethod
+    def _commit_failed(
+        docs: List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]],
+        report: IngestReport,
+        error: Exception
+    ) -> None:
+        report.write_failures += len(docs)
+        report.errors.append(f"Firestore batch of {len(docs)} failed: {error}")
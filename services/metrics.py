@@ -0,0 +1,303 @@
+"""
+Lightweight in-process instrumentation: timing spans, counters and an
+OpenMetrics exporter.
+
+Every Firestore RPC, Secret Manager fetch, LLM parse call and Algolia
+operation is wrapped in a span. Spans feed a latency histogram and a call
+counter labelled by operation, and the caller records documents read or
+written and bytes transferred. Spans are also appended to the current
+trace (a context variable), so one Streamlit rerun can be broken down call
+by call. Work fanned out to thread pools is submitted through
+with_current_context, so spans recorded on worker threads land in the
+caller's trace too. Recording is a dictionary update under a lock, cheap enough to
+leave on in production.
+"""
+
+import contextvars
+import datetime
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Latency histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Port for the optional /metrics scrape endpoint; unset disables it.
+METRICS_PORT = os.environ.get("METRICS_PORT")
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+T = TypeVar("T")
+
+
+@dataclass
+class SpanRecord:
+    """One timed operation within a trace."""
+
+    name: str
+    labels: Dict[str, str]
+    started_at: float
+    duration_seconds: float
+    error: Optional[str] = None
+
+
+_current_trace: contextvars.ContextVar[Optional[List[SpanRecord]]] = contextvars.ContextVar(
+    "codessa_trace", default=None
+)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters and latency histograms.
+
+    Methods:
+        inc(name, value=1, **labels):
+            Increments a counter.
+        observe(name, seconds, **labels):
+            Records one latency observation.
+        span(name, **labels):
+            Context manager timing a block into "<name>" metrics.
+        export_openmetrics():
+            Renders all metrics in the OpenMetrics text format.
+    """
+
+    def __init__(self, prefix: str = "codessa", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            # Per-bucket counts, then the sum and count of observations.
+            state = series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    state[i] += 1
+            state[-2] += seconds
+            state[-1] += 1
+
+    @contextmanager
+    def span(self, name: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Times a block as operation `name`.
+
+        Records "<name>" latency and call count, plus an error count if the
+        block raises, and appends the span to the current trace. The
+        yielded dictionary can be filled with extra labels for the trace.
+        """
+        started = time.perf_counter()
+        wall = time.time()
+        details: Dict[str, Any] = {}
+        error = None
+        try:
+            yield details
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(f"{name}_seconds", elapsed, **labels)
+            self.inc(f"{name}_calls_total", **labels)
+            if error is not None:
+                self.inc(f"{name}_errors_total", error=error, **labels)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.append(SpanRecord(name, {**labels, **details}, wall, elapsed, error))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Span finished",
+                    extra={"span": name, **labels, **details, "ms": round(elapsed * 1000, 3), "error": error},
+                )
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns counter values as {name: {rendered_labels: value}}."""
+        with self._lock:
+            return {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+
+    def export_openmetrics(self) -> str:
+        """Renders every metric in the OpenMetrics / Prometheus text format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name[:-len('_total')] if name.endswith('_total') else name}"
+                lines.append(f"# TYPE {metric} counter")
+                if name in self._help:
+                    lines.append(f"# HELP {metric} {self._help[name]}")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}_total{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                lines.append(f"# UNIT {metric} seconds")
+                for key, state in sorted(series.items()):
+                    for bound, count in zip(self.buckets, state):
+                        lines.append(f"{metric}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {count:g}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, ('le', '+Inf'))} {state[-1]:g}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {state[-2]:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {state[-1]:g}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def document_size(value: Any) -> int:
+    """
+    Estimates the stored size of a Firestore value, in bytes.
+
+    Follows Firestore's storage size rules: strings count their UTF-8 bytes
+    plus one, numbers and timestamps 8 bytes, booleans and nulls 1, and map
+    keys like strings.
+    """
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime.datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes):
+        return len(value) + 1
+    if isinstance(value, dict):
+        return sum(len(str(k).encode("utf-8")) + 1 + document_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(document_size(v) for v in value)
+    # Sentinels such as SERVER_TIMESTAMP, references and geo points.
+    return 16
+
+
+_registry = MetricsRegistry()
+_registry.describe("firestore_documents_read_total", "Documents returned by Firestore reads.")
+_registry.describe("firestore_documents_written_total", "Documents written to Firestore.")
+_registry.describe("bytes_sent_total", "Estimated request payload bytes.")
+_registry.describe("bytes_received_total", "Estimated response payload bytes.")
+
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+
+def span(name: str, **labels: Any):
+    """Shorthand for get_metrics().span(...)."""
+    return _registry.span(name, **labels)
+
+
+def record_reads(collection: str, docs: int, size_bytes: int = 0) -> None:
+    """Counts documents (and estimated bytes) read from a collection."""
+    _registry.inc("firestore_documents_read_total", docs, collection=collection)
+    if size_bytes:
+        _registry.inc("bytes_received_total", size_bytes, service="firestore")
+
+
+def record_writes(collection: str, docs: int, size_bytes: int = 0) -> None:
+    """Counts documents (and estimated bytes) written to a collection."""
+    _registry.inc("firestore_documents_written_total", docs, collection=collection)
+    if size_bytes:
+        _registry.inc("bytes_sent_total", size_bytes, service="firestore")
+
+
+def record_bytes(service: str, sent: int = 0, received: int = 0) -> None:
+    """Counts payload bytes exchanged with a service."""
+    if sent:
+        _registry.inc("bytes_sent_total", sent, service=service)
+    if received:
+        _registry.inc("bytes_received_total", received, service=service)
+
+
+def start_trace() -> List[SpanRecord]:
+    """Starts collecting spans for the current context (e.g. one rerun)."""
+    trace: List[SpanRecord] = []
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> List[SpanRecord]:
+    """Returns the spans recorded since start_trace(), or [] if none."""
+    return list(_current_trace.get() or [])
+
+
+def with_current_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Binds fn to the caller's context variables (trace, correlation ID).
+
+    Thread pool workers start with an empty context, so spans they record
+    would miss the caller's trace. Call this in the submitting thread, e.g.
+    executor.map(with_current_context(fn), items); each call runs in its own
+    copy of the captured context, so concurrent calls are safe.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = _registry.export_openmetrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_http_exporter(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serves the registry at http://<host>:<port>/metrics from a daemon thread.
+
+    Returns:
+        The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    logger.info("Serving metrics", extra={"port": port, "path": "/metrics"})
+    return server
@@ -0,0 +1,113 @@
+"""
+Cursor-based pagination helpers for Firestore queries.
+
+Pages are fetched lazily with `start_after`, so walking a large collection
+holds one page in memory at a time. The cursor after each page can be
+serialized into an opaque page token; resuming from a token needs no extra
+read, because the token carries the order-by values of the last document
+rather than a document ID that would have to be fetched again.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from google.cloud import firestore
+
+from services.metrics import document_size, record_reads, span
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__ts__": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "__ts__" in value:
+        return datetime.fromisoformat(value["__ts__"])
+    return value
+
+
+def encode_page_token(values: Sequence[Any]) -> str:
+    """Serializes cursor values into an opaque, URL-safe page token."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(token: str) -> List[Any]:
+    """
+    Deserializes a page token produced by encode_page_token.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token.encode("ascii"))
+        values = json.loads(payload)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid page token: {token!r}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid page token: {token!r}")
+    return [_decode_value(v) for v in values]
+
+
+def ordered_query(
+    query: Any,
+    order_by: Sequence[str] = (),
+    direction: str = firestore.Query.ASCENDING,
+) -> Any:
+    """
+    Orders a query so that it can be paged with cursors.
+
+    Appends `__name__` as a final tie-breaker in the same direction, which
+    keeps cursors unique without requiring any extra composite index.
+    """
+    for field_path in order_by:
+        query = query.order_by(field_path, direction=direction)
+    return query.order_by("__name__", direction=direction)
+
+
+def cursor_values(snapshot: Any, order_by: Sequence[str] = ()) -> List[Any]:
+    """Returns the cursor values (order-by fields, then ID) of a snapshot."""
+    return [snapshot.get(field_path) for field_path in order_by] + [snapshot.id]
+
+
+def iter_pages(
+    query: Any,
+    order_by: Sequence[str] = (),
+    page_size: int = DEFAULT_PAGE_SIZE,
+    page_token: Optional[str] = None,
+    collection: str = "",
+) -> Iterator[Tuple[List[Any], Optional[str]]]:
+    """
+    Lazily fetches a query page by page.
+
+    Args:
+        query: A query already ordered with ordered_query(query, order_by).
+        order_by: The order-by field paths passed to ordered_query.
+        page_size: Number of documents per page.
+        page_token: Optional. Resume after the page this token came from.
+        collection: Optional. Collection name used to label metrics.
+
+    Yields:
+        (snapshots, next_page_token) tuples. next_page_token resumes right
+        after this page; it is None once a short page shows that nothing
+        is left (a full last page is followed by one empty page).
+    """
+    cursor = decode_page_token(page_token) if page_token else None
+    while True:
+        page_query = query.limit(page_size)
+        if cursor is not None:
+            page_query = page_query.start_after(cursor)
+        with span("firestore", op="page", collection=collection):
+            snapshots = list(page_query.stream())
+        record_reads(collection, len(snapshots), sum(document_size(s.to_dict()) for s in snapshots))
+        if len(snapshots) < page_size:
+            yield snapshots, None
+            return
+        cursor = cursor_values(snapshots[-1], order_by)
+        yield snapshots, encode_page_token(cursor)
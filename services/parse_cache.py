@@ -0,0 +1,224 @@
+"""
+Content-addressed cache of parser results.
+
+Users often paste the same (or whitespace-only different) response several
+times. ParseCache keys parsed results on the SHA-256 of the normalized text,
+keeps recent entries in an in-memory LRU and, optionally, in a persistent
+store shared across restarts: a local SQLite file or a Firestore
+`parse_cache` collection. A repeated paste returns the parsed fields without
+calling the LLM, and the cache counts how many calls it saved.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.cloud import firestore
+
+from services.metrics import record_reads, record_writes, span
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MEMORY_SIZE = int(os.environ.get("PARSE_CACHE_MEMORY_SIZE", "256"))
+PARSE_CACHE_COLLECTION = "parse_cache"
+
+_WHITESPACE = re.compile(r"[ \t\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes scroll text so near-identical pastes share a cache key.
+
+    Applies Unicode NFC normalization, unifies line endings, collapses runs
+    of spaces and tabs, strips each line and collapses runs of blank lines.
+    Case is preserved, since it is significant in code.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_WHITESPACE.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def content_key(text: str) -> str:
+    """Returns the SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SQLiteParseCacheStore:
+    """Persistent parse cache tier backed by a local SQLite file."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parse_cache ("
+                " key TEXT PRIMARY KEY,"
+                " parsed TEXT NOT NULL,"
+                " created_at REAL DEFAULT (strftime('%s', 'now'))"
+                ")"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parsed FROM parse_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, parsed: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, parsed) VALUES (?, ?)",
+                (key, json.dumps(parsed)),
+            )
+
+
+class FirestoreParseCacheStore:
+    """Persistent parse cache tier backed by a Firestore collection."""
+
+    def __init__(self, db: Any, collection_name: str = PARSE_CACHE_COLLECTION):
+        self.collection = db.collection(collection_name)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with span("firestore", op="get", collection=self.collection.id):
+            doc = self.collection.document(key).get()
+        record_reads(self.collection.id, 1)
+        if not doc.exists:
+            return None
+        return (doc.to_dict() or {}).get("parsed")
+
+    def set(self, key: str, parsed: Dict[str, Any]) -> None:
+        with span("firestore", op="set", collection=self.collection.id):
+            self.collection.document(key).set(
+                {"parsed": parsed, "created_at": firestore.SERVER_TIMESTAMP}
+            )
+        record_writes(self.collection.id, 1)
+
+
+class ParseCache:
+    """
+    Two-tier (memory LRU + optional persistent store) parse result cache.
+
+    Methods:
+        get_or_parse(text, parse_fn):
+            Returns the cached result for text, or calls parse_fn and caches
+            a non-empty result.
+        stats():
+            Returns hit/miss counters and the number of LLM calls saved.
+    """
+
+    def __init__(self, store: Any = None, memory_size: int = DEFAULT_MEMORY_SIZE):
+        """
+        Initializes the cache.
+
+        Args:
+            store: Optional. A persistent tier exposing get(key) and
+                set(key, parsed), e.g. SQLiteParseCacheStore.
+            memory_size: Maximum number of entries kept in memory.
+        """
+        self.store = store
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0}
+
+    def get_or_parse(
+        self,
+        text: str,
+        parse_fn: Callable[[str], Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Returns the parsed result for text, calling parse_fn only on a miss.
+
+        Empty results (parser failures) are not cached.
+
+        Args:
+            text: The raw scroll text.
+            parse_fn: Callable that parses text, e.g. ParserTransport.parse.
+
+        Returns:
+            A (parsed, from_cache) tuple.
+        """
+        key = content_key(text)
+
+        with self._lock:
+            parsed = self._memory.get(key)
+            if parsed is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return dict(parsed), True
+
+        if self.store is not None:
+            try:
+                parsed = self.store.get(key)
+            except Exception as e:
+                logger.warning("Parse cache lookup failed: %s", e)
+                parsed = None
+            if parsed:
+                self._remember(key, parsed)
+                with self._lock:
+                    self._stats["store_hits"] += 1
+                return dict(parsed), True
+
+        with self._lock:
+            self._stats["misses"] += 1
+        parsed = parse_fn(text)
+        if parsed:
+            self._remember(key, parsed)
+            if self.store is not None:
+                try:
+                    self.store.set(key, parsed)
+                except Exception as e:
+                    logger.warning("Parse cache write failed: %s", e)
+        return parsed, False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns cache counters.
+
+        Returns:
+            A dictionary with memory_hits, store_hits, misses and
+            llm_calls_saved.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["llm_calls_saved"] = stats["memory_hits"] + stats["store_hits"]
+        return stats
+
+    def _remember(self, key: str, parsed: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = dict(parsed)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+
+def build_parse_cache(db: Any = None) -> ParseCache:
+    """
+    Builds a ParseCache using the persistent tier selected by environment.
+
+    PARSE_CACHE_BACKEND selects "firestore" (requires db), "sqlite"
+    (PARSE_CACHE_PATH, default "parse_cache.sqlite3") or "memory".
+
+    Args:
+        db: Optional. A Firestore client, used by the "firestore" backend.
+
+    Returns:
+        A configured ParseCache.
+    """
+    backend = os.environ.get("PARSE_CACHE_BACKEND", "firestore").lower()
+    if backend == "firestore" and db is not None:
+        return ParseCache(FirestoreParseCacheStore(db))
+    if backend == "sqlite":
+        path = os.environ.get("PARSE_CACHE_PATH", "parse_cache.sqlite3")
+        return ParseCache(SQLiteParseCacheStore(path))
+    return ParseCache()
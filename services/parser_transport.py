@@ -0,0 +1,468 @@
+"""
+HTTP transport for the scroll parsing API (GEMINI_API_ENDPOINT).
+
+A bare `requests.post` opens a new TCP+TLS connection for every parse.
+ParserTransport keeps a pooled, keep-alive `requests.Session` instead, with
+separate connect/read timeouts and retries with jittered exponential backoff
+for 429 and 5xx responses. AsyncParserTransport offers the same behaviour on
+top of `httpx.AsyncClient` for callers running in an event loop.
+
+With PARSER_STREAM=1 the apps call ParserTransport.parse_stream instead of
+parse. It asks the API to stream its answer and yields each top-level field
+as soon as it is complete (services/partial_json.py), so the UI can show
+the summary after the first tokens instead of after the whole response.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import get_metrics, record_bytes, span
+from services.partial_json import PartialJSONParser
+from services.structured_logging import get_correlation_id
+
+STREAMING_ENABLED = os.environ.get("PARSER_STREAM", "0") == "1"
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get("PARSER_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.environ.get("PARSER_READ_TIMEOUT", "20"))
+DEFAULT_POOL_SIZE = int(os.environ.get("PARSER_POOL_SIZE", "10"))
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+PARSE_PROMPT = (
+    "You are Codessa's Reflection Agent. Analyze the following response and "
+    "extract: summary, topics, tools, actions, enhancements.\n\n{text}"
+)
+
+
+class ParserError(Exception):
+    """Raised when the parsing API cannot produce a usable result."""
+
+
+def build_payload(text: str) -> Dict[str, str]:
+    """Builds the request body sent to the parsing API."""
+    return {"prompt": PARSE_PROMPT.format(text=text)}
+
+
+def _event_text(data: str) -> str:
+    """Returns the text carried by one server-sent event's data field.
+
+    Accepts a bare text fragment, {"text": ...}, or a Gemini
+    streamGenerateContent chunk.
+    """
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(event, str):
+        return event
+    if isinstance(event, dict):
+        if isinstance(event.get("text"), str):
+            return event["text"]
+        candidates = event.get("candidates") or [{}]
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+    return data
+
+
+def stream_text(response: Any) -> Iterator[str]:
+    """
+    Yields the text of a streamed response as it arrives.
+
+    Server-sent events (text/event-stream) are unwrapped with _event_text;
+    any other body is read as plain chunked text.
+    """
+    if "text/event-stream" in response.headers.get("Content-Type", ""):
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            yield _event_text(data)
+    else:
+        response.encoding = response.encoding or "utf-8"
+        yield from response.iter_content(chunk_size=None, decode_unicode=True)
+
+
+def correlation_headers() -> Dict[str, str]:
+    """Forwards the current correlation ID so the API's logs can be joined with ours."""
+    correlation_id = get_correlation_id()
+    return {"X-Correlation-ID": correlation_id} if correlation_id else {}
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retry settings for transient parser failures.
+
+    Attributes:
+        max_attempts (int): Total attempts, including the first one.
+        backoff_base (float): Base delay in seconds for the first retry.
+        backoff_max (float): Upper bound for a single delay in seconds.
+    """
+
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Returns how long to sleep before retry number `attempt` (1-based).
+
+        Uses "full jitter": a uniform random delay up to the exponential
+        backoff, so concurrent clients do not retry in lockstep. A numeric
+        Retry-After header from the server takes precedence.
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class ParserTransport:
+    """
+    Pooled, keep-alive HTTP client for the parsing API.
+
+    One instance is meant to be shared by the whole process (see
+    services/clients.py), so that consecutive parses reuse warm connections.
+
+    Attributes:
+        api_endpoint (str): The base URL of the parsing API.
+        timeout (tuple): The (connect, read) timeouts in seconds.
+        retry (RetryPolicy): Retry settings for 429/5xx and connect errors.
+
+    Methods:
+        parse(text):
+            Sends text to the parsing API and returns the parsed JSON.
+        parse_stream(text):
+            Streams the parse, yielding fields as they complete.
+        close():
+            Closes pooled connections.
+    """
+
+    def __init__(
+        self,
+        api_endpoint: str,
+        api_key: str,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retry: Optional[RetryPolicy] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """
+        Initializes the transport and its connection pool.
+
+        Args:
+            api_endpoint: The base URL of the parsing API.
+            api_key: API key sent as the `key` query parameter.
+            connect_timeout: Seconds to wait for a connection.
+            read_timeout: Seconds to wait for the response.
+            retry: Optional. Retry settings. Defaults to RetryPolicy().
+            pool_size: Maximum number of pooled keep-alive connections.
+        """
+        self.api_endpoint = api_endpoint
+        self._api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry = retry or RetryPolicy()
+
+        self.session = requests.Session()
+        # Retries are handled in parse() so they get jittered backoff.
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        """
+        Sends text to the parsing API and returns the parsed JSON.
+
+        Args:
+            text: The raw scroll text to analyze.
+
+        Returns:
+            The JSON object returned by the API.
+
+        Raises:
+            ParserError: If every attempt failed or the response was not
+                valid JSON.
+        """
+        payload = build_payload(text)
+        params = {"key": self._api_key}
+        headers = correlation_headers()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            retry_after = None
+            try:
+                with span("llm", op="parse") as details:
+                    details["attempt"] = attempt
+                    response = self.session.post(
+                        self.api_endpoint,
+                        params=params,
+                        json=payload,
+                        headers=headers,
+                        timeout=self.timeout,
+                    )
+                record_bytes(
+                    "llm",
+                    sent=len(response.request.body or b""),
+                    received=len(response.content),
+                )
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = response.headers.get("Retry-After")
+                    last_error = ParserError(
+                        f"Parser returned HTTP {response.status_code}."
+                    )
+                else:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.ConnectionError, requests.ConnectTimeout) as e:
+                last_error = e
+            except requests.JSONDecodeError as e:
+                # Also a RequestException, so it must be caught first.
+                raise ParserError(
+                    "API returned malformed data. Could not parse the response."
+                ) from e
+            except requests.RequestException as e:
+                raise ParserError(f"API request failed: {e}") from e
+            except ValueError as e:
+                raise ParserError(
+                    "API returned malformed data. Could not parse the response."
+                ) from e
+
+            if attempt < self.retry.max_attempts:
+                get_metrics().inc("llm_retries_total")
+                time.sleep(self.retry.delay(attempt, retry_after))
+
+        raise ParserError(
+            f"API request failed after {self.retry.max_attempts} attempts: "
+            f"{last_error}"
+        )
+
+    def _open_stream(self, text: str) -> Any:
+        """Starts a streamed request, retrying like parse() until a 2xx response arrives."""
+        payload = {**build_payload(text), "stream": True}
+        params = {"key": self._api_key}
+        headers = {**correlation_headers(), "Accept": "text/event-stream, application/json"}
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            retry_after = None
+            try:
+                response = self.session.post(
+                    self.api_endpoint,
+                    params=params,
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=True,
+                )
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = response.headers.get("Retry-After")
+                    response.close()
+                    last_error = ParserError(
+                        f"Parser returned HTTP {response.status_code}."
+                    )
+                else:
+                    response.raise_for_status()
+                    return response
+            except (requests.ConnectionError, requests.ConnectTimeout) as e:
+                last_error = e
+            except requests.RequestException as e:
+                raise ParserError(f"API request failed: {e}") from e
+
+            if attempt < self.retry.max_attempts:
+                get_metrics().inc("llm_retries_total")
+                time.sleep(self.retry.delay(attempt, retry_after))
+
+        raise ParserError(
+            f"API request failed after {self.retry.max_attempts} attempts: "
+            f"{last_error}"
+        )
+
+    def parse_stream(self, text: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the parse, yielding top-level fields as they complete.
+
+        The request is the same as parse() with "stream": true added. The
+        API may answer with server-sent events or a plain chunked body.
+        Retries only happen before the first byte; a stream that breaks
+        midway raises. The time to the first chunk is recorded as
+        llm_first_token_seconds.
+
+        Args:
+            text: The raw scroll text to analyze.
+
+        Yields:
+            Dictionaries of newly completed fields, in document order.
+            Merged together they equal what parse() would return.
+
+        Raises:
+            ParserError: If the request failed, the stream broke, or the
+                streamed text was not one complete JSON object.
+        """
+        decoder = PartialJSONParser()
+        received = 0
+        with span("llm", op="parse_stream") as details:
+            started = time.perf_counter()
+            response = self._open_stream(text)
+            try:
+                for chunk in stream_text(response):
+                    if not chunk:
+                        continue
+                    if not received:
+                        first_token = time.perf_counter() - started
+                        details["first_token_ms"] = round(first_token * 1000, 1)
+                        get_metrics().observe("llm_first_token_seconds", first_token)
+                    received += len(chunk.encode("utf-8"))
+                    try:
+                        completed = decoder.feed(chunk)
+                    except ValueError as e:
+                        raise ParserError(
+                            "API returned malformed data. Could not parse the response."
+                        ) from e
+                    if completed:
+                        yield completed
+                    if decoder.done:
+                        break
+            except requests.RequestException as e:
+                raise ParserError(f"API stream failed: {e}") from e
+            finally:
+                response.close()
+                record_bytes("llm", sent=len(response.request.body or b""), received=received)
+        if not decoder.done:
+            raise ParserError("API stream ended before the parsed result was complete.")
+
+    def close(self) -> None:
+        """Closes pooled connections."""
+        self.session.close()
+
+
+class AsyncParserTransport:
+    """
+    Asynchronous counterpart of ParserTransport built on httpx.
+
+    Requires the optional `httpx` package.
+
+    Methods:
+        parse(text):
+            Coroutine returning the parsed JSON for text.
+        aclose():
+            Coroutine closing pooled connections.
+    """
+
+    def __init__(
+        self,
+        api_endpoint: str,
+        api_key: str,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retry: Optional[RetryPolicy] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """
+        Initializes the transport and its connection pool.
+
+        Args:
+            api_endpoint: The base URL of the parsing API.
+            api_key: API key sent as the `key` query parameter.
+            connect_timeout: Seconds to wait for a connection.
+            read_timeout: Seconds to wait for the response.
+            retry: Optional. Retry settings. Defaults to RetryPolicy().
+            pool_size: Maximum number of pooled keep-alive connections.
+
+        Raises:
+            ImportError: If httpx is not installed.
+        """
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError(
+                "AsyncParserTransport requires httpx. Install it with "
+                "'pip install httpx'."
+            ) from e
+
+        self._httpx = httpx
+        self.api_endpoint = api_endpoint
+        self._api_key = api_key
+        self.retry = retry or RetryPolicy()
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+        )
+
+    async def parse(self, text: str) -> Dict[str, Any]:
+        """
+        Sends text to the parsing API and returns the parsed JSON.
+
+        Args:
+            text: The raw scroll text to analyze.
+
+        Returns:
+            The JSON object returned by the API.
+
+        Raises:
+            ParserError: If every attempt failed or the response was not
+                valid JSON.
+        """
+        httpx = self._httpx
+        payload = build_payload(text)
+        params = {"key": self._api_key}
+        headers = correlation_headers()
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.retry.max_attempts + 1):
+            retry_after = None
+            try:
+                with span("llm", op="parse_async") as details:
+                    details["attempt"] = attempt
+                    response = await self.client.post(
+                        self.api_endpoint, params=params, json=payload, headers=headers
+                    )
+                record_bytes(
+                    "llm",
+                    sent=len(response.request.content),
+                    received=len(response.content),
+                )
+                if response.status_code in RETRY_STATUS_CODES:
+                    retry_after = response.headers.get("Retry-After")
+                    last_error = ParserError(
+                        f"Parser returned HTTP {response.status_code}."
+                    )
+                else:
+                    response.raise_for_status()
+                    return response.json()
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                last_error = e
+            except httpx.HTTPError as e:
+                raise ParserError(f"API request failed: {e}") from e
+            except ValueError as e:
+                raise ParserError(
+                    "API returned malformed data. Could not parse the response."
+                ) from e
+
+            if attempt < self.retry.max_attempts:
+                get_metrics().inc("llm_retries_total")
+                await asyncio.sleep(self.retry.delay(attempt, retry_after))
+
+        raise ParserError(
+            f"API request failed after {self.retry.max_attempts} attempts: "
+            f"{last_error}"
+        )
+
+    async def aclose(self) -> None:
+        """Closes pooled connections."""
+        await self.client.aclose()
@@ -0,0 +1,109 @@
+"""
+Incremental parser for a JSON object that arrives in pieces.
+
+A streamed LLM answer is a single JSON object whose text arrives a few
+tokens at a time. PartialJSONParser scans every chunk exactly once,
+tracking string and nesting state. Each top-level member is decoded as soon
+as the comma or closing brace after it arrives, so callers can show a field
+the moment it is complete instead of waiting for the whole document. Text
+before the opening brace, such as a ```json fence, is skipped.
+"""
+
+import json
+from typing import Any, Dict, List
+
+
+class PartialJSONParser:
+    """
+    Decodes the top-level members of a streamed JSON object as they complete.
+
+    Attributes:
+        result (dict): Every member completed so far.
+        done (bool): True once the object's closing brace has been seen.
+
+    Methods:
+        feed(chunk):
+            Consumes more text and returns the members it completed.
+        close():
+            Returns the full object, or raises if the stream was cut short.
+    """
+
+    def __init__(self):
+        self.result: Dict[str, Any] = {}
+        self.done = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # Text of the member currently being received, split by chunk.
+        self._member: List[str] = []
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """
+        Consumes the next piece of the document.
+
+        Args:
+            chunk: Any slice of the text, however it was split.
+
+        Returns:
+            The members completed by this chunk, possibly empty.
+
+        Raises:
+            ValueError: If a completed member is not valid JSON.
+        """
+        completed: Dict[str, Any] = {}
+        start = 0
+        for i, ch in enumerate(chunk):
+            if self.done:
+                break
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    start = i + 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._member.append(chunk[start:i])
+                    self._complete_member(completed)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._member.append(chunk[start:i])
+                self._complete_member(completed)
+                start = i + 1
+        if self._started and not self.done:
+            self._member.append(chunk[start:])
+        return completed
+
+    def _complete_member(self, completed: Dict[str, Any]) -> None:
+        text = "".join(self._member).strip()
+        self._member = []
+        if not text:
+            return
+        member = json.loads("{" + text + "}")
+        completed.update(member)
+        self.result.update(member)
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Returns the complete object.
+
+        Raises:
+            ValueError: If the closing brace never arrived.
+        """
+        if not self.done:
+            raise ValueError("JSON object ended before its closing brace.")
+        return self.result
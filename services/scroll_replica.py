@@ -0,0 +1,281 @@
+"""
+Listener-backed, in-process replica of a user's scroll headers.
+
+Browsing re-ran the same created_by / created_at query on every Streamlit
+rerun. With replica mode on (SCROLL_REPLICA=1), an on_snapshot listener is
+attached per active user instead. The first snapshot loads the user's
+scrolls once. After that, only added, modified or removed documents come
+over the wire. Headers are kept in memory, sorted newest first, so paging,
+status filters and per-status counts are served locally in microseconds
+and billed no reads.
+
+Replicas of users who stop browsing are closed after an idle timeout. If a
+listener dies, its replica reports itself unhealthy and callers fall back
+to querying Firestore.
+"""
+
+import bisect
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from services.metrics import document_size, get_metrics, record_reads
+from services.structured_logging import correlation, get_logger
+
+logger = get_logger(__name__)
+
+REPLICA_ENABLED = os.environ.get("SCROLL_REPLICA", "0") == "1"
+DEFAULT_IDLE_SECONDS = float(os.environ.get("SCROLL_REPLICA_IDLE_SECONDS", "900"))
+DEFAULT_MAX_REPLICAS = int(os.environ.get("SCROLL_REPLICA_MAX_USERS", "200"))
+DEFAULT_READY_TIMEOUT_SECONDS = 5.0
+# The user_id scope that replicates every scroll, for apps without per-user
+# browsing.
+ALL_SCROLLS: Optional[str] = None
+
+# Sort key: newest first, then by ID. Negated timestamps keep the list ascending.
+SortKey = Tuple[float, str]
+
+
+def project(data: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Keeps only the given dotted field paths of a document, like Query.select."""
+    if fields is None:
+        return data
+    result: Dict[str, Any] = {}
+    for path in fields:
+        parts = path.split(".")
+        source: Any = data
+        for part in parts:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = source
+    return result
+
+
+def _sort_key(doc_id: str, data: Dict[str, Any]) -> SortKey:
+    created_at = (data.get("metadata") or {}).get("created_at")
+    if isinstance(created_at, datetime):
+        timestamp = created_at.timestamp()
+    else:
+        # Not yet resolved by the server: treat as just created.
+        timestamp = datetime.now(timezone.utc).timestamp()
+    return (-timestamp, doc_id)
+
+
+class ScrollReplica:
+    """
+    In-memory, newest-first index of one user's scroll headers.
+
+    Methods:
+        wait_ready(timeout):
+            Blocks until the initial snapshot has been applied.
+        page(page, page_size, status=None):
+            Returns one page of (scroll_id, header) pairs locally.
+        counts(statuses):
+            Returns (total, {status: count}) locally.
+        close():
+            Detaches the listener.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        user_id: Optional[str],
+        fields: Optional[Sequence[str]] = None,
+        collection_name: str = "scrolls",
+    ):
+        """
+        Attaches the listener.
+
+        Args:
+            db: A Firestore client.
+            user_id: Replicate this user's scrolls (metadata.created_by), or
+                every scroll for ALL_SCROLLS (None).
+            fields: Optional. Header field paths to keep; listeners cannot
+                project, so other fields are dropped on arrival.
+            collection_name: The collection holding the scrolls.
+        """
+        self.user_id = user_id
+        self.fields = list(fields) if fields is not None else None
+        self.collection_name = collection_name
+        self.last_access = time.monotonic()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, SortKey] = {}
+        self._order: List[SortKey] = []
+
+        query = db.collection(collection_name)
+        if user_id is not None:
+            query = query.where(filter=FieldFilter("metadata.created_by", "==", user_id))
+        self._watch = query.on_snapshot(self._on_snapshot)
+
+    @property
+    def healthy(self) -> bool:
+        """False once the listener has stopped (closed or failed)."""
+        return self._watch is not None and self._watch.is_active
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial snapshot has been applied."""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float = DEFAULT_READY_TIMEOUT_SECONDS) -> bool:
+        return self._ready.wait(timeout)
+
+    def _on_snapshot(self, snapshot: Any, changes: Sequence[Any], read_time: Any) -> None:
+        # Runs on the listener's thread; only changed documents are in `changes`.
+        with correlation(f"replica:{self.user_id}"):
+            size = 0
+            with self._lock:
+                for change in changes:
+                    doc = change.document
+                    self._remove(doc.id)
+                    if change.type.name != "REMOVED":
+                        data = doc.to_dict() or {}
+                        size += document_size(data)
+                        self._insert(doc.id, project(data, self.fields))
+            if changes:
+                record_reads(self.collection_name, len(changes), size)
+                get_metrics().inc("replica_changes_total", len(changes))
+                logger.debug("Replica updated", extra={"user_id": self.user_id, "changes": len(changes)})
+            self._ready.set()
+
+    def _insert(self, doc_id: str, data: Dict[str, Any]) -> None:
+        key = _sort_key(doc_id, data)
+        bisect.insort(self._order, key)
+        self._keys[doc_id] = key
+        self._docs[doc_id] = data
+
+    def _remove(self, doc_id: str) -> None:
+        key = self._keys.pop(doc_id, None)
+        if key is None:
+            return
+        i = bisect.bisect_left(self._order, key)
+        if i < len(self._order) and self._order[i] == key:
+            del self._order[i]
+        self._docs.pop(doc_id, None)
+
+    def page(
+        self,
+        page: int,
+        page_size: int,
+        status: Optional[str] = None,
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """
+        Returns one page of scroll headers, newest first.
+
+        Args:
+            page: Zero-based page number.
+            page_size: Headers per page.
+            status: Optional. Only scrolls whose metadata.status matches.
+
+        Returns:
+            A (items, has_next_page) tuple; items are (scroll_id, header).
+        """
+        self.last_access = time.monotonic()
+        start = page * page_size
+        with self._lock:
+            if status is None:
+                ids = [doc_id for _, doc_id in self._order[start:start + page_size + 1]]
+            else:
+                ids = [
+                    doc_id for _, doc_id in self._order
+                    if (self._docs[doc_id].get("metadata") or {}).get("status") == status
+                ][start:start + page_size + 1]
+            items = [(doc_id, self._docs[doc_id]) for doc_id in ids[:page_size]]
+        return items, len(ids) > page_size
+
+    def counts(self, statuses: Sequence[str]) -> Tuple[int, Dict[str, int]]:
+        """Counts replicated scrolls in total and per status."""
+        self.last_access = time.monotonic()
+        by_status = {status: 0 for status in statuses}
+        with self._lock:
+            for data in self._docs.values():
+                status = (data.get("metadata") or {}).get("status")
+                if status in by_status:
+                    by_status[status] += 1
+            return len(self._docs), by_status
+
+    def close(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+
+class ReplicaManager:
+    """
+    Keeps one ScrollReplica per active user and closes idle ones.
+
+    Methods:
+        get(user_id):
+            Returns the user's ready replica, or None to fall back to a query.
+        close():
+            Detaches every listener.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        fields: Optional[Sequence[str]] = None,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        max_replicas: int = DEFAULT_MAX_REPLICAS,
+    ):
+        self.db = db
+        self.fields = fields
+        self.idle_seconds = idle_seconds
+        self.max_replicas = max_replicas
+        self._replicas: Dict[Optional[str], ScrollReplica] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        user_id: Optional[str],
+        timeout: float = DEFAULT_READY_TIMEOUT_SECONDS,
+    ) -> Optional[ScrollReplica]:
+        """
+        Returns the replica for user_id, attaching a listener on first use.
+
+        Only the call that attaches the listener waits, up to `timeout`, for
+        the initial snapshot; later calls never block. Returns None while
+        the initial snapshot has not arrived or when the listener has
+        failed, so the caller can query Firestore directly for this rerun.
+        """
+        attached = False
+        with self._lock:
+            self._evict_idle()
+            replica = self._replicas.get(user_id)
+            if replica is not None and not replica.healthy:
+                logger.warning("Scroll replica listener stopped; reattaching", extra={"user_id": user_id})
+                replica.close()
+                replica = None
+            if replica is None:
+                if len(self._replicas) >= self.max_replicas:
+                    return None
+                replica = ScrollReplica(self.db, user_id, self.fields)
+                self._replicas[user_id] = replica
+                attached = True
+        replica.last_access = time.monotonic()
+        ready = replica.wait_ready(timeout) if attached else replica.ready
+        return replica if ready else None
+
+    def _evict_idle(self) -> None:
+        now = time.monotonic()
+        for user_id, replica in list(self._replicas.items()):
+            if now - replica.last_access > self.idle_seconds:
+                replica.close()
+                del self._replicas[user_id]
+
+    def close(self) -> None:
+        with self._lock:
+            for replica in self._replicas.values():
+                replica.close()
+            self._replicas.clear()
@@ -0,0 +1,436 @@
+"""
+Pluggable full-text search for scrolls.
+
+SearchBackend is the interface display_recent_scrolls searches through.
+AlgoliaSearchBackend wraps the hosted `codessa_scrolls` index.
+LocalSearchBackend is an embedded SQLite FTS5 index, ranked with BM25 over
+summary, topics, tools and raw_text and filtered by metadata.created_by.
+Selective queries take well under a millisecond, with no vendor round trip.
+FallbackSearchBackend queries Algolia and switches to the local index
+when Algolia fails.
+
+The local index takes the same write calls as an Algolia index
+(save_objects, partial_update_objects, delete_objects). FanoutIndex lets
+the search outbox worker apply every create, edit and delete to both. Each
+process keeps its own local index, so this suits single-node deployments.
+
+Configuration (environment):
+    SEARCH_BACKEND: "algolia" (default), "local", or "algolia+local"
+        (Algolia with the local index as fallback).
+    LOCAL_SEARCH_PATH: SQLite file for the local index; in memory if unset.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Set
+
+from services.hydration import HIT_DISPLAY_ATTRIBUTES
+from services.metrics import get_metrics, span
+from services.pagination import iter_pages, ordered_query
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "algolia").lower()
+LOCAL_SEARCH_PATH = os.environ.get("LOCAL_SEARCH_PATH", "")
+
+# BM25 column weights for (summary, topics, tools, raw_text).
+COLUMN_WEIGHTS = (4.0, 2.0, 2.0, 1.0)
+# nbHits is exact up to this many matches, like Algolia's exhaustive count limit.
+MAX_COUNTED_HITS = 1000
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchBackend(Protocol):
+    def search(
+        self,
+        query: str,
+        page: int = 0,
+        hits_per_page: int = 20,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Returns an Algolia-shaped response: {"hits", "nbHits", "nbPages"}."""
+        ...
+
+
+class _DoneTask:
+    """Completed write, mirroring the Algolia response object's wait()."""
+
+    def wait(self) -> "_DoneTask":
+        return self
+
+
+def _join(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """Turns free text into an FTS5 expression; like Algolia, only the last term is prefix-matched."""
+    terms = _TOKEN.findall(query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+class AlgoliaSearchBackend:
+    """SearchBackend over an Algolia index (algoliasearch SearchIndex)."""
+
+    def __init__(self, index: Any):
+        self.index = index
+
+    def search(
+        self,
+        query: str,
+        page: int = 0,
+        hits_per_page: int = 20,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        params = {
+            "page": page,
+            "hitsPerPage": hits_per_page,
+            "attributesToRetrieve": HIT_DISPLAY_ATTRIBUTES,
+            "attributesToHighlight": [],
+        }
+        if created_by is not None:
+            params["filters"] = f"metadata.created_by:{created_by}"
+        with span("algolia", op="search"):
+            return self.index.search(query, params)
+
+
+class LocalSearchBackend:
+    """
+    Embedded SQLite FTS5 search index.
+
+    Methods:
+        search(query, page=0, hits_per_page=20, created_by=None):
+            BM25-ranked search, optionally limited to one user's scrolls.
+        save_objects(records) / partial_update_objects(records, options=None)
+        / delete_objects(object_ids):
+            Algolia-compatible writes.
+        backfill(db, collection_name="scrolls"):
+            Rebuilds the index from Firestore.
+    """
+
+    def __init__(self, path: str = LOCAL_SEARCH_PATH):
+        self._lock = threading.Lock()
+        # Object IDs written or deleted through the Algolia-compatible calls
+        # while a backfill runs; the backfill leaves them alone, since its
+        # Firestore pages may predate those writes.
+        self._written_during_backfill: Optional[Set[str]] = None
+        # Partial updates for records not indexed yet, merged over the
+        # backfilled record when it arrives.
+        self._pending_partials: Dict[str, Dict[str, Any]] = {}
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        with self._lock, self._conn:
+            if path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(records_fts)")]
+            if "owner" in columns:
+                # Indexes built before tenant filtering moved to records.created_by
+                # are dropped; build_search backfills the empty index.
+                self._conn.execute("DROP TABLE records_fts")
+                self._conn.execute("DROP TABLE records")
+                self._conn.execute("DROP TABLE IF EXISTS meta")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " object_id TEXT PRIMARY KEY, created_by TEXT, record TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS records_created_by ON records (created_by)")
+            # Backfill progress: the page token to resume from, and whether it finished.
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5("
+                " summary, topics, tools, raw_text,"
+                " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+
+    # --- Writes (Algolia-compatible) ---
+
+    def save_objects(self, records: Iterable[Dict[str, Any]]) -> _DoneTask:
+        with self._lock, self._conn:
+            for record in records:
+                self._mark_written(record["objectID"])
+                self._upsert(record)
+        return _DoneTask()
+
+    def save_object(self, record: Dict[str, Any]) -> _DoneTask:
+        return self.save_objects([record])
+
+    def partial_update_objects(
+        self, records: Iterable[Dict[str, Any]], options: Optional[Dict[str, Any]] = None
+    ) -> _DoneTask:
+        create = (options or {}).get("createIfNotExists", False)
+        with self._lock, self._conn:
+            for changes in records:
+                object_id = changes["objectID"]
+                current = self._load(object_id)
+                if current is None and not create:
+                    if self._written_during_backfill is not None and object_id not in self._written_during_backfill:
+                        pending = self._pending_partials.setdefault(object_id, {})
+                        pending.update(changes)
+                    continue
+                self._mark_written(object_id)
+                self._upsert({**(current or {}), **changes})
+        return _DoneTask()
+
+    def delete_objects(self, object_ids: Iterable[str]) -> _DoneTask:
+        with self._lock, self._conn:
+            for object_id in object_ids:
+                self._mark_written(object_id)
+                self._delete(object_id)
+        return _DoneTask()
+
+    def _mark_written(self, object_id: str) -> None:
+        if self._written_during_backfill is not None:
+            self._written_during_backfill.add(object_id)
+            self._pending_partials.pop(object_id, None)
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Optional[str]) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def backfill_complete(self) -> bool:
+        """True once a backfill of this index has run to the end."""
+        with self._lock:
+            return self._get_meta("backfill_complete") == "1"
+
+    def _load(self, object_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            "SELECT record FROM records WHERE object_id = ?", (object_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _upsert(self, record: Dict[str, Any]) -> None:
+        object_id = record["objectID"]
+        self._delete(object_id)
+        created_by = (record.get("metadata") or {}).get("created_by")
+        cursor = self._conn.execute(
+            "INSERT INTO records (object_id, created_by, record) VALUES (?, ?, ?)",
+            (object_id, created_by, json.dumps(record, default=str)),
+        )
+        # The FTS row shares the records row's rowid.
+        self._conn.execute(
+            "INSERT INTO records_fts (rowid, summary, topics, tools, raw_text) VALUES (?, ?, ?, ?, ?)",
+            (
+                cursor.lastrowid,
+                _join(record.get("summary")),
+                _join(record.get("topics")),
+                _join(record.get("tools")),
+                _join(record.get("raw_text")),
+            ),
+        )
+
+    def _delete(self, object_id: str) -> None:
+        row = self._conn.execute(
+            "SELECT rowid FROM records WHERE object_id = ?", (object_id,)
+        ).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM records_fts WHERE rowid = ?", row)
+            self._conn.execute("DELETE FROM records WHERE rowid = ?", row)
+
+    # --- Search ---
+
+    def search(
+        self,
+        query: str,
+        page: int = 0,
+        hits_per_page: int = 20,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        expression = _match_expression(query)
+        if expression is None:
+            return {"hits": [], "nbHits": 0, "nbPages": 0, "page": page}
+        where, params = "records_fts MATCH ?", [expression]
+        if created_by is not None:
+            # An exact match on the stored uid; the FTS tokenizer would
+            # case-fold and split it, matching other users' ids.
+            where += " AND r.created_by = ?"
+            params.append(created_by)
+        source = f"records_fts JOIN records r ON r.rowid = records_fts.rowid WHERE {where}"
+        weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+        with span("local_search", op="search"), self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {source} LIMIT ?)",
+                (*params, MAX_COUNTED_HITS),
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT r.record FROM {source} ORDER BY bm25(records_fts, {weights}) LIMIT ? OFFSET ?",
+                (*params, hits_per_page, page * hits_per_page),
+            ).fetchall()
+        hits = []
+        for (raw,) in rows:
+            record = json.loads(raw)
+            hits.append({
+                "objectID": record["objectID"],
+                **{k: record[k] for k in HIT_DISPLAY_ATTRIBUTES if k in record},
+            })
+        return {
+            "hits": hits,
+            "nbHits": total,
+            "nbPages": math.ceil(total / hits_per_page) if hits_per_page else 0,
+            "page": page,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def backfill(self, db: Any, collection_name: str = "scrolls", page_size: int = 500) -> int:
+        """
+        Indexes every scroll in Firestore, one page at a time.
+
+        Progress is stored with each page, so a backfill cut short by a
+        crash or restart resumes after the last committed page, and
+        backfill_complete is set when it reaches the end.
+
+        Runs alongside the outbox worker. A scroll the outbox creates or
+        deletes after the backfill starts is skipped, so a page read before
+        that write cannot overwrite it or bring a deleted scroll back. A
+        partial update for a scroll not indexed yet is merged over its
+        backfilled record.
+
+        Returns:
+            The number of documents indexed.
+        """
+        with self._lock:
+            self._written_during_backfill = set()
+            self._pending_partials = {}
+            page_token = self._get_meta("backfill_page_token")
+        query = ordered_query(db.collection(collection_name).select(["content", "metadata"]), [])
+        indexed = skipped = 0
+        try:
+            pages = iter_pages(query, [], page_size, page_token=page_token, collection=collection_name)
+            for snapshots, next_token in pages:
+                with self._lock, self._conn:
+                    for doc in snapshots:
+                        if doc.id in self._written_during_backfill:
+                            skipped += 1
+                            continue
+                        record = scroll_to_record(doc.id, doc.to_dict() or {})
+                        self._upsert({**record, **self._pending_partials.pop(doc.id, {})})
+                        indexed += 1
+                    self._set_meta("backfill_page_token", next_token)
+                    if next_token is None:
+                        self._set_meta("backfill_complete", "1")
+        finally:
+            with self._lock:
+                self._written_during_backfill = None
+                self._pending_partials = {}
+        logger.info(
+            "Local search index backfilled",
+            extra={"documents": indexed, "skipped": skipped, "resumed": page_token is not None},
+        )
+        return indexed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def scroll_to_record(scroll_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Builds the search record for a Firestore scroll document, as the apps do."""
+    metadata = doc.get("metadata") or {}
+    created_at = metadata.get("created_at")
+    return {
+        "objectID": scroll_id,
+        **(doc.get("content") or {}),
+        "metadata": {
+            "created_by": metadata.get("created_by"),
+            "created_at": int(created_at.timestamp()) if isinstance(created_at, datetime) else created_at,
+        },
+    }
+
+
+class FallbackSearchBackend:
+    """Searches the primary backend, and the fallback if the primary raises."""
+
+    def __init__(self, primary: SearchBackend, fallback: SearchBackend):
+        self.primary = primary
+        self.fallback = fallback
+
+    def search(
+        self,
+        query: str,
+        page: int = 0,
+        hits_per_page: int = 20,
+        created_by: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        try:
+            return self.primary.search(query, page, hits_per_page, created_by)
+        except Exception as e:
+            get_metrics().inc("search_fallbacks_total")
+            logger.warning("Primary search failed, using local index: %s", e)
+            return self.fallback.search(query, page, hits_per_page, created_by)
+
+
+class FanoutIndex:
+    """
+    Applies Algolia-style writes to several indexes, in order.
+
+    Put the local index first: it cannot fail on the network, and outbox
+    retries re-apply writes idempotently if a later index fails.
+    """
+
+    def __init__(self, indexes: Sequence[Any]):
+        self.indexes = list(indexes)
+
+    def save_objects(self, records: List[Dict[str, Any]]) -> "_FanoutTask":
+        return _FanoutTask([index.save_objects(records) for index in self.indexes])
+
+    def partial_update_objects(
+        self, records: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None
+    ) -> "_FanoutTask":
+        return _FanoutTask([index.partial_update_objects(records, options) for index in self.indexes])
+
+    def delete_objects(self, object_ids: List[str]) -> "_FanoutTask":
+        return _FanoutTask([index.delete_objects(object_ids) for index in self.indexes])
+
+
+class _FanoutTask:
+    def __init__(self, tasks: List[Any]):
+        self.tasks = tasks
+
+    def wait(self) -> "_FanoutTask":
+        for task in self.tasks:
+            task.wait()
+        return self
+
+
+def build_search(algolia_index: Any, db: Any = None, mode: str = SEARCH_BACKEND):
+    """
+    Builds the search backend and the index the outbox should sync to.
+
+    Args:
+        algolia_index: The Algolia index, or None when not configured.
+        db: Optional. Firestore client used to backfill, in a background
+            thread, a local index whose backfill has not completed.
+        mode: "algolia", "local" or "algolia+local".
+
+    Returns:
+        A (search_backend, sync_index, local_index) tuple; local_index is
+        None in "algolia" mode.
+    """
+    if mode == "algolia" or mode not in ("local", "algolia+local"):
+        return AlgoliaSearchBackend(algolia_index), algolia_index, None
+
+    local = LocalSearchBackend(LOCAL_SEARCH_PATH)
+    if db is not None and not local.backfill_complete:
+        threading.Thread(
+            target=local.backfill, args=(db,), name="local-search-backfill", daemon=True
+        ).start()
+    if mode == "local" or algolia_index is None:
+        return local, local, local
+    backend = FallbackSearchBackend(AlgoliaSearchBackend(algolia_index), local)
+    return backend, FanoutIndex([local, algolia_index]), local
@@ -0,0 +1,455 @@
+"""
+Transactional outbox for syncing scrolls to the Algolia search index.
+
+Create, edit and delete used to call Algolia and block on `.wait()` inside
+the user's request, rolling back the Firestore write by hand if indexing
+failed. SearchOutbox instead writes an outbox entry into a `search_outbox`
+collection in the same WriteBatch as the scroll change, so both commit or
+neither does, and write latency is bounded by Firestore alone.
+OutboxWorker drains the outbox in the background with batched
+`save_objects` / `partial_update_objects` / `delete_objects` calls. Every
+operation is keyed by objectID, so a retried drain is idempotent. When a
+batch fails, its records are retried one at a time so a single bad record
+cannot hold up the rest. A record that still fails after
+SEARCH_OUTBOX_MAX_ATTEMPTS drains is moved to `search_outbox_dead`.
+"""
+
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud import firestore
+
+from services.metrics import get_metrics, record_writes, span
+from services.structured_logging import correlation, get_correlation_id, get_logger
+
+logger = get_logger(__name__)
+
+OUTBOX_COLLECTION = "search_outbox"
+DEAD_LETTER_COLLECTION = "search_outbox_dead"
+DEFAULT_DRAIN_BATCH_SIZE = 500
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("SEARCH_OUTBOX_MAX_ATTEMPTS", "10"))
+# Firestore's limit on writes per batch.
+MAX_BATCH_WRITES = 500
+# Records retried one at a time before a failing index is treated as down.
+INDEX_PROBE_RECORDS = 3
+DEFAULT_DRAIN_INTERVAL_SECONDS = float(
+    os.environ.get("SEARCH_OUTBOX_INTERVAL_SECONDS", "2")
+)
+
+OP_UPSERT = "upsert"
+OP_PARTIAL = "partial"
+OP_DELETE = "delete"
+
+
+def coalesce(entries: List[Dict[str, Any]]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Folds outbox entries (oldest first) into one operation per objectID.
+
+    A delete wins over anything before it, an upsert replaces earlier
+    operations, and a partial update after an upsert is merged into it.
+
+    Returns:
+        A dictionary mapping objectID to (op, record).
+    """
+    folded: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+    for entry in entries:
+        object_id, op, record = entry["object_id"], entry["op"], entry.get("record")
+        previous = folded.get(object_id)
+        if op == OP_PARTIAL and previous is not None and previous[0] in (OP_UPSERT, OP_PARTIAL):
+            folded[object_id] = (previous[0], {**(previous[1] or {}), **(record or {})})
+        else:
+            folded[object_id] = (op, record)
+    return folded
+
+
+class SearchOutbox:
+    """
+    Writes scroll changes to Firestore together with their index updates.
+
+    Methods:
+        create(doc_ref, data, record):
+            Creates a document and enqueues a full index upsert.
+        update(doc_ref, updates, partial_record):
+            Updates a document and enqueues a partial index update.
+        delete(doc_ref, object_id=None):
+            Deletes a document and enqueues an index delete.
+        drain(index, max_items=500):
+            Pushes pending entries to the index and removes them.
+        lag_seconds():
+            Returns the age of the oldest pending entry.
+    """
+
+    def __init__(
+        self,
+        db: Any,
+        collection_name: str = OUTBOX_COLLECTION,
+        dead_letter_collection: str = DEAD_LETTER_COLLECTION,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.db = db
+        self.collection = db.collection(collection_name)
+        self.dead_letters = db.collection(dead_letter_collection)
+        self.max_attempts = max_attempts
+        # Age of the oldest entry seen by the most recent drain.
+        self.last_lag_seconds = 0.0
+        # The error of a record the most recent drain could not sync, if any.
+        self.last_error: Optional[str] = None
+
+    def enqueue(
+        self,
+        batch: Any,
+        op: str,
+        object_id: str,
+        record: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Adds an outbox entry to a WriteBatch that also carries the change.
+
+        Args:
+            batch: The WriteBatch the scroll change is written in.
+            op: One of "upsert", "partial" or "delete".
+            object_id: The Algolia objectID (the scroll ID).
+            record: The record (upsert) or changed attributes (partial).
+        """
+        batch.set(
+            self.collection.document(str(uuid.uuid4())),
+            {
+                "object_id": object_id,
+                "op": op,
+                "record": record,
+                "attempts": 0,
+                "enqueued_at": firestore.SERVER_TIMESTAMP,
+                # Lets the background drain be traced back to the UI action.
+                "correlation_id": get_correlation_id(),
+            },
+        )
+
+    def create(self, doc_ref: Any, data: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """Creates a document and enqueues a full index upsert atomically."""
+        batch = self.db.batch()
+        batch.set(doc_ref, data)
+        self.enqueue(batch, OP_UPSERT, record["objectID"], record)
+        self._commit(batch, "create", doc_ref)
+
+    def update(
+        self,
+        doc_ref: Any,
+        updates: Dict[str, Any],
+        partial_record: Dict[str, Any]
+    ) -> None:
+        """Updates a document and enqueues a partial index update atomically."""
+        batch = self.db.batch()
+        batch.update(doc_ref, updates)
+        self.enqueue(batch, OP_PARTIAL, partial_record["objectID"], partial_record)
+        self._commit(batch, "update", doc_ref)
+
+    def delete(self, doc_ref: Any, object_id: Optional[str] = None) -> None:
+        """Deletes a document and enqueues an index delete atomically."""
+        batch = self.db.batch()
+        batch.delete(doc_ref)
+        self.enqueue(batch, OP_DELETE, object_id or doc_ref.id)
+        self._commit(batch, "delete", doc_ref)
+
+    def _commit(self, batch: Any, op: str, doc_ref: Any) -> None:
+        collection = doc_ref.parent.id
+        with span("firestore", op=op, collection=collection):
+            batch.commit()
+        record_writes(collection, 1)
+        record_writes(self.collection.id, 1)
+
+    def drain(self, index: Any, max_items: int = DEFAULT_DRAIN_BATCH_SIZE) -> int:
+        """
+        Pushes up to `max_items` pending entries to the index.
+
+        Entries are removed only after the index has acknowledged them. If
+        the batch fails, each record is pushed on its own. When the others
+        sync, the entries of a record that still fails get their attempt
+        counter bumped and stay queued, or are moved to the dead-letter
+        collection once they reach max_attempts. When nothing syncs, the
+        index is assumed to be down: every entry's counter is bumped, none
+        is dead-lettered, and the error is raised.
+
+        Args:
+            index: The Algolia index to sync.
+            max_items: Maximum number of outbox entries to process.
+
+        Returns:
+            The number of outbox entries removed from the outbox.
+
+        Raises:
+            Exception: Whatever the Algolia client raised, if no record
+                could be synced.
+        """
+        with span("firestore", op="query", collection=self.collection.id):
+            snapshots = list(
+                self.collection.order_by("enqueued_at").limit(max_items).stream()
+            )
+        self.last_error = None
+        if not snapshots:
+            self.last_lag_seconds = 0.0
+            return 0
+        self.last_lag_seconds = self._age((snapshots[0].to_dict() or {}).get("enqueued_at"))
+
+        entries = [doc.to_dict() for doc in snapshots]
+        folded = coalesce(entries)
+        try:
+            with span("algolia", op="drain") as details:
+                details["records"] = len(folded)
+                self._push(index, *self._split(folded))
+            failures: Dict[str, Exception] = {}
+        except Exception as e:
+            logger.warning("Search outbox batch failed, retrying records one at a time: %s", e)
+            failures = self._push_each(index, folded, self._attempts(entries))
+            if failures is None or len(failures) == len(folded):
+                self._bump_attempts(snapshots)
+                raise e
+
+        synced = [doc for doc, entry in zip(snapshots, entries) if entry["object_id"] not in failures]
+        get_metrics().inc("algolia_records_synced_total", len(folded) - len(failures))
+        logger.info(
+            "Search outbox drained",
+            extra={
+                "entries": len(synced),
+                "records": len(folded) - len(failures),
+                "failed_records": len(failures),
+                "origins": sorted({e["correlation_id"] for e in entries if e.get("correlation_id")}),
+            },
+        )
+        self._write([("delete", doc.reference, None) for doc in synced])
+        record_writes(self.collection.id, len(synced))
+        if failures:
+            return len(synced) + self._retry_later(snapshots, entries, failures)
+        return len(synced)
+
+    @staticmethod
+    def _split(
+        folded: Dict[str, Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> Tuple[List[Any], List[Any], List[str]]:
+        upserts = [rec for op, rec in folded.values() if op == OP_UPSERT]
+        partials = [rec for op, rec in folded.values() if op == OP_PARTIAL]
+        deletes = [oid for oid, (op, _) in folded.items() if op == OP_DELETE]
+        return upserts, partials, deletes
+
+    @staticmethod
+    def _push(index: Any, upserts: List[Any], partials: List[Any], deletes: List[str]) -> None:
+        tasks = []
+        if upserts:
+            tasks.append(index.save_objects(upserts))
+        if partials:
+            tasks.append(
+                index.partial_update_objects(partials, {"createIfNotExists": False})
+            )
+        if deletes:
+            tasks.append(index.delete_objects(deletes))
+        for task in tasks:
+            task.wait()
+
+    @staticmethod
+    def _attempts(entries: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Returns the highest attempt count among each record's entries."""
+        attempts: Dict[str, int] = {}
+        for entry in entries:
+            object_id = entry["object_id"]
+            attempts[object_id] = max(attempts.get(object_id, 0), entry.get("attempts", 0))
+        return attempts
+
+    def _push_each(
+        self,
+        index: Any,
+        folded: Dict[str, Tuple[str, Optional[Dict[str, Any]]]],
+        attempts: Dict[str, int],
+    ) -> Optional[Dict[str, Exception]]:
+        """
+        Pushes each record on its own, least-retried first.
+
+        Returns:
+            The error of each record that failed, or None if the first
+            INDEX_PROBE_RECORDS records all failed and the rest were not tried.
+        """
+        failures: Dict[str, Exception] = {}
+        ordered = sorted(folded.items(), key=lambda item: attempts[item[0]])
+        for tried, (object_id, operation) in enumerate(ordered):
+            if tried == INDEX_PROBE_RECORDS and len(failures) == tried:
+                return None
+            try:
+                with span("algolia", op="drain_record"):
+                    self._push(index, *self._split({object_id: operation}))
+            except Exception as e:
+                failures[object_id] = e
+        return failures
+
+    def lag_seconds(self) -> float:
+        """
+        Returns the age of the oldest pending entry, or 0 if none is pending.
+        """
+        oldest = list(self.collection.order_by("enqueued_at").limit(1).stream())
+        if not oldest:
+            return 0.0
+        return self._age((oldest[0].to_dict() or {}).get("enqueued_at"))
+
+    @staticmethod
+    def _age(enqueued_at: Optional[datetime]) -> float:
+        if enqueued_at is None:
+            return 0.0
+        return max(0.0, (datetime.now(timezone.utc) - enqueued_at).total_seconds())
+
+    def _retry_later(
+        self,
+        snapshots: List[Any],
+        entries: List[Dict[str, Any]],
+        failures: Dict[str, Exception],
+    ) -> int:
+        """
+        Bumps the attempt counter of the failed records' entries, and moves
+        a record's entries to the dead-letter collection once any of them
+        reaches max_attempts. Only called when other records in the drain
+        synced, so the failures are the records' own.
+
+        Returns:
+            The number of entries dead-lettered.
+        """
+        attempts = {
+            oid: count + 1 for oid, count in self._attempts(entries).items() if oid in failures
+        }
+        dead = {oid for oid, count in attempts.items() if count >= self.max_attempts}
+
+        writes = []
+        for doc, entry in zip(snapshots, entries):
+            object_id = entry["object_id"]
+            if object_id in dead:
+                writes.append(("set", self.dead_letters.document(doc.id), {
+                    **entry,
+                    "attempts": attempts[object_id],
+                    "last_error": str(failures[object_id]),
+                    "dead_lettered_at": firestore.SERVER_TIMESTAMP,
+                }))
+                writes.append(("delete", doc.reference, None))
+            elif object_id in failures:
+                writes.append(("update", doc.reference, {"attempts": firestore.Increment(1)}))
+
+        object_id, error = next(iter(failures.items()))
+        self.last_error = f"{len(failures)} record(s) failed to sync, e.g. {object_id}: {error}"
+        try:
+            self._write(writes)
+        except Exception as e:
+            logger.warning("Failed to record outbox retry attempts: %s", e)
+            return 0
+
+        dead_entries = sum(entry["object_id"] in dead for entry in entries)
+        if dead:
+            get_metrics().inc("search_outbox_dead_letters_total", dead_entries)
+            logger.error(
+                "Search outbox records dead-lettered",
+                extra={
+                    "object_ids": sorted(dead),
+                    "entries": dead_entries,
+                    "max_attempts": self.max_attempts,
+                },
+            )
+            record_writes(self.dead_letters.id, dead_entries)
+            record_writes(self.collection.id, dead_entries)
+        return dead_entries
+
+    def _bump_attempts(self, snapshots: List[Any]) -> None:
+        try:
+            self._write([
+                ("update", doc.reference, {"attempts": firestore.Increment(1)}) for doc in snapshots
+            ])
+        except Exception as e:
+            logger.warning("Failed to record outbox retry attempts: %s", e)
+
+    def _write(self, writes: List[Tuple[str, Any, Optional[Dict[str, Any]]]]) -> None:
+        """Commits (op, reference, data) writes in batches of at most MAX_BATCH_WRITES."""
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for op, reference, data in writes[start:start + MAX_BATCH_WRITES]:
+                if op == "set":
+                    batch.set(reference, data)
+                elif op == "update":
+                    batch.update(reference, data)
+                else:
+                    batch.delete(reference)
+            batch.commit()
+
+
+class OutboxWorker:
+    """
+    Background thread that drains a SearchOutbox into an Algolia index.
+
+    Methods:
+        start():
+            Starts the worker thread (idempotent).
+        stop(timeout=None):
+            Signals the worker to stop and waits for it.
+        stats():
+            Returns drain counters and the current index lag.
+    """
+
+    def __init__(
+        self,
+        outbox: SearchOutbox,
+        index: Any,
+        interval_seconds: float = DEFAULT_DRAIN_INTERVAL_SECONDS,
+        batch_size: int = DEFAULT_DRAIN_BATCH_SIZE,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.outbox = outbox
+        self.index = index
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_backoff_seconds = max_backoff_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "drained_total": 0,
+            "failures": 0,
+            "last_error": None,
+            "last_drain_at": None,
+            "lag_seconds": 0.0,
+        }
+
+    def start(self) -> "OutboxWorker":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="search-outbox", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+    def _run(self) -> None:
+        backoff = self.interval_seconds
+        while not self._stop.is_set():
+            drained = 0
+            try:
+                with correlation():
+                    drained = self.outbox.drain(self.index, self.batch_size)
+                self._stats["drained_total"] += drained
+                self._stats["last_drain_at"] = time.time()
+                # Cleared once a drain syncs everything it read.
+                self._stats["last_error"] = self.outbox.last_error
+                backoff = self.interval_seconds
+            except Exception as e:
+                self._stats["failures"] += 1
+                self._stats["last_error"] = str(e)
+                backoff = min(backoff * 2, self.max_backoff_seconds)
+                logger.warning(
+                    "Search outbox drain failed: %s", e, extra={"retry_in_seconds": backoff}
+                )
+            self._stats["lag_seconds"] = self.outbox.last_lag_seconds
+            # Keep going without sleeping while a backlog remains.
+            if drained == self.batch_size:
+                continue
+            self._stop.wait(backoff)
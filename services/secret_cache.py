@@ -0,0 +1,215 @@
+"""
+In-memory cache for Google Secret Manager lookups.
+
+Every `access_secret_version` call is a network round trip. SecretCache keeps
+fetched values for a configurable TTL, serves a stale value while refreshing
+it in the background once the TTL has passed, and can prefetch a set of
+secrets in parallel at startup, so secret lookups stay off the per-request
+critical path.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from services.metrics import get_metrics, record_bytes, span
+from services.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_TTL_SECONDS = float(os.environ.get("SECRET_CACHE_TTL_SECONDS", "300"))
+DEFAULT_MAX_STALE_SECONDS = float(
+    os.environ.get("SECRET_CACHE_MAX_STALE_SECONDS", "3600")
+)
+
+
+@dataclass
+class _CachedSecret:
+    value: str
+    fetched_at: float
+
+
+class SecretCache:
+    """
+    TTL cache with stale-while-revalidate refresh in front of Secret Manager.
+
+    A value younger than `ttl_seconds` is returned straight from memory. An
+    older value is still returned immediately while a background refresh is
+    scheduled, as long as it is younger than `max_stale_seconds`; past that
+    it is fetched synchronously. Concurrent misses for the same secret share
+    a single fetch.
+
+    Attributes:
+        project_id (str): The Google Cloud project holding the secrets.
+        ttl_seconds (float): How long a value is served without refreshing.
+        max_stale_seconds (float): How long a value may be served while a
+            refresh is pending or failing.
+
+    Methods:
+        get(secret_id, version="latest"):
+            Returns the secret value, from cache when possible.
+        prefetch(secret_ids, version="latest"):
+            Fetches several secrets in parallel and caches them.
+        invalidate(secret_id=None):
+            Drops one cached secret, or all of them.
+        close():
+            Stops the background refresh workers.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        project_id: str,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS,
+        max_workers: int = 4,
+    ):
+        """
+        Initializes the cache.
+
+        Args:
+            client: A secretmanager.SecretManagerServiceClient.
+            project_id: The Google Cloud project holding the secrets.
+            ttl_seconds: How long a value is served without refreshing.
+            max_stale_seconds: How long a value may be served while a
+                refresh is pending or failing.
+            max_workers: Size of the pool used for prefetch and refresh.
+        """
+        self.client = client
+        self.project_id = project_id
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max(max_stale_seconds, ttl_seconds)
+        self._values: Dict[Tuple[str, str], _CachedSecret] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="secret-cache"
+        )
+
+    def get(self, secret_id: str, version: str = "latest") -> str:
+        """
+        Returns a secret value, from cache when possible.
+
+        Args:
+            secret_id: The Secret Manager secret ID.
+            version: Optional. The secret version. Defaults to "latest".
+
+        Returns:
+            The decoded secret payload.
+
+        Raises:
+            Exception: Whatever Secret Manager raised, if the value had to
+                be fetched synchronously and the fetch failed.
+        """
+        key = (secret_id, version)
+        cached = self._values.get(key)
+        if cached is not None:
+            age = time.monotonic() - cached.fetched_at
+            if age < self.ttl_seconds:
+                get_metrics().inc("secret_cache_hits_total", state="fresh")
+                return cached.value
+            if age < self.max_stale_seconds:
+                get_metrics().inc("secret_cache_hits_total", state="stale")
+                self._schedule_refresh(key)
+                return cached.value
+        get_metrics().inc("secret_cache_misses_total")
+        return self._fetch_and_store(key)
+
+    def prefetch(
+        self,
+        secret_ids: Iterable[str],
+        version: str = "latest"
+    ) -> Dict[str, str]:
+        """
+        Fetches several secrets in parallel and caches them.
+
+        Secrets that are already fresh in the cache are not fetched again.
+
+        Args:
+            secret_ids: The Secret Manager secret IDs to load.
+            version: Optional. The version to load for every secret.
+
+        Returns:
+            A dictionary mapping each secret ID to its value.
+
+        Raises:
+            Exception: The first error raised by a failed fetch.
+        """
+        futures = {
+            secret_id: self._executor.submit(self.get, secret_id, version)
+            for secret_id in dict.fromkeys(secret_ids)
+        }
+        return {secret_id: f.result() for secret_id, f in futures.items()}
+
+    def invalidate(self, secret_id: Optional[str] = None) -> None:
+        """
+        Drops cached values so the next lookup fetches them again.
+
+        Args:
+            secret_id: Optional. The secret to drop. Drops all if omitted.
+        """
+        with self._lock:
+            if secret_id is None:
+                self._values.clear()
+            else:
+                for key in [k for k in self._values if k[0] == secret_id]:
+                    del self._values[key]
+
+    def close(self) -> None:
+        """Stops the background refresh workers."""
+        self._executor.shutdown(wait=False)
+
+    # --- Internal helpers ---
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _fetch(self, key: Tuple[str, str]) -> str:
+        secret_id, version = key
+        name = f"projects/{self.project_id}/secrets/{secret_id}/versions/{version}"
+        with span("secret_manager", op="access", secret=secret_id):
+            response = self.client.access_secret_version(request={"name": name})
+        record_bytes("secret_manager", received=len(response.payload.data))
+        return response.payload.data.decode("UTF-8")
+
+    def _fetch_and_store(self, key: Tuple[str, str]) -> str:
+        with self._key_lock(key):
+            # Another thread may have filled the cache while we waited.
+            cached = self._values.get(key)
+            if cached is not None and (
+                time.monotonic() - cached.fetched_at < self.ttl_seconds
+            ):
+                return cached.value
+            value = self._fetch(key)
+            self._values[key] = _CachedSecret(value, time.monotonic())
+            return value
+
+    def _schedule_refresh(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            self._executor.submit(self._refresh, key)
+        except RuntimeError:
+            # The executor was shut down; the next stale read fetches inline.
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key: Tuple[str, str]) -> None:
+        try:
+            value = self._fetch(key)
+            self._values[key] = _CachedSecret(value, time.monotonic())
+        except Exception as e:
+            logger.warning("Background refresh of secret failed: %s", e, extra={"secret": key[0]})
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -0,0 +1,211 @@
+"""
+Structured, sampled, non-blocking logging.
+
+Callers log through the standard `logging` module (get_logger()). Records
+go onto an in-memory queue through a QueueHandler, and a QueueListener
+thread formats them as one JSON object per line and writes them out, so
+the calling thread never blocks on stream I/O. High-volume levels can be
+sampled (e.g. keep 5% of DEBUG). Every record carries the correlation ID
+of the UI action or background job it belongs to, which ties one click to
+the Firestore, Algolia and LLM calls it made.
+
+Configuration (environment):
+    LOG_LEVEL: Minimum level, default INFO.
+    LOG_FORMAT: "json" (default) or "text".
+    LOG_SAMPLE_DEBUG / LOG_SAMPLE_INFO: Fraction of records kept at that
+        level, default 1.0. WARNING and above are never sampled.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+ROOT_LOGGER = "codessa"
+DEFAULT_LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+DEFAULT_LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+DEFAULT_SAMPLE_RATES = {
+    logging.DEBUG: float(os.environ.get("LOG_SAMPLE_DEBUG", "1.0")),
+    logging.INFO: float(os.environ.get("LOG_SAMPLE_INFO", "1.0")),
+}
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "correlation_id",
+}
+
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "codessa_correlation_id", default=None
+)
+
+
+def new_correlation_id() -> str:
+    """Starts a new correlation ID for the current context and returns it."""
+    correlation_id = uuid.uuid4().hex[:16]
+    _correlation_id.set(correlation_id)
+    return correlation_id
+
+
+def get_correlation_id() -> Optional[str]:
+    """Returns the current correlation ID, if one is set."""
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation(correlation_id: Optional[str] = None) -> Iterator[str]:
+    """Runs a block under `correlation_id` (or a fresh one), then restores the previous ID."""
+    token = _correlation_id.set(correlation_id or uuid.uuid4().hex[:16])
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """
+    Stamps records with the correlation ID and samples low levels.
+
+    Runs on the calling thread, before the record is queued, because the
+    correlation ID lives in that thread's context. Sampling is keyed on the
+    correlation ID, so an action's records are kept or dropped together.
+    """
+
+    def __init__(self, sample_rates: Optional[Dict[int, float]] = None):
+        super().__init__()
+        self.sample_rates = dict(DEFAULT_SAMPLE_RATES if sample_rates is None else sample_rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _correlation_id.get()
+        rate = self.sample_rates.get(record.levelno, 1.0)
+        if rate >= 1.0:
+            return True
+        if record.correlation_id:
+            return zlib.crc32(record.correlation_id.encode("ascii")) / 0xFFFFFFFF < rate
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object, including its `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable single-line format for local development."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(
+            f"{k}={v}" for k, v in vars(record).items()
+            if k not in _RECORD_ATTRIBUTES and not k.startswith("_")
+        )
+        line = f"{record.levelname:<7} [{getattr(record, 'correlation_id', None) or '-'}] {record.name}: {record.getMessage()}"
+        if fields:
+            line += f" {fields}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _StructuredQueueHandler(logging.handlers.QueueHandler):
+    """Keeps a traceback as its own "exception" field instead of appending it to the message."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exception = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return super().prepare(record)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    sample_rates: Optional[Dict[int, float]] = None,
+    stream: Optional[TextIO] = None,
+) -> logging.Logger:
+    """
+    Installs the queue-backed handler on the "codessa" logger.
+
+    Safe to call more than once; only the first call (or the first after
+    shutdown_logging()) configures anything.
+
+    Args:
+        level: Minimum level name; defaults to LOG_LEVEL.
+        fmt: "json" or "text"; defaults to LOG_FORMAT.
+        sample_rates: Fraction of records kept per level number.
+        stream: Where the listener writes; defaults to stderr.
+
+    Returns:
+        The configured "codessa" logger.
+    """
+    global _listener
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _configure_lock:
+        if _listener is not None:
+            return logger
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(TextFormatter() if (fmt or DEFAULT_LOG_FORMAT) == "text" else JsonFormatter())
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler = _StructuredQueueHandler(log_queue)
+        handler.addFilter(CorrelationFilter(sample_rates))
+
+        logger.handlers = [handler]
+        logger.setLevel(level or DEFAULT_LOG_LEVEL)
+        logger.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+    return logger
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Returns a logger under the "codessa" hierarchy, configuring logging on
+    first use.
+
+    Args:
+        name: Usually the module's __name__, e.g. "services.firestore_client".
+    """
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -0,0 +1,89 @@
+"""
+Streamlit helpers shared by app.py and codessa_inkwell_app.py.
+
+Both apps parse scrolls through the same pooled transport, stream parsed
+fields the same way and show the same debug metrics panel; this module
+holds the one copy of each.
+"""
+
+import os
+
+import streamlit as st
+
+from services.clients import get_registry, secret_fingerprint
+from services.metrics import current_trace, get_metrics
+from services.structured_logging import get_correlation_id
+
+# Parsed fields shown while a streamed parse is in flight, in display order.
+STREAMED_FIELDS = [
+    ("summary", "Summary"),
+    ("topics", "Topics"),
+    ("tools", "Tools"),
+    ("actions", "Actions"),
+    ("enhancements", "Enhancements"),
+]
+
+
+def get_parser_transport(api_endpoint, api_key):
+    """Returns the process-wide pooled transport for the parsing API, built on first parse."""
+    from services.parser_transport import ParserTransport
+    return get_registry().get(
+        "parser_transport",
+        lambda: ParserTransport(api_endpoint, api_key),
+        fingerprint=secret_fingerprint(api_endpoint, api_key),
+        close=lambda transport: transport.close(),
+    )
+
+
+def stream_parsed_fields(updates):
+    """Renders parsed fields as updates arrive (streamed fields or merged chunks); returns the full result."""
+    placeholder = st.empty()
+    parsed_data = {}
+
+    def render():
+        with placeholder.container():
+            for key, label in STREAMED_FIELDS:
+                value = parsed_data.get(key)
+                if key not in parsed_data:
+                    st.caption(f"{label}: …")
+                elif isinstance(value, list):
+                    st.markdown(f"**{label}:** {', '.join(map(str, value)) or '—'}")
+                else:
+                    st.markdown(f"**{label}:** {value}")
+
+    render()
+    for update in updates:
+        parsed_data.update(update)
+        render()
+    return parsed_data
+
+
+def display_metrics_panel():
+    """Shows this rerun's backend calls and the process counters in the sidebar (CODESSA_DEBUG_METRICS=1)."""
+    if os.environ.get("CODESSA_DEBUG_METRICS") != "1":
+        return
+    trace = current_trace()
+    with st.sidebar.expander(f"🔬 Backend calls this run ({len(trace)})"):
+        st.caption(
+            f"Total: {sum(s.duration_seconds for s in trace) * 1000:.1f} ms · "
+            f"correlation ID {get_correlation_id()}"
+        )
+        st.dataframe(
+            [
+                {
+                    "service": s.name,
+                    **{k: str(v) for k, v in s.labels.items()},
+                    "ms": round(s.duration_seconds * 1000, 2),
+                    "error": s.error or "",
+                }
+                for s in trace
+            ],
+            use_container_width=True,
+        )
+        st.json(get_metrics().snapshot(), expanded=False)
+        st.download_button(
+            "Download metrics (OpenMetrics)",
+            get_metrics().export_openmetrics(),
+            file_name="codessa_metrics.txt",
+            mime="text/plain",
+        )
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# core.memory builds a Firestore client at import time; point it at an
+# emulator address so no credentials are needed. Tests never reach it.
+os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "demo-codessa")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
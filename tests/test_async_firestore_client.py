@@ -0,0 +1,25 @@
+import asyncio
+
+import grpc
+
+from services.async_firestore_client import AsyncFirestoreClient
+
+
+def test_close_closes_the_grpc_channel():
+    async def run():
+        async with AsyncFirestoreClient(project_id="demo-codessa") as client:
+            channel = client.db._firestore_api.transport.grpc_channel
+        return channel.get_state()
+
+    assert asyncio.run(run()) == grpc.ChannelConnectivity.SHUTDOWN
+
+
+def test_close_without_rpcs_does_not_open_a_channel():
+    async def run():
+        client = AsyncFirestoreClient(project_id="demo-codessa")
+        await client.close()
+        return client
+
+    client = asyncio.run(run())
+
+    assert client.db._firestore_api_internal is None
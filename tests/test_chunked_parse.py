@@ -0,0 +1,60 @@
+import pytest
+
+from services.chunked_parse import ChunkedParser, IncompleteParseError, split_text
+from services.parse_cache import ParseCache
+from services.parser_transport import ParserError
+
+PARAGRAPHS = [f"Paragraph {i} talks about topic{i}.\n\n" for i in range(6)]
+TEXT = "".join(PARAGRAPHS)
+MAX_CHARS = len(PARAGRAPHS[0]) + 5
+
+
+def parse_paragraph(chunk):
+    if "Paragraph 3" in chunk:
+        raise ParserError("chunk failed")
+    number = chunk.split()[1]
+    return {"summary": f"Part {number}", "topics": [f"topic{number}"]}
+
+
+def test_split_text_keeps_every_character():
+    chunks = split_text(TEXT, MAX_CHARS)
+
+    assert len(chunks) == len(PARAGRAPHS)
+    assert "".join(chunks) == TEXT
+
+
+def test_merges_chunks_in_order():
+    parser = ChunkedParser(lambda chunk: {"topics": [chunk.split()[1]]}, max_chars=MAX_CHARS)
+
+    assert parser.parse(TEXT)["topics"] == [str(i) for i in range(6)]
+
+
+def test_partial_failure_raises_with_the_merged_result():
+    parser = ChunkedParser(parse_paragraph, max_chars=MAX_CHARS)
+
+    with pytest.raises(IncompleteParseError) as raised:
+        parser.parse(TEXT)
+
+    assert raised.value.failed == 1
+    assert raised.value.partial["topics"] == ["topic0", "topic1", "topic2", "topic4", "topic5"]
+
+
+def test_partial_result_is_not_cached():
+    cache = ParseCache()
+    parser = ChunkedParser(parse_paragraph, max_chars=MAX_CHARS)
+
+    with pytest.raises(IncompleteParseError):
+        cache.get_or_parse(TEXT, parser.parse)
+
+    complete = ChunkedParser(lambda chunk: {"summary": "ok"}, max_chars=MAX_CHARS)
+    parsed, from_cache = cache.get_or_parse(TEXT, complete.parse)
+    assert parsed == {"summary": "ok."} and not from_cache
+
+
+def test_every_chunk_failing_raises_parser_error():
+    def fail(chunk):
+        raise ParserError("down")
+
+    with pytest.raises(ParserError) as raised:
+        ChunkedParser(fail, max_chars=MAX_CHARS).parse(TEXT)
+    assert not isinstance(raised.value, IncompleteParseError)
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from services.firestore_client import FirestoreClient
+
+PERMISSION_DENIED = 7
+
+
+class FakeWriter:
+    """Reports every document whose ID starts with "bad" as failed on close."""
+
+    def __init__(self):
+        self.references = []
+
+    def on_write_result(self, callback):
+        self.on_result = callback
+
+    def on_write_error(self, callback):
+        self.on_error = callback
+
+    def create(self, reference, data):
+        self.references.append(reference)
+
+    def close(self):
+        for reference in self.references:
+            if reference.id.startswith("bad"):
+                failure = SimpleNamespace(
+                    operation=SimpleNamespace(reference=reference),
+                    message="denied",
+                    attempts=0,
+                    code=PERMISSION_DENIED,
+                )
+                assert self.on_error(failure, self) is False
+            else:
+                self.on_result(reference, None, self)
+
+
+class FakeDb:
+    def bulk_writer(self, options):
+        return FakeWriter()
+
+    def collection(self, name):
+        return SimpleNamespace(document=lambda doc_id: SimpleNamespace(id=doc_id))
+
+
+def test_add_many_returns_only_written_documents():
+    client = FirestoreClient()
+    client.db = FakeDb()
+
+    result = client.add_many("scrolls", [{"id": "good1"}, {"id": "bad1"}, {"id": "good2"}])
+
+    assert sorted(result.succeeded) == ["good1", "good2"]
+    assert list(result.failed) == ["bad1"]
+    assert [doc["id"] for doc in result.documents] == ["good1", "good2"]
@@ -0,0 +1,104 @@
+from google.api_core.exceptions import PermissionDenied, ServiceUnavailable
+
+from services.ingest import BulkIngestor
+from services.search_outbox import OP_UPSERT
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, reference, data):
+        self.writes.append((reference, data))
+
+    def commit(self):
+        if self.db.errors:
+            raise self.db.errors.pop(0)
+        self.db.commits.append(self.writes)
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return doc_id
+
+
+class FakeDb:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.commits = []
+
+    def collection(self, name):
+        return FakeCollection()
+
+    def batch(self):
+        return FakeBatch(self)
+
+
+class FakeOutbox:
+    def __init__(self):
+        self.collection = type("Collection", (), {"id": "search_outbox"})()
+
+    def enqueue(self, batch, op, object_id, record):
+        batch.set(f"outbox/{object_id}", {"op": op, "object_id": object_id, "record": record})
+
+
+def make_ingestor(db, outbox=None, **kwargs):
+    return BulkIngestor(
+        db,
+        outbox,
+        parse_fn=lambda text: {"summary": text},
+        build_document=lambda sid, text, parsed: {"raw_text": text},
+        build_search_record=lambda sid, doc: {"objectID": sid},
+        retry_backoff_seconds=0,
+        **kwargs,
+    )
+
+
+def test_transient_commit_errors_are_retried():
+    db = FakeDb(errors=[ServiceUnavailable("down"), ServiceUnavailable("down")])
+
+    report = make_ingestor(db).ingest(["one", "two"])
+
+    assert report.stored == 2
+    assert report.write_failures == 0
+    assert len(db.commits) == 1
+
+
+def test_permanent_commit_errors_are_not_retried():
+    db = FakeDb(errors=[PermissionDenied("no")])
+
+    report = make_ingestor(db).ingest(["one", "two"])
+
+    assert report.stored == 0
+    assert report.write_failures == 2
+    assert db.commits == []
+
+
+def test_batches_are_capped_by_size():
+    db = FakeDb()
+
+    # Each document is ~1 KiB, so at most three fit in 3.5 KiB.
+    report = make_ingestor(db, max_batch_bytes=3584).ingest(["x" * 1000] * 7)
+
+    assert report.stored == 7
+    assert [len(writes) for writes in db.commits] == [3, 3, 1]
+
+
+def test_outbox_entries_commit_with_their_scrolls():
+    db = FakeDb()
+
+    report = make_ingestor(db, FakeOutbox(), batch_size=500).ingest(["one", "two", "three"])
+
+    assert report.stored == 3
+    writes = db.commits[0]
+    outbox_entries = [data for reference, data in writes if reference.startswith("outbox/")]
+    assert len(writes) == 6
+    assert {e["op"] for e in outbox_entries} == {OP_UPSERT}
+    assert {e["record"]["objectID"] for e in outbox_entries} == {e["object_id"] for e in outbox_entries}
+
+
+def test_outbox_entries_count_against_the_batch_write_limit():
+    ingestor = make_ingestor(FakeDb(), FakeOutbox(), batch_size=500)
+
+    assert ingestor.batch_size == 250
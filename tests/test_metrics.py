@@ -0,0 +1,66 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from services.hydration import fetch_documents
+from services.metrics import current_trace, span, start_trace, with_current_context
+
+
+class FakeSnapshot:
+    exists = True
+
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+    def to_dict(self):
+        return {"id": self.id}
+
+
+class FakeDocument:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return FakeDocument(doc_id)
+
+
+class FakeDb:
+    def collection(self, name):
+        return FakeCollection()
+
+    def get_all(self, refs, field_paths=None):
+        return [FakeSnapshot(ref.id) for ref in refs]
+
+
+def in_new_context(fn):
+    return contextvars.Context().run(fn)
+
+
+def test_worker_thread_spans_reach_the_callers_trace():
+    def run():
+        start_trace()
+
+        def work(i):
+            with span("test", op=f"work{i}"):
+                return i
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(with_current_context(work), range(8))) == list(range(8))
+        return current_trace()
+
+    trace = in_new_context(run)
+
+    assert sorted(s.labels["op"] for s in trace) == [f"work{i}" for i in range(8)]
+
+
+def test_fetch_documents_chunks_are_traced():
+    def run():
+        start_trace()
+        docs = fetch_documents(FakeDb(), [f"d{i}" for i in range(250)], "scrolls", chunk_size=100)
+        return docs, current_trace()
+
+    docs, trace = in_new_context(run)
+
+    assert len(docs) == 250
+    assert [s.labels["op"] for s in trace] == ["get_all"] * 3
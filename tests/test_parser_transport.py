@@ -0,0 +1,39 @@
+import pytest
+import requests
+
+from services.parser_transport import ParserError, ParserTransport
+
+
+def response(status, body):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.request = requests.Request("POST", "https://parser.test/parse", data=b"{}").prepare()
+    return resp
+
+
+@pytest.fixture
+def transport():
+    transport = ParserTransport("https://parser.test/parse", "key")
+    yield transport
+    transport.close()
+
+
+def test_malformed_json_is_reported_as_malformed(transport, monkeypatch):
+    monkeypatch.setattr(transport.session, "post", lambda *a, **kw: response(200, b"<html>oops"))
+
+    with pytest.raises(ParserError, match="malformed data"):
+        transport.parse("some text")
+
+
+def test_http_errors_are_reported_as_request_failures(transport, monkeypatch):
+    monkeypatch.setattr(transport.session, "post", lambda *a, **kw: response(400, b"{}"))
+
+    with pytest.raises(ParserError, match="API request failed"):
+        transport.parse("some text")
+
+
+def test_valid_json_is_returned(transport, monkeypatch):
+    monkeypatch.setattr(transport.session, "post", lambda *a, **kw: response(200, b'{"summary": "ok"}'))
+
+    assert transport.parse("some text") == {"summary": "ok"}
@@ -0,0 +1,125 @@
+import pytest
+
+from core.query import (
+    DESCENDING,
+    FallbackScanLimitExceeded,
+    Query,
+    QueryPlanner,
+    load_indexes,
+    required_index,
+)
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeQuery:
+    """Supports the equality queries the fallback issues, ordered by document id."""
+
+    def __init__(self, docs, filters=(), after=None, count=None, streamed=None):
+        self.docs = docs
+        self.filters = list(filters)
+        self.after = after
+        self.count = count
+        self.streamed = streamed if streamed is not None else []
+
+    def _copy(self, **changes):
+        state = {"filters": self.filters, "after": self.after, "count": self.count}
+        return FakeQuery(self.docs, streamed=self.streamed, **{**state, **changes})
+
+    def select(self, fields):
+        return self
+
+    def where(self, filter):
+        return self._copy(filters=self.filters + [filter])
+
+    def order_by(self, field_path, direction=None):
+        assert field_path == "__name__"
+        return self
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot.id)
+
+    def stream(self):
+        matched = [
+            FakeSnapshot(doc_id, data) for doc_id, data in sorted(self.docs.items())
+            if all(data.get(f.field_path) == f.value for f in self.filters)
+            and (self.after is None or doc_id > self.after)
+        ]
+        page = matched[:self.count]
+        self.streamed.append(len(page))
+        return page
+
+
+class FakeDb:
+    def __init__(self, docs):
+        self.query = FakeQuery(docs)
+
+    def collection(self, name):
+        return self.query
+
+
+def scrolls(count, agent_id="ava"):
+    return {f"s{i:05d}": {"agent_id": agent_id, "created_at": i} for i in range(count)}
+
+
+def shape(after=None):
+    query = Query("scrolls").where("agent_id", "==", "ava").order_by("created_at", DESCENDING)
+    if after is not None:
+        query.where("created_at", ">", after)
+    return query.limit(5)
+
+
+@pytest.fixture
+def planner(tmp_path):
+    def build(docs, scan_limit=20000):
+        return QueryPlanner(
+            FakeDb(docs),
+            index_path=str(tmp_path / "indexes.json"),
+            missing_path=str(tmp_path / "missing.json"),
+            scan_limit=scan_limit,
+        )
+    return build
+
+
+def test_fallback_pages_past_one_page(planner):
+    docs = {**scrolls(1200), "x": {"agent_id": "bob", "created_at": 5000}}
+    run = planner(docs)
+
+    results, token = run.run(shape())
+
+    assert [d["created_at"] for d in results] == [1199, 1198, 1197, 1196, 1195]
+    assert token is not None
+    assert run.db.query.streamed == [500, 500, 200]
+
+
+def test_fallback_applies_residual_filters_over_every_page(planner):
+    results, _ = planner(scrolls(1200)).run(shape(after=1197))
+
+    assert [d["created_at"] for d in results] == [1199, 1198]
+
+
+def test_fallback_raises_past_the_scan_limit(planner):
+    with pytest.raises(FallbackScanLimitExceeded):
+        planner(scrolls(1001), scan_limit=1000).run(shape())
+
+
+def test_fallback_at_exactly_the_scan_limit_succeeds(planner):
+    results, _ = planner(scrolls(1000), scan_limit=1000).run(shape())
+
+    assert results[0]["created_at"] == 999
+
+
+def test_missing_index_is_recorded_for_write(planner, tmp_path):
+    planner(scrolls(3)).run(shape())
+
+    assert load_indexes(str(tmp_path / "missing.json")) == {required_index(shape())}
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core import memory
+from core.query import ASCENDING, INDEX_FILE, Query, QueryPlanner, covered, load_indexes, required_index
+
+AGENT = "ava"
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_scroll(i, agent_id=AGENT, response="A short memory."):
+    return {
+        "id": f"s{i:03d}",
+        "agent_id": agent_id,
+        "prompt": f"Prompt {i}",
+        "response": response,
+        "created_at": START + timedelta(minutes=i),
+    }
+
+
+class FakeSnapshot:
+    def __init__(self, doc):
+        self.id = doc["id"]
+        self._data = {k: v for k, v in doc.items() if k != "id"}
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeIndexedQuery:
+    """Serves the indexed path of QueryPlanner: field filters, ordering, a cursor and a limit."""
+
+    def __init__(self, state, filters=(), orders=(), after=None, count=None):
+        self.state = state
+        self.filters = list(filters)
+        self.orders = list(orders)
+        self.after = after
+        self.count = count
+
+    def _copy(self, **changes):
+        fields = {"filters": self.filters, "orders": self.orders, "after": self.after, "count": self.count}
+        return FakeIndexedQuery(self.state, **{**fields, **changes})
+
+    def select(self, fields):
+        return self
+
+    def where(self, filter):
+        return self._copy(filters=self.filters + [filter])
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self.orders + [(field_path, direction)])
+
+    def start_after(self, values):
+        return self._copy(after=list(values))
+
+    def limit(self, count):
+        return self._copy(count=count)
+
+    def stream(self):
+        ops = {"==": lambda a, b: a == b, ">": lambda a, b: a > b}
+        rows = [r for r in self.state["scrolls"]
+                if all(ops[f.op_string](r[f.field_path], f.value) for f in self.filters)]
+        assert all(d == ASCENDING for _, d in self.orders)
+        key = lambda r: [r["id"] if f == "__name__" else r[f] for f, _ in self.orders]
+        rows.sort(key=key)
+        if self.after is not None:
+            rows = [r for r in rows if key(r) > self.after]
+        return iter([FakeSnapshot(r) for r in rows[:self.count]])
+
+
+class FakeDb:
+    def __init__(self, state):
+        self.state = state
+
+    def collection(self, name):
+        assert name == "scrolls"
+        return FakeIndexedQuery(self.state)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Runs reflect_scrolls' reads through a QueryPlanner over in-memory scrolls, with in-memory writes."""
+    state = {"scrolls": [], "head": {}, "versions": []}
+    planner = QueryPlanner(FakeDb(state), index_path=INDEX_FILE, missing_path=None)
+
+    def fallback(query, limit, cursor):
+        raise AssertionError(f"reflection query fell back: {required_index(query)}")
+
+    def save_reflection(agent_id, data, base_version):
+        if base_version is not None and state["head"].get("version", 0) != base_version:
+            return None
+        version = state["head"].get("version", 0) + 1
+        state["head"] = {**data, "version": version}
+        state["versions"].append(state["head"])
+        return version
+
+    monkeypatch.setattr(planner, "_run_fallback", fallback)
+    monkeypatch.setattr(memory, "_query_planner", planner)
+    monkeypatch.setattr(memory, "get_reflection", lambda agent_id: dict(state["head"]))
+    monkeypatch.setattr(memory, "_save_reflection", save_reflection)
+    return state
+
+
+def test_folds_every_scroll_when_more_than_limit_arrived(store):
+    store["scrolls"] = [make_scroll(i) for i in range(25)] + [make_scroll(99, agent_id="other")]
+
+    memory.reflect_scrolls(AGENT, limit=10)
+
+    head = store["head"]
+    assert head["scroll_count"] == 25
+    assert head["scroll_ids"] == [f"s{i:03d}" for i in range(25)]
+    assert head["high_water_mark"] == START + timedelta(minutes=24)
+    assert head["version"] == 1
+
+
+def test_later_reflection_only_folds_newer_scrolls(store):
+    store["scrolls"] = [make_scroll(i) for i in range(12)]
+    memory.reflect_scrolls(AGENT, limit=5)
+    store["scrolls"] += [make_scroll(i) for i in range(12, 30)]
+
+    memory.reflect_scrolls(AGENT, limit=5)
+
+    head = store["head"]
+    assert head["scroll_count"] == 30
+    assert head["scroll_ids"] == [f"s{i:03d}" for i in range(12, 30)]
+    assert head["version"] == 2
+
+
+def test_scrolls_over_the_token_budget_are_not_skipped(store):
+    # Each scroll needs ~200 tokens, so one batch of 10 does not fit in 500.
+    store["scrolls"] = [make_scroll(i, response="word " * 160) for i in range(10)]
+
+    memory.reflect_scrolls(AGENT, limit=10, token_budget=500)
+
+    head = store["head"]
+    assert head["scroll_count"] == 10
+    assert head["scroll_ids"] == [f"s{i:03d}" for i in range(10)]
+    assert head["high_water_mark"] == START + timedelta(minutes=9)
+
+
+def test_nothing_new_returns_cached_reflection(store):
+    store["scrolls"] = [make_scroll(i) for i in range(3)]
+    memory.reflect_scrolls(AGENT)
+
+    assert memory.reflect_scrolls(AGENT).startswith("Ava reflected on 3 memories")
+    assert len(store["versions"]) == 1
+
+
+def test_concurrent_commit_is_folded_on_top(store, monkeypatch):
+    store["scrolls"] = [make_scroll(i) for i in range(3)]
+    save = memory._save_reflection
+
+    def racing_save(agent_id, data, base_version):
+        # Another caller commits version 1 between our read and our write.
+        if not store["head"]:
+            store["head"] = {"version": 1, "scroll_count": 3, "reflection": "theirs",
+                             "high_water_mark": START + timedelta(minutes=2)}
+        return save(agent_id, data, base_version)
+
+    monkeypatch.setattr(memory, "_save_reflection", racing_save)
+    memory.reflect_scrolls(AGENT)
+
+    # Our stale fold was rejected; the retry found nothing new on top of theirs.
+    assert store["head"]["reflection"] == "theirs"
+    assert store["head"]["version"] == 1
+
+
+def test_fold_queries_are_covered_by_declared_indexes():
+    indexes = load_indexes(INDEX_FILE)
+    cursor = Query("scrolls").where("agent_id", "==", AGENT).order_by("created_at", ASCENDING)
+    legacy = Query("scrolls").where("agent_id", "==", AGENT).where("created_at", ">", START).order_by("created_at", ASCENDING)
+
+    assert covered(cursor, indexes)
+    assert covered(legacy, indexes)
+
+
+def test_reflection_saved_with_only_a_created_at_mark_resumes_after_it(store):
+    store["scrolls"] = [make_scroll(i) for i in range(6)]
+    store["head"] = {"version": 1, "scroll_count": 3, "reflection": "old",
+                     "high_water_mark": START + timedelta(minutes=2)}
+
+    memory.reflect_scrolls(AGENT)
+
+    assert store["head"]["scroll_ids"] == ["s003", "s004", "s005"]
+    assert store["head"]["high_water_id"] == "s005"
+
+
+def test_budget_cut_inside_equal_timestamps_resumes_inside_the_run(store):
+    # Ten scrolls share one created_at and only two fit in each fold.
+    store["scrolls"] = [make_scroll(i, response="word " * 160) | {"created_at": START} for i in range(10)]
+
+    memory.reflect_scrolls(AGENT, limit=10, token_budget=500)
+
+    head = store["head"]
+    assert head["scroll_ids"] == [f"s{i:03d}" for i in range(10)]
+    assert head["high_water_id"] == "s009"
+
+
+def test_budget_below_the_packing_minimum_still_advances(store):
+    store["scrolls"] = [make_scroll(i) for i in range(3)]
+
+    memory.reflect_scrolls(AGENT, limit=2, token_budget=16)
+
+    assert store["head"]["scroll_ids"] == ["s000", "s001", "s002"]
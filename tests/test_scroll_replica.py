@@ -0,0 +1,63 @@
+import time
+
+from services.scroll_replica import ReplicaManager
+
+
+class FakeWatch:
+    is_active = True
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class FakeQuery:
+    def __init__(self):
+        self.watches = []
+
+    def where(self, filter):
+        return self
+
+    def on_snapshot(self, callback):
+        self.watches.append(FakeWatch(callback))
+        return self.watches[-1]
+
+
+class FakeDb:
+    def __init__(self):
+        self.query = FakeQuery()
+
+    def collection(self, name):
+        return self.query
+
+
+def test_only_the_first_attach_waits_for_the_snapshot():
+    db = FakeDb()
+    manager = ReplicaManager(db)
+
+    started = time.perf_counter()
+    assert manager.get("u", timeout=0.2) is None
+    assert time.perf_counter() - started >= 0.2
+
+    started = time.perf_counter()
+    assert manager.get("u", timeout=5) is None
+    assert time.perf_counter() - started < 0.1
+    assert len(db.query.watches) == 1
+
+    db.query.watches[0].callback(None, [], None)
+    assert manager.get("u", timeout=5) is not None
+
+
+def test_stopped_listener_is_reattached_and_waited_on():
+    db = FakeDb()
+    manager = ReplicaManager(db)
+    manager.get("u", timeout=0)
+    db.query.watches[0].callback(None, [], None)
+    db.query.watches[0].is_active = False
+
+    started = time.perf_counter()
+    assert manager.get("u", timeout=0.2) is None
+    assert time.perf_counter() - started >= 0.2
+    assert len(db.query.watches) == 2
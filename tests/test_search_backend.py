@@ -0,0 +1,132 @@
+import pytest
+
+from services import search_backend
+from services.search_backend import LocalSearchBackend
+
+
+def record(object_id, created_by, summary):
+    return {"objectID": object_id, "summary": summary, "metadata": {"created_by": created_by}}
+
+
+def test_created_by_filter_is_exact():
+    index = LocalSearchBackend()
+    index.save_objects([
+        record("a", "User-1", "firestore indexing notes"),
+        record("b", "user-1", "firestore indexing notes"),
+        record("c", "user", "firestore indexing notes"),
+        record("d", "1", "firestore indexing notes"),
+    ])
+
+    result = index.search("firestore", created_by="user-1")
+
+    assert [hit["objectID"] for hit in result["hits"]] == ["b"]
+    assert result["nbHits"] == 1
+    assert result["nbPages"] == 1
+
+
+def test_search_ranks_and_pages_across_users():
+    index = LocalSearchBackend()
+    index.save_objects([record(str(i), f"user-{i % 2}", f"note {i} about search") for i in range(5)])
+
+    first = index.search("search", hits_per_page=2)
+    mine = index.search("search", hits_per_page=2, created_by="user-0")
+
+    assert first["nbHits"] == 5 and first["nbPages"] == 3
+    assert mine["nbHits"] == 3 and len(mine["hits"]) == 2
+
+
+def test_owner_ids_are_not_searchable():
+    index = LocalSearchBackend()
+    index.save_objects([record("a", "alice", "unrelated text")])
+
+    assert index.search("alice")["nbHits"] == 0
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, summary):
+        self.id = doc_id
+        self._data = {"content": {"summary": summary}, "metadata": {"created_by": "u"}}
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeCollection:
+    def select(self, fields):
+        return self
+
+
+class FakeDb:
+    def collection(self, name):
+        return FakeCollection()
+
+
+def test_backfill_does_not_overwrite_outbox_writes(monkeypatch):
+    index = LocalSearchBackend()
+
+    def iter_pages(query, orders, page_size, page_token=None, collection=""):
+        # Both pages were read before the outbox applied its writes.
+        stale = [FakeSnapshot("edited", "old text"), FakeSnapshot("deleted", "gone")]
+        index.save_objects([record("edited", "u", "new text")])
+        index.delete_objects(["deleted"])
+        yield stale, "page-2"
+        yield [FakeSnapshot("untouched", "kept")], None
+
+    monkeypatch.setattr(search_backend, "ordered_query", lambda query, orders: query)
+    monkeypatch.setattr(search_backend, "iter_pages", iter_pages)
+
+    assert index.backfill(FakeDb()) == 1
+
+    assert index.search("new")["nbHits"] == 1
+    assert index.search("old")["nbHits"] == 0
+    assert index.search("gone")["nbHits"] == 0
+    assert index.search("kept")["nbHits"] == 1
+    # Writes after the backfill are no longer tracked.
+    index.save_objects([record("later", "u", "later")])
+    assert index._written_during_backfill is None
+
+
+def test_partial_update_during_backfill_is_merged_into_the_backfilled_record(monkeypatch):
+    index = LocalSearchBackend()
+
+    def iter_pages(query, orders, page_size, page_token=None, collection=""):
+        # The edit reaches the outbox before the backfill gets to the scroll.
+        index.partial_update_objects([{"objectID": "late", "summary": "edited text"}], {"createIfNotExists": False})
+        yield [FakeSnapshot("late", "original text")], None
+
+    monkeypatch.setattr(search_backend, "ordered_query", lambda query, orders: query)
+    monkeypatch.setattr(search_backend, "iter_pages", iter_pages)
+
+    assert index.backfill(FakeDb()) == 1
+
+    assert index.search("edited")["nbHits"] == 1
+    assert index.search("original")["nbHits"] == 0
+
+
+def test_interrupted_backfill_resumes_and_is_marked_complete(monkeypatch, tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    tokens = []
+
+    def interrupted(query, orders, page_size, page_token=None, collection=""):
+        tokens.append(page_token)
+        yield [FakeSnapshot("a", "first page")], "after-a"
+        raise RuntimeError("process stopped")
+
+    def resumed(query, orders, page_size, page_token=None, collection=""):
+        tokens.append(page_token)
+        yield [FakeSnapshot("b", "second page")], None
+
+    monkeypatch.setattr(search_backend, "ordered_query", lambda query, orders: query)
+    monkeypatch.setattr(search_backend, "iter_pages", interrupted)
+    index = LocalSearchBackend(path)
+    with pytest.raises(RuntimeError):
+        index.backfill(FakeDb())
+    index.close()
+
+    index = LocalSearchBackend(path)
+    assert len(index) == 1 and not index.backfill_complete
+    monkeypatch.setattr(search_backend, "iter_pages", resumed)
+    index.backfill(FakeDb())
+
+    assert tokens == [None, "after-a"]
+    assert len(index) == 2 and index.backfill_complete
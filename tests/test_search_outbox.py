@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.cloud import firestore
+
+from services.search_outbox import OP_UPSERT, OutboxWorker, SearchOutbox
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeSnapshot:
+    def __init__(self, reference):
+        self.reference = reference
+        self.id = reference.id
+
+    def to_dict(self):
+        return dict(self.reference.parent.docs[self.id])
+
+
+class FakeDocument:
+    def __init__(self, parent, doc_id):
+        self.parent = parent
+        self.id = doc_id
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.id = name
+        self.docs = {}
+        self._limit = None
+
+    def document(self, doc_id):
+        return FakeDocument(self, doc_id)
+
+    def order_by(self, field):
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def stream(self):
+        ordered = sorted(self.docs, key=lambda doc_id: self.docs[doc_id]["enqueued_at"])
+        return [FakeSnapshot(self.document(doc_id)) for doc_id in ordered[:self._limit]]
+
+
+class FakeBatch:
+    def __init__(self):
+        self.writes = []
+
+    def set(self, reference, data):
+        self.writes.append(lambda: reference.parent.docs.__setitem__(reference.id, dict(data)))
+
+    def update(self, reference, data):
+        def apply():
+            doc = reference.parent.docs[reference.id]
+            for field, value in data.items():
+                if isinstance(value, firestore.Increment):
+                    doc[field] = doc.get(field, 0) + value.value
+                else:
+                    doc[field] = value
+        self.writes.append(apply)
+
+    def delete(self, reference):
+        self.writes.append(lambda: reference.parent.docs.pop(reference.id, None))
+
+    def commit(self):
+        for write in self.writes:
+            write()
+
+
+class FakeDb:
+    def __init__(self):
+        self.collections = {}
+
+    def collection(self, name):
+        return self.collections.setdefault(name, FakeCollection(name))
+
+    def batch(self):
+        return FakeBatch()
+
+
+class FakeIndex:
+    """Rejects any batch containing a poisoned objectID."""
+
+    def __init__(self, poisoned=(), down=False):
+        self.poisoned = set(poisoned)
+        self.down = down
+        self.saved = {}
+
+    def save_objects(self, records):
+        if self.down or any(r["objectID"] in self.poisoned for r in records):
+            raise RuntimeError("record rejected")
+        self.saved.update((r["objectID"], r) for r in records)
+        return self
+
+    def wait(self):
+        return self
+
+
+@pytest.fixture
+def outbox():
+    return SearchOutbox(FakeDb(), max_attempts=3)
+
+
+def enqueue(outbox, object_ids, attempts=0):
+    for i, object_id in enumerate(object_ids):
+        outbox.collection.docs[f"e-{object_id}"] = {
+            "object_id": object_id,
+            "op": OP_UPSERT,
+            "record": {"objectID": object_id},
+            "attempts": attempts,
+            "enqueued_at": START + timedelta(seconds=i),
+        }
+
+
+def test_bad_record_does_not_block_the_batch(outbox):
+    enqueue(outbox, ["bad", "a", "b"])
+    index = FakeIndex(poisoned={"bad"})
+
+    assert outbox.drain(index) == 2
+
+    assert set(index.saved) == {"a", "b"}
+    assert list(outbox.collection.docs) == ["e-bad"]
+    assert outbox.collection.docs["e-bad"]["attempts"] == 1
+    assert "bad" in outbox.last_error
+
+
+def test_record_is_dead_lettered_after_max_attempts(outbox):
+    enqueue(outbox, ["bad", "a"], attempts=2)
+    index = FakeIndex(poisoned={"bad"})
+
+    assert outbox.drain(index) == 2
+
+    assert outbox.collection.docs == {}
+    dead = outbox.dead_letters.docs["e-bad"]
+    assert dead["attempts"] == 3 and dead["last_error"] == "record rejected"
+
+
+def test_unavailable_index_raises_without_dead_lettering(outbox):
+    enqueue(outbox, [f"r{i}" for i in range(10)], attempts=2)
+
+    with pytest.raises(RuntimeError):
+        outbox.drain(FakeIndex(down=True))
+
+    assert len(outbox.collection.docs) == 10
+    assert outbox.dead_letters.docs == {}
+    assert all(doc["attempts"] == 3 for doc in outbox.collection.docs.values())
+
+
+def test_worker_clears_last_error_after_recovery(outbox):
+    enqueue(outbox, ["a"])
+    worker = OutboxWorker(outbox, FakeIndex(down=True), interval_seconds=0)
+    worker._stop.wait = lambda timeout: worker._stop.set()
+
+    worker._run()
+    assert worker.stats()["last_error"] == "record rejected"
+    assert worker.stats()["lag_seconds"] > 0
+
+    worker.index = FakeIndex()
+    worker._stop.clear()
+    worker._run()
+    assert worker.stats()["last_error"] is None
+    assert outbox.collection.docs == {}
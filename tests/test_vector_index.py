@@ -0,0 +1,82 @@
+import numpy as np
+
+from core.vector_index import HashingEmbedder, VectorIndex
+
+TOPICS = ["firestore", "algolia", "streamlit", "numpy", "pytest", "docker", "oauth", "sqlite"]
+
+
+def corpus(count):
+    rng = np.random.default_rng(7)
+    items = []
+    for i in range(count):
+        words = rng.choice(TOPICS, size=4, replace=True)
+        text = " ".join(words) + f" note{i} detail{i % 97}"
+        items.append((f"s{i}", text, f"agent-{i % 5}"))
+    return items
+
+
+def test_ivf_recall_matches_brute_force():
+    items = corpus(2000)
+    brute = VectorIndex(ivf_threshold=10**9)
+    ivf = VectorIndex(ivf_threshold=10**9, nprobe=8)
+    brute.upsert(items)
+    ivf.upsert(items)
+    ivf.train(nlist=32)
+
+    queries = [text for _, text, _ in items[::100]]
+    recalls = []
+    for query in queries:
+        expected = {item_id for item_id, _ in brute.search(query, k=10)}
+        found = {item_id for item_id, _ in ivf.search(query, k=10)}
+        recalls.append(len(expected & found) / len(expected))
+
+    assert np.mean(recalls) >= 0.8
+    # Every query's own scroll is its best match under both strategies.
+    for (item_id, text, _) in items[::100]:
+        assert brute.search(text, k=1)[0][0] == item_id
+        assert ivf.search(text, k=1)[0][0] == item_id
+
+
+def test_index_trains_itself_past_the_threshold():
+    index = VectorIndex(ivf_threshold=100)
+    index.upsert(corpus(99))
+    assert index._centroids is None
+    index.upsert(corpus(101)[99:])
+    assert index._centroids is not None
+
+
+def test_group_filter_only_returns_that_group():
+    index = VectorIndex()
+    index.upsert(corpus(200))
+
+    results = index.search("firestore algolia", k=20, group="agent-3")
+
+    assert len(results) == 20
+    assert all(int(item_id[1:]) % 5 == 3 for item_id, _ in results)
+    assert index.search("firestore", group="unknown-agent") == []
+
+
+def test_upsert_replaces_and_remove_deletes():
+    index = VectorIndex()
+    index.upsert([("a", "firestore cursors", "x"), ("b", "algolia ranking", "x"), ("c", "docker images", "y")])
+
+    index.upsert([("a", "docker compose", "y")])
+    assert len(index) == 3
+    assert index.search("docker compose", k=1)[0][0] == "a"
+    assert [item_id for item_id, _ in index.search("docker", k=5, group="x")] == ["b"]
+
+    index.remove(["a", "missing"])
+    assert len(index) == 2 and "a" not in index
+    assert {item_id for item_id, _ in index.search("docker compose", k=5)} == {"b", "c"}
+    # The row swapped into the freed slot keeps its vector and group.
+    assert index.search("docker images", k=1, group="y")[0][0] == "c"
+
+
+def test_scores_are_cosine_similarities():
+    index = VectorIndex(HashingEmbedder(dim=64))
+    index.upsert([("a", "firestore cursors", None)])
+
+    (item_id, score), = index.search("firestore cursors")
+
+    assert item_id == "a"
+    assert abs(score - 1.0) < 1e-5